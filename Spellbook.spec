@@ -7,8 +7,10 @@ a = Analysis(
     binaries=[],
     # Bundled data files for initial migration (official content JSON files).
     # User data files (characters.json, settings.json, etc.) are created at runtime.
-    # spellbook.db is created at runtime from bundled JSON + tools/spell_data.py.
+    # official.db (built by tools/build_official_db.py) is the read-only official
+    # content; the user's spellbook.db is created at runtime as an overlay on it.
     datas=[
+        ('official.db', '.'),
         ('lineages.json', '.'),
         ('feats.json', '.'),
         ('classes.json', '.'),
@@ -125,6 +125,7 @@ class BackgroundManager:
     def __init__(self):
         self._db = None
         self._backgrounds_cache: Optional[List[Background]] = None
+        self._cache_generation: Optional[int] = None  # db.change_generation() the cache was built at
     
     @property
     def db(self):
@@ -137,13 +138,14 @@ class BackgroundManager:
     
     @property
     def backgrounds(self) -> List[Background]:
-        """Get all backgrounds, using cache if available."""
-        if self._backgrounds_cache is None:
+        """Get all backgrounds, reloading the cache when another write changed them."""
+        if self._backgrounds_cache is None or self._cache_generation != self.db.change_generation('backgrounds'):
             self._reload_cache()
         return self._backgrounds_cache or []
     
     def _reload_cache(self):
         """Reload backgrounds from database into cache."""
+        self._cache_generation = self.db.change_generation('backgrounds')
         self._backgrounds_cache = []
         for bg_dict in self.db.get_all_backgrounds():
             self._backgrounds_cache.append(self._dict_to_background(bg_dict))
@@ -207,8 +209,6 @@ class BackgroundManager:
             self.db.update_background(existing['id'], bg_dict)
         else:
             self.db.insert_background(bg_dict)
-        
-        self._invalidate_cache()
         return True
     
     def remove_background(self, background_name: str) -> bool:
@@ -221,7 +221,6 @@ class BackgroundManager:
             return False  # Cannot remove official backgrounds
         
         result = self.db.delete_background(existing['id'])
-        self._invalidate_cache()
         return result
     
     def get_background(self, name: str) -> Optional[Background]:
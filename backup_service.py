@@ -0,0 +1,235 @@
+"""
+Database Backup Service for D&D Spellbook Application.
+Takes online snapshots of spellbook.db with the SQLite backup API on a
+background thread, rotates old backups and restores from them.
+"""
+
+import os
+import re
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from database import SpellDatabase
+from db_worker import DatabaseWorker, get_db_worker
+from settings import SettingsManager, get_settings_manager
+
+
+@dataclass
+class BackupInfo:
+    """A backup file in the backups folder."""
+    path: str
+    created: datetime
+    size_bytes: int
+    label: str = ""  # e.g. "pre-restore"; empty for regular backups
+    
+    @property
+    def file_name(self) -> str:
+        return os.path.basename(self.path)
+
+
+class BackupService:
+    """Creates, rotates and restores backups of the spell database.
+    
+    Backups are written next to the database in the same backups/ folder
+    data_migration uses, named <database>.<YYYYmmdd_HHMMSS>[.<label>].bak.
+    Creating a backup runs on its own thread so a long copy never delays
+    queries on the database worker; restoring runs on the database worker so
+    it is ordered with other database requests.
+    """
+    
+    BACKUP_DIR_NAME = "backups"
+    TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+    
+    def __init__(self, db_path: Optional[str] = None, backup_dir: Optional[str] = None,
+                 settings_manager: Optional[SettingsManager] = None):
+        """Initialize the backup service for a database file (default: spellbook.db)."""
+        self._db = SpellDatabase(db_path)
+        self.db_path = self._db.db_path
+        self.backup_dir = backup_dir or os.path.join(
+            os.path.dirname(os.path.abspath(self.db_path)), self.BACKUP_DIR_NAME)
+        self._settings_manager = settings_manager
+        self._worker = DatabaseWorker(name="SpellbookBackup")
+        self._pending: Optional[Future] = None
+        self.progress: Optional[tuple] = None  # (remaining_pages, total_pages) of the running backup
+        
+        db_name = re.escape(os.path.basename(self.db_path))
+        self._name_pattern = re.compile(
+            rf"^{db_name}\.(\d{{8}}_\d{{6}})(?:_\d+)?(?:\.([\w-]+))?\.bak$")
+    
+    @property
+    def settings(self):
+        manager = self._settings_manager or get_settings_manager()
+        return manager.settings
+    
+    # ==================== LISTING ====================
+    
+    def list_backups(self) -> List[BackupInfo]:
+        """Return this database's backups, newest first."""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        backups = []
+        for file_name in os.listdir(self.backup_dir):
+            match = self._name_pattern.match(file_name)
+            if not match:
+                continue
+            path = os.path.join(self.backup_dir, file_name)
+            try:
+                created = datetime.strptime(match.group(1), self.TIMESTAMP_FORMAT)
+                stat = os.stat(path)
+            except (ValueError, OSError):
+                continue
+            backups.append((created, stat.st_mtime,
+                            BackupInfo(path, created, stat.st_size, match.group(2) or "")))
+        # Modification time breaks ties between backups taken in the same second
+        backups.sort(key=lambda entry: entry[:2], reverse=True)
+        return [entry[2] for entry in backups]
+    
+    def last_backup_time(self) -> Optional[datetime]:
+        """Time of the newest regular backup, or None if there is none."""
+        for backup in self.list_backups():
+            if not backup.label:
+                return backup.created
+        return None
+    
+    # ==================== BACKUP ====================
+    
+    def _new_backup_path(self, label: str = "") -> str:
+        """Unique path for a backup taken now."""
+        base = f"{os.path.basename(self.db_path)}.{datetime.now().strftime(self.TIMESTAMP_FORMAT)}"
+        suffix = f".{label}.bak" if label else ".bak"
+        path = os.path.join(self.backup_dir, base + suffix)
+        counter = 1
+        while os.path.exists(path):
+            path = os.path.join(self.backup_dir, f"{base}_{counter}{suffix}")
+            counter += 1
+        return path
+    
+    def create_backup(self, label: str = "", prune: bool = True) -> Optional[str]:
+        """
+        Back up the database now on the calling thread, then apply the retention policy.
+        
+        Args:
+            label: Optional tag stored in the file name (e.g. "pre-restore")
+            prune: Delete backups beyond the retention policy afterwards
+        
+        Returns:
+            Path of the new backup, or None on failure
+        """
+        if not os.path.exists(self.db_path):
+            return None
+        os.makedirs(self.backup_dir, exist_ok=True)
+        path = self._new_backup_path(label)
+        
+        def on_progress(remaining: int, total: int):
+            self.progress = (remaining, total)
+        
+        try:
+            if not self._db.backup_to(path, progress=on_progress):
+                return None
+        finally:
+            self.progress = None
+        print(f"Created backup: {path}")
+        if prune:
+            self.prune()
+        return path
+    
+    def backup_async(self, label: str = "") -> Future:
+        """
+        Back up the database on the backup thread.
+        
+        Returns:
+            Future resolving to the backup path (or None); if a backup is
+            already running, its future is returned instead of starting another
+        """
+        if self._pending is not None and not self._pending.done():
+            return self._pending
+        self._pending = self._worker.submit(self.create_backup, label)
+        return self._pending
+    
+    def backup_if_due(self) -> Optional[Future]:
+        """Start a background backup if automatic backups are on and the last one is old enough."""
+        settings = self.settings
+        if not settings.auto_backup_enabled:
+            return None
+        last = self.last_backup_time()
+        if last is not None and datetime.now() - last < timedelta(hours=settings.backup_interval_hours):
+            return None
+        return self.backup_async()
+    
+    def prune(self) -> List[str]:
+        """
+        Delete backups beyond the retention policy.
+        
+        Keeps at most backup_keep_count backups and deletes ones older than
+        backup_retention_days, but never deletes the newest backup.
+        
+        Returns:
+            Paths of the deleted backups
+        """
+        settings = self.settings
+        keep_count = max(1, settings.backup_keep_count)
+        cutoff = (datetime.now() - timedelta(days=settings.backup_retention_days)
+                  if settings.backup_retention_days > 0 else None)
+        
+        deleted = []
+        for index, backup in enumerate(self.list_backups()):
+            if index == 0:
+                continue
+            if index >= keep_count or (cutoff is not None and backup.created < cutoff):
+                try:
+                    os.remove(backup.path)
+                    deleted.append(backup.path)
+                except OSError as e:
+                    print(f"Could not delete old backup {backup.path}: {e}")
+        return deleted
+    
+    # ==================== RESTORE ====================
+    
+    def restore(self, backup_path: str) -> bool:
+        """
+        Replace the database with a backup, on the calling thread.
+        
+        The current database is backed up first (labelled "pre-restore"), so a
+        restore can itself be undone.
+        
+        Returns:
+            True if the database was restored
+        """
+        if SpellDatabase.backup_storage_mode(backup_path) is None:
+            print(f"Error restoring database: {backup_path} is not a valid Spellbook backup")
+            return False
+        # Pruned only afterwards: the backup being restored may be the oldest one
+        if os.path.exists(self.db_path) and self.create_backup(label="pre-restore", prune=False) is None:
+            print("Error restoring database: could not back up the current database first")
+            return False
+        restored = self._db.restore_from(backup_path)
+        self.prune()
+        return restored
+    
+    def restore_async(self, backup_path: str) -> Future:
+        """Run restore() on the database worker thread; resolves to True on success."""
+        return get_db_worker().submit(self.restore, backup_path)
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the backup thread, letting a running backup finish."""
+        self._worker.shutdown(wait=wait, timeout=None if wait else 0)
+
+
+# Global backup service instance (singleton pattern)
+_backup_service: Optional[BackupService] = None
+
+
+def get_backup_service() -> BackupService:
+    """Get the global backup service instance."""
+    global _backup_service
+    if _backup_service is None:
+        _backup_service = BackupService()
+    return _backup_service
+
+
+def shutdown_backup_service(wait: bool = True):
+    """Stop the global backup service if it was created."""
+    if _backup_service is not None:
+        _backup_service.shutdown(wait=wait)
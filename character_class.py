@@ -4,7 +4,7 @@ Defines class features, abilities, trackable resources, and subclasses.
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
 import json
 import os
 import sys
@@ -21,6 +21,46 @@ def get_data_path(filename: str) -> str:
     return os.path.join(base_path, filename)
 
 
+class DeferredFields:
+    """Mixin for dataclasses whose large fields can be decoded on first access.
+    
+    defer_fields() removes the named fields from an instance; the first read
+    of any of them calls the loader once, which returns all of their values.
+    A deferred field assigned before that keeps the assigned value.
+    
+    Optional queries (e.g. "features at level N" answered by an indexed
+    database read) stand in for the fields until they are decoded or assigned;
+    after that, callers must use the in-memory values, which may have been edited.
+    """
+    
+    def defer_fields(self, names: Iterable[str], loader: Callable[[], dict],
+                     queries: Optional[Dict[str, Callable]] = None):
+        names = tuple(names)
+        for name in names:
+            self.__dict__.pop(name, None)
+        self.__dict__['_deferred'] = (names, loader)
+        self.__dict__['_deferred_queries'] = dict(queries or {})
+    
+    def deferred_query(self, name: str) -> Optional[Callable]:
+        """The query registered as name, or None once the deferred fields are in memory."""
+        deferred = self.__dict__.get('_deferred')
+        if deferred is None or any(field_name in self.__dict__ for field_name in deferred[0]):
+            return None
+        return self.__dict__['_deferred_queries'].get(name)
+    
+    def __getattr__(self, name):
+        # Only reached for attributes missing from the instance
+        deferred = self.__dict__.get('_deferred')
+        if deferred is None or name not in deferred[0]:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        del self.__dict__['_deferred']
+        names, loader = deferred
+        values = loader()
+        for field_name in names:
+            self.__dict__.setdefault(field_name, values[field_name])
+        return self.__dict__[name]
+
+
 @dataclass
 class TrackableFeature:
     """A class feature that can be tracked (uses, resources, etc.)."""
@@ -44,6 +84,10 @@ class TrackableFeature:
                 max_uses = uses
         return max_uses
     
+    def get_min_level(self) -> int:
+        """First level this feature is available at (its lowest level_scaling entry, else 1)."""
+        return min(self.level_scaling) if self.level_scaling else 1
+    
     def to_dict(self) -> dict:
         return {
             "title": self.title,
@@ -218,7 +262,7 @@ class ClassSpell:
 
 
 @dataclass
-class SubclassDefinition:
+class SubclassDefinition(DeferredFields):
     """Definition of a subclass (archetype, path, etc.)."""
     name: str
     parent_class: str  # Name of the parent class
@@ -240,12 +284,25 @@ class SubclassDefinition:
     
     def get_features_at_level(self, level: int) -> List[SubclassFeature]:
         """Get subclass features gained at a specific level."""
+        query = self.deferred_query('features_at_level')
+        if query is not None:
+            return query(level)
         return [f for f in self.features if f.level == level]
     
     def get_all_features_up_to_level(self, level: int) -> List[SubclassFeature]:
         """Get all subclass features up to a level."""
+        query = self.deferred_query('features_up_to_level')
+        if query is not None:
+            return query(level)
         return [f for f in self.features if f.level <= level]
     
+    def get_trackable_features_up_to_level(self, level: int) -> List[TrackableFeature]:
+        """Get trackable features available at a class level (from their lowest scaling level)."""
+        query = self.deferred_query('trackable_features_up_to_level')
+        if query is not None:
+            return query(level)
+        return [f for f in self.trackable_features if f.get_min_level() <= level]
+    
     def get_spells_at_level(self, level: int) -> List[SubclassSpell]:
         """Get subclass spells available at a specific class level."""
         return [s for s in self.subclass_spells if s.level_gained <= level]
@@ -316,7 +373,7 @@ class StartingEquipmentOption:
 
 
 @dataclass
-class CharacterClassDefinition:
+class CharacterClassDefinition(DeferredFields):
     """
     Complete definition of a D&D 5e character class.
     This stores the class template, not a character's instance of the class.
@@ -387,25 +444,41 @@ class CharacterClassDefinition:
     def __post_init__(self):
         """Initialize level progression if not provided."""
         if not self.levels:
-            # Create empty level entries for 1-20
-            for lvl in range(1, 21):
-                prof_bonus = 2 + (lvl - 1) // 4  # Standard 5e progression
-                self.levels[lvl] = ClassLevel(level=lvl, proficiency_bonus=prof_bonus)
+            self.levels = self.default_levels()
+    
+    @staticmethod
+    def default_levels() -> Dict[int, ClassLevel]:
+        """Empty level entries for levels 1-20."""
+        levels = {}
+        for lvl in range(1, 21):
+            prof_bonus = 2 + (lvl - 1) // 4  # Standard 5e progression
+            levels[lvl] = ClassLevel(level=lvl, proficiency_bonus=prof_bonus)
+        return levels
     
     def get_abilities_at_level(self, level: int) -> List[ClassAbility]:
         """Get abilities gained at a specific level."""
+        query = self.deferred_query('abilities_at_level')
+        if query is not None:
+            return query(level)
         if level in self.levels:
             return self.levels[level].abilities
         return []
     
     def get_all_abilities_up_to_level(self, level: int) -> List[ClassAbility]:
         """Get all abilities from level 1 up to the specified level."""
+        query = self.deferred_query('abilities_up_to_level')
+        if query is not None:
+            return query(level)
         abilities = []
         for lvl in range(1, level + 1):
             if lvl in self.levels:
                 abilities.extend(self.levels[lvl].abilities)
         return abilities
     
+    def get_trackable_features_up_to_level(self, level: int) -> List[TrackableFeature]:
+        """Get trackable features available at a level (from their lowest scaling level)."""
+        return [f for f in self.trackable_features if f.get_min_level() <= level]
+    
     def add_trackable_feature(self, feature: TrackableFeature) -> bool:
         """Add a trackable feature. Returns False if already at max (3)."""
         if len(self.trackable_features) >= 3:
@@ -497,11 +570,17 @@ class ClassManager:
     """Manages character class definitions using SQLite database."""
     
     DEFAULT_FILE = "classes.json"
+    # SubclassDefinition fields stored together in subclasses.features_json
+    SUBCLASS_FEATURE_FIELDS = (
+        'features', 'subclass_spells', 'armor_proficiencies',
+        'weapon_proficiencies', 'unarmored_defense', 'trackable_features',
+    )
     
     def __init__(self, file_path: Optional[str] = None):
         self.file_path = file_path or self.DEFAULT_FILE  # For compatibility
         self._db = None
         self._classes_cache: Optional[Dict[str, CharacterClassDefinition]] = None
+        self._cache_generation: Optional[int] = None  # db.change_generation() the cache was built at
         self._listeners = []
     
     @property
@@ -517,16 +596,23 @@ class ClassManager:
         """Invalidate the cache to force reload on next access."""
         self._classes_cache = None
     
+    def _ensure_cache(self):
+        """Reload the cache if it was invalidated or classes/subclasses were written since it was built."""
+        if self._classes_cache is None or self._cache_generation != self.db.change_generation('classes'):
+            self._reload_cache()
+    
     def _reload_cache(self):
         """Reload classes from database into cache."""
+        self._cache_generation = self.db.change_generation('classes')
         self._classes_cache = {}
         
         # Clear and re-register custom classes with CharacterClass enum
         from spell import CharacterClass
         CharacterClass.clear_custom_classes()
         
-        # Load all classes
-        for class_data in self.db.get_all_character_classes():
+        # Load all classes. Feature columns stay undecoded until a class's
+        # levels (or a subclass's features) are first read.
+        for class_data in self.db.get_all_character_classes(lazy=True, with_subclasses=False):
             class_def = self._dict_to_class(class_data)
             self._classes_cache[class_def.name] = class_def
             
@@ -535,37 +621,22 @@ class ClassManager:
                 CharacterClass.register_custom_class(class_def.name)
         
         # Load and attach subclasses to their parent classes
-        for subclass_data in self.db.get_all_subclasses():
+        for subclass_data in self.db.get_all_subclasses(lazy=True):
             subclass_def = self._dict_to_subclass(subclass_data)
             parent_class_name = subclass_data.get('parent_class', '')
             if parent_class_name and parent_class_name in self._classes_cache:
                 self._classes_cache[parent_class_name].subclasses.append(subclass_def)
     
     def _dict_to_class(self, data: dict) -> CharacterClassDefinition:
-        """Convert database dict to CharacterClassDefinition object."""
-        # Parse levels from class_features
-        levels = {}
+        """Convert database dict to CharacterClassDefinition object.
+        
+        class_features may be an undecoded LazyJSON; levels is then decoded on first access,
+        and per-level ability lookups read the class_features table until then.
+        """
+        from database import LazyJSON
         class_features = data.get('class_features', {})
-        if isinstance(class_features, dict):
-            # Format: {level_str: level_data}
-            for lvl_str, lvl_data in class_features.items():
-                levels[int(lvl_str)] = ClassLevel.from_dict(lvl_data)
-        elif isinstance(class_features, list):
-            # Format: list of feature dicts - group by level
-            for feature in class_features:
-                if isinstance(feature, dict):
-                    lvl = feature.get('level', 1)
-                    # Standard D&D proficiency bonus calculation
-                    prof_bonus = 2 + (lvl - 1) // 4
-                    if lvl not in levels:
-                        levels[lvl] = ClassLevel(level=lvl, abilities=[], proficiency_bonus=prof_bonus)
-                    # Add the feature to this level
-                    if 'name' in feature or 'title' in feature:
-                        ability = ClassAbility(
-                            title=feature.get('title', feature.get('name', '')),
-                            description=feature.get('description', '')
-                        )
-                        levels[lvl].abilities.append(ability)
+        lazy_features = class_features if isinstance(class_features, LazyJSON) else None
+        levels = {} if lazy_features is not None else self._levels_from_features(class_features)
         
         # Parse spellcasting info
         spellcasting = data.get('spellcasting') or {}
@@ -586,7 +657,7 @@ class ClassManager:
         for tf_data in data.get('trackable_features', []):
             trackable_features.append(TrackableFeature.from_dict(tf_data))
         
-        return CharacterClassDefinition(
+        class_def = CharacterClassDefinition(
             name=data.get('name', ''),
             hit_die=data.get('hit_die', 'd8'),
             primary_ability=data.get('primary_ability', ''),
@@ -611,6 +682,60 @@ class ClassManager:
             source=data.get('source', 'Player\'s Handbook'),
             is_legacy=data.get('is_legacy', False)
         )
+        if lazy_features is not None:
+            class_def.defer_fields(('levels',), lambda: {
+                'levels': (self._levels_from_features(lazy_features.decode())
+                           or CharacterClassDefinition.default_levels())
+            }, self._class_feature_queries(data['id']) if 'id' in data else None)
+        return class_def
+    
+    def _class_feature_queries(self, class_id: int) -> Dict[str, Callable]:
+        """Indexed per-level lookups used while a class's levels are still undecoded."""
+        db = self.db
+        return {
+            'abilities_at_level': lambda level: [
+                ClassAbility.from_dict(a) for a in db.get_class_features_at_level(class_id, level)],
+            'abilities_up_to_level': lambda level: [
+                ClassAbility.from_dict(a) for a in db.get_class_features_up_to_level(class_id, level)],
+        }
+    
+    def _subclass_feature_queries(self, subclass_id: int, class_id: int) -> Dict[str, Callable]:
+        """Indexed per-level lookups used while a subclass's features are still undecoded."""
+        db = self.db
+        return {
+            'features_at_level': lambda level: [
+                SubclassFeature.from_dict(f) for f in db.get_subclass_features_at_level(subclass_id, level)],
+            'features_up_to_level': lambda level: [
+                SubclassFeature.from_dict(f) for f in db.get_subclass_features_up_to_level(subclass_id, level)],
+            'trackable_features_up_to_level': lambda level: [
+                TrackableFeature.from_dict(f)
+                for f in db.get_trackable_features_up_to_level(class_id, level, subclass_id=subclass_id)],
+        }
+    
+    def _levels_from_features(self, class_features) -> Dict[int, ClassLevel]:
+        """Parse levels from a decoded class_features value."""
+        levels = {}
+        if isinstance(class_features, dict):
+            # Format: {level_str: level_data}
+            for lvl_str, lvl_data in class_features.items():
+                levels[int(lvl_str)] = ClassLevel.from_dict(lvl_data)
+        elif isinstance(class_features, list):
+            # Format: list of feature dicts - group by level
+            for feature in class_features:
+                if isinstance(feature, dict):
+                    lvl = feature.get('level', 1)
+                    # Standard D&D proficiency bonus calculation
+                    prof_bonus = 2 + (lvl - 1) // 4
+                    if lvl not in levels:
+                        levels[lvl] = ClassLevel(level=lvl, abilities=[], proficiency_bonus=prof_bonus)
+                    # Add the feature to this level
+                    if 'name' in feature or 'title' in feature:
+                        ability = ClassAbility(
+                            title=feature.get('title', feature.get('name', '')),
+                            description=feature.get('description', '')
+                        )
+                        levels[lvl].abilities.append(ability)
+        return levels
     
     def _class_to_dict(self, class_def: CharacterClassDefinition) -> dict:
         """Convert CharacterClassDefinition to dict for database."""
@@ -651,33 +776,39 @@ class ClassManager:
         }
     
     def _dict_to_subclass(self, data: dict) -> SubclassDefinition:
-        """Convert database dict to SubclassDefinition object."""
-        features = []
-        for f_data in data.get('features', []):
-            features.append(SubclassFeature.from_dict(f_data))
+        """Convert database dict to SubclassDefinition object.
         
-        trackable_features = []
-        for tf_data in data.get('trackable_features', []):
-            trackable_features.append(TrackableFeature.from_dict(tf_data))
-        
-        subclass_spells = []
-        for s_data in data.get('subclass_spells', []):
-            subclass_spells.append(SubclassSpell.from_dict(s_data))
-        
-        return SubclassDefinition(
+        A lazily loaded dict carries the undecoded features_json as 'features_data';
+        the fields stored in it are then decoded on first access.
+        """
+        lazy_data = data.get('features_data')
+        subclass = SubclassDefinition(
             name=data.get('name', ''),
             parent_class=data.get('parent_class', ''),
             description=data.get('description', ''),
-            features=features,
-            subclass_spells=subclass_spells,
-            armor_proficiencies=data.get('armor_proficiencies', []),
-            weapon_proficiencies=data.get('weapon_proficiencies', []),
-            unarmored_defense=data.get('unarmored_defense', ''),
-            trackable_features=trackable_features,
             source=data.get('source', 'Player\'s Handbook'),
             is_custom=data.get('is_custom', False),
-            is_legacy=data.get('is_legacy', False)
+            is_legacy=data.get('is_legacy', False),
+            **(self._subclass_feature_fields(data) if lazy_data is None else {})
         )
+        if lazy_data is not None:
+            from database import SpellDatabase
+            queries = (self._subclass_feature_queries(data['id'], data['class_id'])
+                       if 'id' in data and 'class_id' in data else None)
+            subclass.defer_fields(self.SUBCLASS_FEATURE_FIELDS, lambda: self._subclass_feature_fields(
+                SpellDatabase.subclass_feature_fields(lazy_data.decode())), queries)
+        return subclass
+    
+    def _subclass_feature_fields(self, data: dict) -> dict:
+        """Build the subclass fields stored in features_json from their decoded values."""
+        return {
+            'features': [SubclassFeature.from_dict(f) for f in data.get('features', [])],
+            'subclass_spells': [SubclassSpell.from_dict(s) for s in data.get('subclass_spells', [])],
+            'armor_proficiencies': data.get('armor_proficiencies', []),
+            'weapon_proficiencies': data.get('weapon_proficiencies', []),
+            'unarmored_defense': data.get('unarmored_defense', ''),
+            'trackable_features': [TrackableFeature.from_dict(f) for f in data.get('trackable_features', [])],
+        }
     
     def _subclass_to_dict(self, subclass: SubclassDefinition, class_id: int) -> dict:
         """Convert SubclassDefinition to dict for database."""
@@ -700,14 +831,12 @@ class ClassManager:
     @property
     def classes(self) -> List[CharacterClassDefinition]:
         """Get all class definitions."""
-        if self._classes_cache is None:
-            self._reload_cache()
+        self._ensure_cache()
         return list(self._classes_cache.values()) if self._classes_cache else []
     
     def get_class(self, name: str) -> Optional[CharacterClassDefinition]:
         """Get a class definition by name."""
-        if self._classes_cache is None:
-            self._reload_cache()
+        self._ensure_cache()
         return self._classes_cache.get(name) if self._classes_cache else None
     
     def add_listener(self, callback):
@@ -720,7 +849,9 @@ class ClassManager:
             self._listeners.remove(callback)
     
     def _notify_listeners(self):
-        """Notify all listeners of changes."""
+        """Notify all listeners of changes (once, after commit, inside a unit of work)."""
+        if self.db.defer_until_commit(self._notify_listeners):
+            return
         for listener in self._listeners:
             try:
                 listener()
@@ -732,8 +863,7 @@ class ClassManager:
         self._invalidate_cache()
         
         # If cache is empty after reload, check if we need to initialize
-        if self._classes_cache is None:
-            self._reload_cache()
+        self._ensure_cache()
         
         if not self._classes_cache:
             # Check for JSON file to migrate
@@ -744,7 +874,6 @@ class ClassManager:
                         for name, class_data in data.get("classes", {}).items():
                             class_def = CharacterClassDefinition.from_dict(class_data)
                             self._save_class_to_db(class_def)
-                    self._invalidate_cache()
                     return True
                 except Exception as e:
                     print(f"Error loading classes from {self.file_path}: {e}")
@@ -758,7 +887,6 @@ class ClassManager:
                         for name, class_data in data.get("classes", {}).items():
                             class_def = CharacterClassDefinition.from_dict(class_data)
                             self._save_class_to_db(class_def)
-                    self._invalidate_cache()
                     return True
                 except Exception as e:
                     print(f"Error loading bundled classes: {e}")
@@ -795,27 +923,28 @@ class ClassManager:
     
     def add_class(self, class_def: CharacterClassDefinition) -> bool:
         """Add or update a class definition."""
-        self._save_class_to_db(class_def)
-        self._invalidate_cache()
+        # Class row and subclass rows commit together
+        with self.db.transaction():
+            self._save_class_to_db(class_def)
         self._notify_listeners()
         return True
     
     def delete_class(self, name: str) -> bool:
         """Delete a class definition."""
-        existing = self.db.get_class_by_name(name)
-        if existing:
-            # Delete associated subclasses first
-            for subclass in self.db.get_subclasses_by_class(name):
-                self.db.delete_subclass(subclass['id'])
-            
-            self.db.delete_class(existing['id'])
-            
-            # Remove class from all spells' allowed classes
-            self.db.remove_class_from_all_spells(name)
-            
-            self._invalidate_cache()
-            self._notify_listeners()
-            return True
+        with self.db.transaction():
+            existing = self.db.get_class_by_name(name)
+            if existing:
+                # Delete associated subclasses first
+                for subclass in self.db.get_subclasses_by_class(name):
+                    self.db.delete_subclass(subclass['id'])
+                
+                self.db.delete_class(existing['id'])
+                
+                # Remove class from all spells' allowed classes
+                self.db.remove_class_from_all_spells(name)
+                
+                self._notify_listeners()
+                return True
         return False
     
     def _create_barbarian_class(self) -> CharacterClassDefinition:
@@ -2287,20 +2416,17 @@ While carrying the map, a target gains the following benefits.
         
         for cls in default_classes:
             self._save_class_to_db(cls)
-        self._invalidate_cache()
     
     def get_unofficial_classes(self) -> List[CharacterClassDefinition]:
         """Get all classes that are custom (not official)."""
-        if self._classes_cache is None:
-            self._reload_cache()
+        self._ensure_cache()
         if not self._classes_cache:
             return []
         return [c for c in self._classes_cache.values() if c.is_custom]
     
     def get_unofficial_subclasses(self) -> List[SubclassDefinition]:
         """Get all subclasses that are custom (not official)."""
-        if self._classes_cache is None:
-            self._reload_cache()
+        self._ensure_cache()
         if not self._classes_cache:
             return []
         subclasses = []
@@ -2312,8 +2438,7 @@ While carrying the map, a target gains the following benefits.
     
     def get_unofficial_class_sources(self) -> List[str]:
         """Get list of sources that have unofficial (custom) classes."""
-        if self._classes_cache is None:
-            self._reload_cache()
+        self._ensure_cache()
         if not self._classes_cache:
             return []
         sources = set()
@@ -2324,8 +2449,7 @@ While carrying the map, a target gains the following benefits.
     
     def get_unofficial_subclass_sources(self) -> List[str]:
         """Get list of sources that have unofficial (custom) subclasses."""
-        if self._classes_cache is None:
-            self._reload_cache()
+        self._ensure_cache()
         if not self._classes_cache:
             return []
         sources = set()
@@ -2402,16 +2526,19 @@ While carrying the map, a target gains the following benefits.
             classes_data = data.get("classes", {})
             imported_count = 0
             
-            for name, class_dict in classes_data.items():
-                try:
-                    class_def = CharacterClassDefinition.from_dict(class_dict)
-                    # Imported classes are always custom
-                    class_def.is_custom = True
-                    self.add_class(class_def)
-                    imported_count += 1
-                except Exception as e:
-                    print(f"Error importing class {name}: {e}")
-                    continue
+            # One commit for the whole file; a class that fails rolls back only its own rows
+            with self.db.transaction():
+                for name, class_dict in classes_data.items():
+                    try:
+                        with self.db.transaction():
+                            class_def = CharacterClassDefinition.from_dict(class_dict)
+                            # Imported classes are always custom
+                            class_def.is_custom = True
+                            self.add_class(class_def)
+                        imported_count += 1
+                    except Exception as e:
+                        print(f"Error importing class {name}: {e}")
+                        continue
             
             return imported_count
         except Exception as e:
@@ -2435,32 +2562,34 @@ While carrying the map, a target gains the following benefits.
             subclasses_data = data.get("subclasses", [])
             imported_count = 0
             
-            for sub_dict in subclasses_data:
-                try:
-                    subclass = SubclassDefinition.from_dict(sub_dict)
-                    subclass.is_custom = True
-                    
-                    # Find parent class in database
-                    parent_class_data = self.db.get_class_by_name(subclass.parent_class)
-                    if parent_class_data:
-                        # Check if subclass already exists
-                        existing_sub = self.db.get_subclass_by_name(subclass.name, subclass.parent_class)
-                        
-                        subclass_dict = self._subclass_to_dict(subclass, parent_class_data['id'])
-                        subclass_dict['parent_class'] = subclass.parent_class
-                        
-                        if existing_sub:
-                            self.db.update_subclass(existing_sub['id'], subclass_dict)
-                        else:
-                            self.db.insert_subclass(subclass_dict)
-                        imported_count += 1
-                except Exception as e:
-                    print(f"Error importing subclass: {e}")
-                    continue
-            
-            if imported_count > 0:
-                self._invalidate_cache()
-                self._notify_listeners()
+            # One commit for the whole file; a subclass that fails rolls back only its own rows
+            with self.db.transaction():
+                for sub_dict in subclasses_data:
+                    try:
+                        with self.db.transaction():
+                            subclass = SubclassDefinition.from_dict(sub_dict)
+                            subclass.is_custom = True
+                            
+                            # Find parent class in database
+                            parent_class_data = self.db.get_class_by_name(subclass.parent_class)
+                            if parent_class_data:
+                                # Check if subclass already exists
+                                existing_sub = self.db.get_subclass_by_name(subclass.name, subclass.parent_class)
+                                
+                                subclass_dict = self._subclass_to_dict(subclass, parent_class_data['id'])
+                                subclass_dict['parent_class'] = subclass.parent_class
+                                
+                                if existing_sub:
+                                    self.db.update_subclass(existing_sub['id'], subclass_dict)
+                                else:
+                                    self.db.insert_subclass(subclass_dict)
+                                imported_count += 1
+                    except Exception as e:
+                        print(f"Error importing subclass: {e}")
+                        continue
+                
+                if imported_count > 0:
+                    self._notify_listeners()
             
             return imported_count
         except Exception as e:
@@ -5,17 +5,653 @@ Handles database creation, migrations, and spell persistence.
 
 import sqlite3
 import os
+import re
 import sys
 import json
-from typing import List, Optional, Tuple
+import time
+import atexit
+import hashlib
+import importlib
+import importlib.util
+import threading
+import zlib
+from collections import deque
+from urllib.request import pathname2url
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from contextlib import contextmanager
 
 
+class _PooledConnection:
+    """A pooled connection plus the nesting depth of open transaction blocks."""
+    
+    __slots__ = ('conn', 'depth', 'setup', 'changes', 'after_commit', 'change_state', 'epoch')
+    
+    def __init__(self, conn: sqlite3.Connection, epoch: int = 0):
+        self.conn = conn
+        self.epoch = epoch  # ConnectionManager epoch of the database file when opened
+        self.depth = 0
+        self.setup = None  # Setup hook last applied to this connection
+        self.changes = conn.total_changes  # Row changes already counted toward maintenance
+        self.after_commit: Optional[list] = None  # Deferred callbacks while a unit of work is open
+        self.change_state: Optional[tuple] = None  # (data_version, total_changes, table_changes rows)
+
+
+class ConnectionManager:
+    """Hands out one long-lived, pre-tuned SQLite connection per thread and database file.
+    
+    Opening a connection and re-issuing PRAGMAs costs more than most of the
+    queries the app runs, so connections are created once per thread and kept
+    open until close_all() (called automatically at interpreter exit).
+    reset() retires one file's connections: each thread reopens its own the
+    next time it acquires it outside a transaction.
+    """
+    
+    BUSY_TIMEOUT_MS = 5000
+    CACHE_SIZE_KIB = 16384  # Page cache per connection
+    MMAP_SIZE = 64 * 1024 * 1024  # Memory-map up to 64 MB of the database file
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: List[sqlite3.Connection] = []
+        self._setups: Dict[str, Callable[[sqlite3.Connection], None]] = {}
+        self._epochs: Dict[str, int] = {}  # Bumped by reset(); older connections are reopened
+    
+    def set_setup(self, db_path: str, setup: Optional[Callable[[sqlite3.Connection], None]]):
+        """Register a hook run on every connection to db_path (e.g. ATTACH + temp views).
+        
+        Applied to each thread's connection the next time it is acquired outside
+        a transaction, so connections opened before registration pick it up too.
+        """
+        key = self._key(db_path)
+        with self._lock:
+            if setup is None:
+                self._setups.pop(key, None)
+            else:
+                self._setups[key] = setup
+    
+    @staticmethod
+    def _key(db_path: str) -> str:
+        """Normalize a database path so relative and absolute paths share a connection."""
+        if db_path == ":memory:" or db_path.startswith("file:"):
+            return db_path
+        return os.path.abspath(db_path)
+    
+    def _thread_pool(self) -> Dict[str, _PooledConnection]:
+        pool = getattr(self._local, 'pool', None)
+        if pool is None:
+            pool = self._local.pool = {}
+        return pool
+    
+    def acquire(self, db_path: str) -> _PooledConnection:
+        """Get (opening if needed) the calling thread's connection to db_path."""
+        pool = self._thread_pool()
+        key = self._key(db_path)
+        pooled = pool.get(key)
+        epoch = self._epochs.get(key, 0)
+        if (pooled is not None and pooled.epoch != epoch
+                and pooled.depth == 0 and not pooled.conn.in_transaction):
+            del pool[key]
+            self._discard(pooled.conn)
+            pooled = None
+        if pooled is None:
+            pooled = _PooledConnection(self._open(db_path), epoch)
+            pool[key] = pooled
+            with self._lock:
+                self._all.append(pooled.conn)
+        setup = self._setups.get(key)
+        if setup is not pooled.setup and pooled.depth == 0 and not pooled.conn.in_transaction:
+            if setup is not None:
+                setup(pooled.conn)
+            pooled.setup = setup
+        return pooled
+    
+    def peek(self, db_path: str) -> Optional[_PooledConnection]:
+        """Get the calling thread's connection to db_path if it has one open (never opens one)."""
+        return self._thread_pool().get(self._key(db_path))
+    
+    def _open(self, db_path: str) -> sqlite3.Connection:
+        """Open and tune a new connection."""
+        conn = sqlite3.connect(
+            db_path,
+            timeout=self.BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,  # Only the owning thread uses it; close_all() may run elsewhere
+            uri=True,  # Plain paths still open as files; lets setup hooks ATTACH read-only URIs
+            factory=_InstrumentedConnection  # Plain cursors unless query_stats is enabled
+        )
+        conn.row_factory = sqlite3.Row  # Enable column access by name
+        conn.execute("PRAGMA foreign_keys = ON")  # Enable foreign key support
+        conn.execute(f"PRAGMA busy_timeout = {self.BUSY_TIMEOUT_MS}")
+        # New files reclaim space from deletes incrementally (must precede WAL and any table);
+        # existing files switch on their next VACUUM (see SpellDatabase.run_maintenance)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")  # Readers never block the writer
+        conn.execute("PRAGMA synchronous = NORMAL")  # Safe with WAL, far fewer fsyncs
+        conn.execute(f"PRAGMA cache_size = -{self.CACHE_SIZE_KIB}")
+        conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+    
+    def close(self, db_path: Optional[str] = None):
+        """Close the calling thread's connection to db_path (or all of its connections)."""
+        pool = self._thread_pool()
+        keys = [self._key(db_path)] if db_path else list(pool.keys())
+        for key in keys:
+            pooled = pool.pop(key, None)
+            if pooled is not None:
+                self._discard(pooled.conn)
+    
+    def reset(self, db_path: str):
+        """Retire every thread's connection to db_path (e.g. after its contents were replaced).
+        
+        The calling thread's connection is closed now; other threads close and
+        reopen theirs on their next acquire outside a transaction, so a query
+        they are running right now is not cut off.
+        """
+        key = self._key(db_path)
+        with self._lock:
+            self._epochs[key] = self._epochs.get(key, 0) + 1
+        self.close(db_path)
+    
+    def close_all(self):
+        """Close every pooled connection on every thread."""
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+    
+    def _discard(self, conn: sqlite3.Connection):
+        with self._lock:
+            if conn in self._all:
+                self._all.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+class _DDLRecorder:
+    """Cursor stand-in that records SQL instead of executing it (for schema fingerprints)."""
+    
+    def __init__(self):
+        self.statements: List[str] = []
+    
+    def execute(self, sql: str, params=()):
+        self.statements.append(" ".join(sql.split()))
+        return self
+
+
+@lru_cache(maxsize=2048)
+def _normalize_sql(sql: str) -> str:
+    """Collapse whitespace, literals and placeholder lists so equivalent statements group together."""
+    sql = _SQL_STRING_LITERAL.sub("?", sql)
+    sql = _SQL_NUMBER_LITERAL.sub("?", sql)
+    sql = _SQL_PLACEHOLDER_LIST.sub("(?+)", sql)
+    return " ".join(sql.split())
+
+
+_SQL_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_EXPLAINABLE_PREFIXES = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def _params_shape(params, many: bool = False) -> str:
+    """Describe bound parameters by type only (values are never recorded)."""
+    if many:
+        rows = params
+        first = _params_shape(rows[0]) if rows else "()"
+        return f"{len(rows)} x {first}"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    return "(" + ", ".join(type(v).__name__ for v in params) + ")"
+
+
+class QueryStats:
+    """Opt-in timing of every statement run on pooled connections.
+    
+    Keeps call counts, row counts and rolling latency percentiles per
+    normalized statement, plus a log of slow statements with their
+    EXPLAIN QUERY PLAN. Enable with enable_query_stats() or by setting
+    SPELLBOOK_SQL_STATS to the slow-query threshold in milliseconds;
+    SPELLBOOK_SQL_STATS_FILE additionally dumps the stats as JSON at exit.
+    """
+    
+    WINDOW = 512  # Recent durations kept per statement for percentiles
+    SLOW_LOG_SIZE = 200  # Most recent slow statements kept
+    MAX_PARAM_SHAPES = 5  # Distinct parameter shapes remembered per statement
+    DEFAULT_SLOW_MS = 50.0
+    
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = self.DEFAULT_SLOW_MS
+        self._lock = threading.Lock()
+        self._statements: Dict[str, dict] = {}
+        self._slow_log: deque = deque(maxlen=self.SLOW_LOG_SIZE)
+    
+    def enable(self, slow_ms: Optional[float] = None):
+        """Start recording statements (slow_ms sets the slow-query threshold)."""
+        if slow_ms is not None:
+            self.slow_ms = float(slow_ms)
+        self.enabled = True
+    
+    def disable(self):
+        """Stop recording; collected stats are kept until reset()."""
+        self.enabled = False
+    
+    def reset(self):
+        """Discard all collected stats."""
+        with self._lock:
+            self._statements.clear()
+            self._slow_log.clear()
+    
+    def record(self, conn: sqlite3.Connection, sql: str, params, many: bool,
+               seconds: float, rows: int):
+        """Record one finished statement (called by the instrumented cursor)."""
+        key = _normalize_sql(sql)
+        shape = _params_shape(params, many)
+        duration_ms = seconds * 1000
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is None:
+                entry = self._statements[key] = {
+                    'calls': 0, 'rows': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'durations': deque(maxlen=self.WINDOW), 'param_shapes': [],
+                }
+            entry['calls'] += 1
+            entry['rows'] += rows
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['durations'].append(duration_ms)
+            if shape not in entry['param_shapes'] and len(entry['param_shapes']) < self.MAX_PARAM_SHAPES:
+                entry['param_shapes'].append(shape)
+        
+        if duration_ms >= self.slow_ms:
+            plan = self._explain(conn, sql, params[0] if many and params else params)
+            with self._lock:
+                self._slow_log.append({
+                    'sql': key,
+                    'params_shape': shape,
+                    'duration_ms': round(duration_ms, 3),
+                    'rows': rows,
+                    'plan': plan,
+                    'timestamp': time.time(),
+                })
+    
+    @staticmethod
+    def _explain(conn: sqlite3.Connection, sql: str, params) -> List[str]:
+        """Capture EXPLAIN QUERY PLAN for a statement, indented by plan depth."""
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE_PREFIXES):
+            return []
+        try:
+            cursor = sqlite3.Cursor(conn)  # Plain cursor so the plan query is not recorded
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            depth = {0: -1}
+            lines = []
+            for node_id, parent, _, detail in cursor.fetchall():
+                depth[node_id] = depth.get(parent, -1) + 1
+                lines.append("  " * depth[node_id] + detail)
+            return lines
+        except sqlite3.Error as e:
+            return [f"(plan unavailable: {e})"]
+    
+    @staticmethod
+    def _percentile(sorted_values: List[float], fraction: float) -> float:
+        """Nearest-rank percentile of an already sorted list."""
+        index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+        return sorted_values[index]
+    
+    def snapshot(self) -> dict:
+        """
+        Get the collected stats.
+        
+        Returns:
+            Dict with 'enabled', 'slow_ms', 'statements' (per normalized statement,
+            highest total time first) and 'slow_queries' (oldest first)
+        """
+        with self._lock:
+            statements = []
+            for sql, entry in self._statements.items():
+                durations = sorted(entry['durations'])
+                statements.append({
+                    'sql': sql,
+                    'calls': entry['calls'],
+                    'rows': entry['rows'],
+                    'total_ms': round(entry['total_ms'], 3),
+                    'mean_ms': round(entry['total_ms'] / entry['calls'], 3),
+                    'p50_ms': round(self._percentile(durations, 0.50), 3),
+                    'p90_ms': round(self._percentile(durations, 0.90), 3),
+                    'p99_ms': round(self._percentile(durations, 0.99), 3),
+                    'max_ms': round(entry['max_ms'], 3),
+                    'param_shapes': list(entry['param_shapes']),
+                })
+            slow_queries = [dict(item) for item in self._slow_log]
+        
+        statements.sort(key=lambda item: item['total_ms'], reverse=True)
+        return {
+            'enabled': self.enabled,
+            'slow_ms': self.slow_ms,
+            'statements': statements,
+            'slow_queries': slow_queries,
+        }
+    
+    def dump_json(self, file_path: str) -> dict:
+        """Write snapshot() to a JSON file and return it."""
+        snapshot = self.snapshot()
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=2)
+        return snapshot
+
+
+class _InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement to query_stats, including time spent fetching rows.
+    
+    A SELECT is recorded once its rows are exhausted, or when the cursor runs
+    another statement, is closed, or is garbage collected.
+    """
+    
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._pending = None  # [sql, params, many, seconds, rows]
+    
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            query_stats.record(self.connection, *pending)
+    
+    def _fetched(self, seconds: float, rows: int, exhausted: bool):
+        if self._pending is not None:
+            self._pending[3] += seconds
+            self._pending[4] += rows
+            if exhausted:
+                self._finish()
+    
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._pending = [sql, parameters, False, time.perf_counter() - start, 0]
+            if self.description is None:  # No result rows (DML, DDL or an error)
+                self._pending[4] = max(self.rowcount, 0)
+                self._finish()
+        return self
+    
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        finally:
+            self._pending = [sql, seq_of_parameters, True, time.perf_counter() - start,
+                             max(self.rowcount, 0)]
+            self._finish()
+        return self
+    
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(time.perf_counter() - start, 0 if row is None else 1, row is None)
+        return row
+    
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(time.perf_counter() - start, len(rows), len(rows) < size)
+        return rows
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(time.perf_counter() - start, len(rows), True)
+        return rows
+    
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(time.perf_counter() - start, 0, True)
+            raise
+        self._fetched(time.perf_counter() - start, 1, False)
+        return row
+    
+    def close(self):
+        self._finish()
+        super().close()
+    
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass  # Never raise from garbage collection
+
+
+class _InstrumentedConnection(sqlite3.Connection):
+    """Connection that hands out instrumented cursors while query_stats is enabled."""
+    
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = _InstrumentedCursor if query_stats.enabled else sqlite3.Cursor
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# Process-wide SQL statistics (disabled unless opted in)
+query_stats = QueryStats()
+
+
+def enable_query_stats(slow_ms: Optional[float] = None):
+    """Start recording SQL statement stats (slow_ms sets the slow-query threshold)."""
+    query_stats.enable(slow_ms)
+
+
+def disable_query_stats():
+    """Stop recording SQL statement stats."""
+    query_stats.disable()
+
+
+def get_query_stats() -> dict:
+    """Get the recorded SQL statement stats (see QueryStats.snapshot)."""
+    return query_stats.snapshot()
+
+
+def dump_query_stats(file_path: str) -> dict:
+    """Write the recorded SQL statement stats to a JSON file."""
+    return query_stats.dump_json(file_path)
+
+
+if os.environ.get("SPELLBOOK_SQL_STATS"):
+    try:
+        enable_query_stats(float(os.environ["SPELLBOOK_SQL_STATS"]))
+    except ValueError:
+        enable_query_stats()
+    if os.environ.get("SPELLBOOK_SQL_STATS_FILE"):
+        atexit.register(dump_query_stats, os.environ["SPELLBOOK_SQL_STATS_FILE"])
+
+
+# Process-wide connection manager shared by every SpellDatabase instance
+_connections = ConnectionManager()
+atexit.register(_connections.close_all)
+
+
+def close_all_connections():
+    """Close all pooled database connections (checkpoints the WAL)."""
+    _connections.close_all()
+
+
+def close_thread_connections():
+    """Close the calling thread's pooled connections (for worker threads that exit)."""
+    _connections.close()
+
+
+# ==================== JSON COLUMN CODEC ====================
+#
+# Large JSON columns (class features, subclass data, lineage traits, ...) are
+# stored as a BLOB: one format version byte followed by the payload. Small
+# values and rows written by older builds are plain JSON text; SQLite keeps
+# BLOBs in TEXT columns as-is, so both forms coexist in the same column and
+# decode_json_column() tells them apart by type.
+
+JSON_CODEC_ZLIB = 1  # Version byte: zlib-compressed compact UTF-8 JSON
+JSON_COMPRESS_MIN_BYTES = 256  # Shorter values are stored as compact text
+
+
+def encode_json_column(value):
+    """
+    Encode a value for a JSON column.
+    
+    Returns:
+        Compact JSON text for small values, otherwise a BLOB of the version
+        byte plus the zlib-compressed JSON
+    """
+    text = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    data = text.encode('utf-8')
+    if len(data) < JSON_COMPRESS_MIN_BYTES:
+        return text
+    compressed = zlib.compress(data, 6)
+    if len(compressed) + 1 >= len(data):
+        return text
+    return bytes((JSON_CODEC_ZLIB,)) + compressed
+
+
+def decode_json_column(raw, default=None):
+    """
+    Decode a JSON column written by encode_json_column() or as legacy JSON text.
+    
+    Args:
+        raw: Column value (str, bytes or None)
+        default: Returned for NULL or empty values
+    """
+    if not raw:
+        return default
+    if isinstance(raw, str):
+        return json.loads(raw)
+    raw = bytes(raw)
+    if raw[0] == JSON_CODEC_ZLIB:
+        return json.loads(zlib.decompress(raw[1:]).decode('utf-8'))
+    raise ValueError(f"Unknown JSON column format version {raw[0]}")
+
+
+class LazyJSON:
+    """An undecoded JSON column value; decode() parses it on demand.
+    
+    Lets callers that may never look at a large column (e.g. a class's
+    features when only the class list is shown) skip parsing it. Each
+    decode() returns a fresh object, so values are never shared between
+    the objects built from them.
+    """
+    
+    __slots__ = ('raw', 'default_factory')
+    
+    def __init__(self, raw, default_factory: Callable = list):
+        self.raw = raw
+        self.default_factory = default_factory
+    
+    def decode(self):
+        value = decode_json_column(self.raw)
+        return self.default_factory() if value is None else value
+
+
 class SpellDatabase:
     """SQLite database handler for spell storage."""
     
     DEFAULT_DB_PATH = "spellbook.db"
-    SCHEMA_VERSION = 15  # Correct Prismatic Wall description
+    SCHEMA_VERSION = 22  # Content source registry with enable/disable masking
+    
+    # Searched columns of the spell full-text index and their bm25 weights
+    SPELL_FTS_SEARCH_COLUMNS = "{name description tags}"
+    SPELL_FTS_WEIGHTS = (10.0, 1.0, 4.0, 2.0)  # name, description, tags, source
+    # Trigram phrases need at least this many characters; shorter text falls back to LIKE
+    SPELL_FTS_MIN_QUERY_LENGTH = 3
+    
+    # Spell columns computed from other fields on every write so filters run in SQL
+    DERIVED_SPELL_COLUMNS = (
+        'range_feet', 'has_v', 'has_s', 'has_m',
+        'has_costly_component', 'duration_seconds', 'source_key',
+    )
+    
+    # JSON columns written with encode_json_column() and re-encoded by migration 19.
+    # Stat blocks are written the same way, but seeded stat block rows keep the
+    # seed's text because seed sync hashes the stored columns to detect user edits.
+    ENCODED_JSON_COLUMNS = {
+        'classes': (
+            'saving_throws_json', 'armor_proficiencies_json', 'weapon_proficiencies_json',
+            'tool_proficiencies_json', 'skill_proficiencies_json', 'starting_equipment_json',
+            'class_features_json', 'spellcasting_json', 'class_table_columns_json',
+            'trackable_features_json', 'class_spells_json',
+        ),
+        'subclasses': ('features_json',),
+        'lineages': ('traits_json',),
+        'feats': ('spell_lists_json', 'spells_num_json', 'set_spells_json'),
+        'backgrounds': (
+            'skills_json', 'other_proficiencies_json', 'ability_scores_json',
+            'feats_json', 'features_json',
+        ),
+    }
+    
+    # Change counters kept in table_changes: counter name -> tables whose
+    # inserts, updates and deletes bump it (see change_generation()).
+    # Toggling a content source changes what every content listing returns.
+    CHANGE_TRACKED_TABLES = {
+        'spells': ('spells', 'spell_classes', 'spell_tags', 'spell_tombstones', 'content_sources'),
+        'stat_blocks': ('stat_blocks',),
+        'lineages': ('lineages', 'content_sources'),
+        'feats': ('feats', 'content_sources'),
+        'backgrounds': ('backgrounds', 'content_sources'),
+        'classes': ('classes', 'subclasses', 'content_sources'),
+    }
+    
+    # Tables whose rows belong to a content source (see set_source_enabled())
+    SOURCED_CONTENT_TABLES = ('spells', 'lineages', 'feats', 'backgrounds', 'classes', 'subclasses')
+    
+    # Content indexed by global search: (section label, source table).
+    # The position is the section code; search_index rowids are id * 8 + code.
+    GLOBAL_SEARCH_SECTIONS = (
+        ('Spells', 'spells'),
+        ('Lineages', 'lineages'),
+        ('Feats', 'feats'),
+        ('Backgrounds', 'backgrounds'),
+        ('Classes', 'classes'),
+        ('Subclasses', 'subclasses'),
+    )
+    
+    # Prebuilt official content database, attached read-only to overlay databases
+    OFFICIAL_DB_NAME = "official.db"
+    OFFICIAL_MMAP_SIZE = 256 * 1024 * 1024  # Map the whole official database
+    # Tables merged from the official database and the user overlay
+    OVERLAY_TABLES = ('spells', 'spell_classes', 'spell_tags', 'stat_blocks')
+    # Small content catalogs copied into a new overlay instead of merged
+    OVERLAY_CATALOG_TABLES = ('lineages', 'feats', 'backgrounds', 'classes', 'subclasses',
+                              'class_features', 'subclass_features', 'trackable_features')
+    OVERLAY_ID_OFFSET = 1_000_000  # Spells/stat blocks created in an overlay start above this id
+    
+    # Database files already initialized by this process (see initialize())
+    _initialized_paths: set = set()
+    # Overlay database files -> official database attached to them
+    _overlay_paths: Dict[str, str] = {}
+    # Change epoch per database file, bumped when writes are rolled back or the
+    # file is replaced, so change_generation() tokens taken before never recur
+    _change_epochs: Dict[str, int] = {}
+    # Committed row changes since the last maintenance run, and time of the last
+    # database access, per database file (see run_maintenance())
+    _pending_writes: Dict[str, int] = {}
+    _last_activity: Dict[str, float] = {}
+    _initialize_lock = threading.Lock()
+    _schema_fingerprint: Optional[str] = None
     
     # Protected tags that users cannot add/remove (case-insensitive)
     PROTECTED_TAGS = {"Official", "Unofficial"}
@@ -68,124 +704,248 @@ class SpellDatabase:
         """Check if a tag is a protected tag (case-insensitive)."""
         return tag.lower() in cls._PROTECTED_TAGS_LOWER
     
-    def __init__(self, db_path: Optional[str] = None):
-        """Initialize the database connection."""
+    def __init__(self, db_path: Optional[str] = None, official_db_path: Optional[str] = None):
+        """Initialize the database connection.
+        
+        Args:
+            db_path: User database file
+            official_db_path: Official content database a new user database is
+                layered on (default: the bundled one; "" to never use one)
+        """
         self.db_path = db_path or self.DEFAULT_DB_PATH
+        self.official_db_path = (self.default_official_db_path()
+                                 if official_db_path is None else official_db_path)
         self._connection: Optional[sqlite3.Connection] = None
+        self._has_spell_fts: Optional[bool] = None  # Resolved lazily on first search
+        self._search_index_is_fts: Optional[bool] = None  # Resolved lazily on first global search
+        self._facet_cache: Dict[tuple, Tuple[int, dict]] = {}  # filter key -> (generation, facets)
+        self._metadata_cache: Optional[Tuple[int, dict]] = None  # (generation, distinct values)
         
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
-        conn.execute("PRAGMA foreign_keys = ON")  # Enable foreign key support
+        """Context manager for a transaction on this thread's pooled connection.
+        
+        Nested blocks share the outermost transaction; only the outermost
+        block commits (or rolls back on error).
+        """
+        pooled = _connections.acquire(self.db_path)
+        conn = pooled.conn
+        pooled.depth += 1
         try:
             yield conn
-            conn.commit()
+            if pooled.depth == 1:
+                conn.commit()
+                if conn.total_changes != pooled.changes:
+                    self._record_writes(conn.total_changes - pooled.changes)
+                    pooled.changes = conn.total_changes
         except Exception:
-            conn.rollback()
+            if pooled.depth == 1:
+                conn.rollback()
+                if conn.total_changes != pooled.changes:
+                    self._mark_data_changed()  # Caches may have seen the rolled-back rows
+                pooled.changes = conn.total_changes
             raise
         finally:
-            conn.close()
+            pooled.depth -= 1
+            if pooled.depth == 0:
+                SpellDatabase._last_activity[ConnectionManager._key(self.db_path)] = time.monotonic()
+    
+    @contextmanager
+    def transaction(self):
+        """Unit of work spanning several SpellDatabase calls.
+        
+        Every get_connection() block run on this thread inside it joins one
+        transaction, so the whole unit commits once. Nested transaction()
+        blocks become savepoints: an exception leaving a nested block undoes
+        only that block's writes. Callbacks passed to defer_until_commit()
+        (e.g. manager listener notifications) run after the outermost block
+        commits and are dropped if it rolls back.
+        
+        Example:
+            with db.transaction():
+                for spell_id, data in updates:
+                    db.update_spell(spell_id, data)  # one commit for all
+        """
+        pooled = _connections.acquire(self.db_path)
+        if pooled.depth == 0:
+            pooled.after_commit = []
+            try:
+                with self.get_connection() as conn:
+                    if not conn.in_transaction:
+                        conn.execute("BEGIN")
+                    yield conn
+            except BaseException:
+                pooled.after_commit = None
+                self._mark_data_changed()  # Caches may have seen the rolled-back rows
+                raise
+            callbacks, pooled.after_commit = pooled.after_commit, None
+            for callback in callbacks:
+                callback()
+            return
+        
+        # Nested unit of work (or one opened inside a plain get_connection()
+        # block, which then commits it): a savepoint in the open transaction
+        conn = pooled.conn
+        if not conn.in_transaction:
+            conn.execute("BEGIN")  # A bare SAVEPOINT would commit on RELEASE
+        savepoint = f"unit_of_work_{pooled.depth}"
+        deferred = len(pooled.after_commit) if pooled.after_commit is not None else None
+        conn.execute(f"SAVEPOINT {savepoint}")
+        pooled.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+            if deferred is not None:
+                del pooled.after_commit[deferred:]
+            self._mark_data_changed()
+            raise
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+        finally:
+            pooled.depth -= 1
+    
+    def defer_until_commit(self, callback: Callable[[], None]) -> bool:
+        """Queue callback to run when this thread's open unit of work commits.
+        
+        Returns:
+            True if deferred (a transaction() is open; the same callback is
+            queued only once), False if there is no unit of work and the
+            caller should run it now
+        """
+        pooled = _connections.acquire(self.db_path)
+        if pooled.after_commit is None:
+            return False
+        if callback not in pooled.after_commit:
+            pooled.after_commit.append(callback)
+        return True
+    
+    def close(self):
+        """Close this thread's pooled connection to the database file."""
+        _connections.close(self.db_path)
+    
+    @property
+    def spell_generation(self) -> int:
+        """Counter that changes whenever spell data in this database file is written."""
+        return self.change_generation('spells')
+    
+    def change_generation(self, *tables: str) -> int:
+        """
+        Token that changes whenever one of the tracked tables is written.
+        
+        Covers writes made through any SpellDatabase instance, thread or process
+        using this file, so a cache can store the token it was built at and
+        rebuild only when the current token differs. Unchanged data costs one
+        PRAGMA data_version on this thread's connection.
+        
+        Args:
+            tables: CHANGE_TRACKED_TABLES counter names (default: all of them)
+        """
+        generations = self._table_generations()
+        epoch = SpellDatabase._change_epochs.get(ConnectionManager._key(self.db_path), 0)
+        # Counters only grow between epochs; the epoch keeps rolled-back values from recurring
+        return (epoch << 32) + sum(generations.get(table, 0) for table in tables or self.CHANGE_TRACKED_TABLES)
+    
+    def _table_generations(self) -> Dict[str, int]:
+        """The table_changes counters, re-read only after a commit or a write on this connection."""
+        pooled = _connections.acquire(self.db_path)
+        conn = pooled.conn
+        # data_version changes when another connection commits; total_changes when this one writes
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        state = pooled.change_state
+        if state is not None and state[0] == data_version and state[1] == conn.total_changes:
+            return state[2]
+        try:
+            generations = dict(conn.execute("SELECT name, generation FROM main.table_changes").fetchall())
+        except sqlite3.OperationalError:
+            generations = {}  # Schema not created yet
+        pooled.change_state = (data_version, conn.total_changes, generations)
+        return generations
+    
+    def _mark_data_changed(self):
+        """Invalidate every change_generation() token (rolled-back writes, replaced file, schema work)."""
+        key = ConnectionManager._key(self.db_path)
+        SpellDatabase._change_epochs[key] = SpellDatabase._change_epochs.get(key, 0) + 1
+        pooled = _connections.peek(self.db_path)  # Never opens one: callers may hold a write lock
+        if pooled is not None:
+            pooled.change_state = None
     
     def initialize(self):
-        """Create database tables if they don't exist."""
+        """Create database tables if they don't exist and run pending migrations.
+        
+        Schema work runs at most once per process per database file. A database
+        whose PRAGMA user_version and stored schema fingerprint match this build
+        is known to be current, so even the first call returns after one read.
+        """
+        key = ConnectionManager._key(self.db_path)
+        if key in SpellDatabase._initialized_paths:
+            return
+        with SpellDatabase._initialize_lock:
+            if key in SpellDatabase._initialized_paths:
+                return
+            self._configure_storage()
+            if not self._schema_is_current():
+                self._initialize_schema()
+            if self.is_overlay:
+                _connections.set_setup(self.db_path, self._install_overlay_views)
+            SpellDatabase._initialized_paths.add(key)
+    
+    @classmethod
+    def schema_fingerprint(cls) -> str:
+        """Hash of this build's schema version and DDL, used by the startup fast path."""
+        if cls._schema_fingerprint is None:
+            recorder = _DDLRecorder()
+            probe = cls.__new__(cls)  # DDL builders only need class attributes
+            probe._create_spell_tables(recorder)
+            probe._create_content_tables(recorder)
+            probe._create_spell_search_index(recorder)
+            probe._create_global_search_index(recorder)
+            probe._create_content_sources(recorder)
+            probe._create_change_tracking(recorder)
+            probe._create_derived_spell_indexes(recorder)
+            digest = hashlib.sha256(str(cls.SCHEMA_VERSION).encode('utf-8'))
+            for statement in recorder.statements:
+                digest.update(statement.encode('utf-8'))
+            cls._schema_fingerprint = digest.hexdigest()
+        return cls._schema_fingerprint
+    
+    def _schema_is_current(self) -> bool:
+        """Check user_version and the stored fingerprint without touching the schema."""
+        with self.get_connection() as conn:
+            user_version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if user_version != self.SCHEMA_VERSION:
+                return False
+            try:
+                row = conn.execute(
+                    "SELECT value FROM app_metadata WHERE key = 'schema_fingerprint'"
+                ).fetchone()
+            except sqlite3.OperationalError:
+                return False  # No metadata table yet
+            return row is not None and row['value'] == self.schema_fingerprint()
+    
+    def _initialize_schema(self):
+        """Issue all CREATE ... IF NOT EXISTS statements and run migrations."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Schema version table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS schema_version (
-                    version INTEGER PRIMARY KEY
-                )
-            """)
-            
-            # Main spells table (includes all columns from migrations)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS spells (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
-                    level INTEGER NOT NULL CHECK(level >= 0 AND level <= 9),
-                    casting_time TEXT NOT NULL,
-                    ritual INTEGER NOT NULL DEFAULT 0,
-                    range_value INTEGER NOT NULL,
-                    components TEXT NOT NULL,
-                    duration TEXT NOT NULL,
-                    concentration INTEGER NOT NULL DEFAULT 0,
-                    description TEXT,
-                    source TEXT,
-                    is_modified INTEGER NOT NULL DEFAULT 0,
-                    original_name TEXT DEFAULT '',
-                    is_legacy INTEGER NOT NULL DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            # Spell tables, indexes and triggers
+            self._create_spell_tables(cursor)
             
-            # Spell classes junction table (many-to-many)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS spell_classes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    spell_id INTEGER NOT NULL,
-                    class_name TEXT NOT NULL,
-                    FOREIGN KEY (spell_id) REFERENCES spells(id) ON DELETE CASCADE,
-                    UNIQUE(spell_id, class_name)
-                )
-            """)
+            # Create content tables (lineages, feats, backgrounds, classes)
+            self._create_content_tables(cursor)
             
-            # Spell tags junction table (many-to-many)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS spell_tags (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    spell_id INTEGER NOT NULL,
-                    tag TEXT NOT NULL,
-                    FOREIGN KEY (spell_id) REFERENCES spells(id) ON DELETE CASCADE,
-                    UNIQUE(spell_id, tag)
-                )
-            """)
+            # Full-text search index over spells (kept in sync by triggers)
+            self._create_spell_search_index(cursor)
             
-            # Stat blocks table (for summoning spells)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS stat_blocks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    spell_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    size TEXT NOT NULL DEFAULT 'Medium',
-                    creature_type TEXT NOT NULL DEFAULT '',
-                    creature_subtype TEXT DEFAULT '',
-                    alignment TEXT DEFAULT 'Neutral',
-                    armor_class TEXT NOT NULL DEFAULT '',
-                    hit_points TEXT NOT NULL DEFAULT '',
-                    speed TEXT NOT NULL DEFAULT '',
-                    abilities_json TEXT,
-                    damage_resistances TEXT DEFAULT '',
-                    damage_immunities TEXT DEFAULT '',
-                    condition_immunities TEXT DEFAULT '',
-                    senses TEXT DEFAULT '',
-                    languages TEXT DEFAULT '',
-                    challenge_rating TEXT DEFAULT '',
-                    traits_json TEXT DEFAULT '[]',
-                    actions_json TEXT DEFAULT '[]',
-                    bonus_actions_json TEXT DEFAULT '[]',
-                    reactions_json TEXT DEFAULT '[]',
-                    legendary_actions_json TEXT DEFAULT '[]',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (spell_id) REFERENCES spells(id) ON DELETE CASCADE
-                )
-            """)
+            # Cross-content global search index (kept in sync by triggers)
+            self._create_global_search_index(cursor)
             
-            # Create indexes for faster queries
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_spells_level ON spells(level)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_spells_name ON spells(name)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_spell_classes_spell_id ON spell_classes(spell_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_spell_classes_class ON spell_classes(class_name)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_spell_tags_spell_id ON spell_tags(spell_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_spell_tags_tag ON spell_tags(tag)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_stat_blocks_spell_id ON stat_blocks(spell_id)")
+            # Content source registry (kept in sync by triggers)
+            self._create_content_sources(cursor)
             
-            # Create content tables (lineages, feats, backgrounds, classes)
-            self._create_content_tables(cursor)
+            # Per-table change counters (kept in sync by triggers)
+            self._create_change_tracking(cursor)
             
             # Track if this is a fresh database (for initial data population)
             is_fresh_db = False
@@ -196,29 +956,360 @@ class SpellDatabase:
                 cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (self.SCHEMA_VERSION,))
                 is_fresh_db = True
             
-            # Create trigger for updated_at
-            cursor.execute("""
-                CREATE TRIGGER IF NOT EXISTS update_spell_timestamp 
-                AFTER UPDATE ON spells
-                BEGIN
-                    UPDATE spells SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-                END
-            """)
-            
             # Run migrations (for upgrading existing databases)
             self._run_migrations(conn)
             
-            # If this is a fresh database, populate content tables from JSON
-            if is_fresh_db:
+            # Derived filter column indexes (older databases gain the columns in migration 18)
+            self._create_derived_spell_indexes(cursor)
+            
+            # If this is a fresh database, populate content tables from the
+            # official database (overlay) or from the bundled JSON files
+            if is_fresh_db and self.is_overlay:
+                self._populate_overlay(cursor)
+            elif is_fresh_db:
                 print("Populating content tables from bundled JSON files...")
                 self._migrate_json_to_database(cursor)
+                self._rebuild_class_feature_tables(cursor)
+            
+            # Record that this database matches the current build's schema
+            cursor.execute("""
+                INSERT OR REPLACE INTO app_metadata (key, value)
+                VALUES ('schema_fingerprint', ?)
+            """, (self.schema_fingerprint(),))
+            cursor.execute(f"PRAGMA user_version = {int(self.SCHEMA_VERSION)}")
+        self._mark_data_changed()
+        # New or migrated schema: planner statistics are missing or stale
+        self._record_writes(self.MAINTENANCE_WRITE_THRESHOLD)
     
-    def _run_migrations(self, conn):
-        """Run schema migrations if needed."""
-        cursor = conn.cursor()
-        cursor.execute("SELECT version FROM schema_version LIMIT 1")
-        row = cursor.fetchone()
-        current_version = row['version'] if row else 0
+    # ==================== OFFICIAL CONTENT OVERLAY ====================
+    
+    @classmethod
+    def default_official_db_path(cls) -> str:
+        """Location of the bundled, prebuilt official content database."""
+        if getattr(sys, 'frozen', False):
+            base = getattr(sys, '_MEIPASS', os.path.dirname(sys.executable))
+        else:
+            base = os.path.dirname(os.path.abspath(__file__))
+        return os.path.join(base, cls.OFFICIAL_DB_NAME)
+    
+    @classmethod
+    def official_db_is_usable(cls, official_path: str) -> bool:
+        """Check that an official content database exists and matches this build's schema."""
+        if not official_path or not os.path.isfile(official_path):
+            return False
+        try:
+            conn = sqlite3.connect(cls._read_only_uri(official_path), uri=True)
+            try:
+                row = conn.execute(
+                    "SELECT value FROM app_metadata WHERE key = 'schema_fingerprint'"
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return False
+        return row is not None and row[0] == cls.schema_fingerprint()
+    
+    @staticmethod
+    def _read_only_uri(path: str) -> str:
+        """URI opening a database file read-only and immutable (no locking or change checks)."""
+        return "file:" + pathname2url(os.path.abspath(path)) + "?mode=ro&immutable=1"
+    
+    @property
+    def is_overlay(self) -> bool:
+        """Whether this database is a user overlay on the read-only official database."""
+        return ConnectionManager._key(self.db_path) in SpellDatabase._overlay_paths
+    
+    def _configure_storage(self):
+        """Decide whether this database is an overlay and attach the official database if so.
+        
+        Existing databases keep the mode recorded in app_metadata. A brand-new
+        database becomes an overlay when a usable official database is bundled.
+        Runs before schema work, outside any transaction (ATTACH requires that).
+        """
+        key = ConnectionManager._key(self.db_path)
+        with self.get_connection() as conn:
+            tables = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('spells', 'app_metadata')"
+            )}
+            mode = None
+            if 'app_metadata' in tables:
+                row = conn.execute("SELECT value FROM app_metadata WHERE key = 'storage_mode'").fetchone()
+                mode = row['value'] if row else None
+        
+        if mode is None and 'spells' not in tables and self.official_db_is_usable(self.official_db_path):
+            mode = 'overlay'
+        if mode != 'overlay':
+            return
+        if not os.path.isfile(self.official_db_path):
+            print(f"Warning: official content database not found at {self.official_db_path}")
+            return
+        
+        SpellDatabase._overlay_paths[key] = self.official_db_path
+        pooled = _connections.acquire(self.db_path)
+        self._attach_official(pooled.conn)
+    
+    def _attach_official(self, conn: sqlite3.Connection):
+        """ATTACH the official database read-only as schema 'official' (once per connection)."""
+        attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+        if 'official' in attached:
+            return
+        official_path = SpellDatabase._overlay_paths[ConnectionManager._key(self.db_path)]
+        conn.execute("ATTACH DATABASE ? AS official", (self._read_only_uri(official_path),))
+        conn.execute(f"PRAGMA official.mmap_size = {self.OFFICIAL_MMAP_SIZE}")
+    
+    def _install_overlay_views(self, conn: sqlite3.Connection):
+        """Connection setup hook: attach the official database and create the merged views.
+        
+        TEMP views named like the overlaid tables shadow main's tables for
+        unqualified reads, so queries see official rows merged with the overlay.
+        A spell (with its classes, tags and stat blocks) comes from the overlay
+        once the overlay has a row with its id, otherwise from the official
+        database unless it was deleted (spell_tombstones). Writes always target
+        main explicitly and copy official rows over first (_materialize_spells).
+        """
+        self._attach_official(conn)
+        for table in self.OVERLAY_TABLES:
+            main_columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+            official_columns = {row[1]: row[4] for row in conn.execute(f"PRAGMA official.table_info({table})")}
+            # Columns added after the official database was built read as their default
+            official_select = ", ".join(
+                f"o.{column}" if column in official_columns else f"NULL AS {column}"
+                for column in main_columns
+            )
+            owner = "o.id" if table == 'spells' else "o.spell_id"
+            conn.execute(f"DROP VIEW IF EXISTS temp.{table}")
+            conn.execute(f"""
+                CREATE TEMP VIEW {table} AS
+                SELECT {', '.join(main_columns)} FROM main.{table}
+                UNION ALL
+                SELECT {official_select} FROM official.{table} o
+                WHERE {owner} NOT IN (SELECT id FROM main.spells)
+                  AND {owner} NOT IN (SELECT spell_id FROM main.spell_tombstones)
+            """)
+    
+    def _populate_overlay(self, cursor):
+        """Fill a new overlay database: copy the small content catalogs and reserve user id ranges."""
+        for table in self.OVERLAY_CATALOG_TABLES:
+            columns = [row[1] for row in cursor.execute(f"PRAGMA main.table_info({table})").fetchall()]
+            official_columns = {row[1] for row in cursor.execute(f"PRAGMA official.table_info({table})").fetchall()}
+            shared = [column for column in columns if column in official_columns]
+            cursor.execute(
+                f"INSERT OR IGNORE INTO main.{table} ({', '.join(shared)}) "
+                f"SELECT {', '.join(shared)} FROM official.{table}"
+            )
+        # Spells and stat blocks created by the user get ids above every official id
+        for table in ('spells', 'stat_blocks'):
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM official.{table}")
+            floor = max(cursor.fetchone()[0], self.OVERLAY_ID_OFFSET)
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, floor))
+        # Official spells are not copied, so their sources are registered here
+        self._register_content_sources(cursor)
+        cursor.execute("INSERT OR REPLACE INTO app_metadata (key, value) VALUES ('storage_mode', 'overlay')")
+    
+    def _materialize_spells(self, cursor, spell_ids: Optional[List[int]] = None, staged: bool = False):
+        """
+        Copy official spells into the overlay before they are modified (no-op for standalone databases).
+        
+        Each spell is copied with its classes, tags and stat blocks so the overlay
+        holds its complete state from then on.
+        
+        Args:
+            spell_ids: Spells about to be written
+            staged: Use the ids staged in temp.spell_id_batch instead of spell_ids
+        """
+        if not self.is_overlay:
+            return
+        if staged:
+            id_sql, params = "SELECT spell_id FROM temp.spell_id_batch", []
+        else:
+            if not spell_ids:
+                return
+            id_sql, params = ", ".join("?" * len(spell_ids)), list(spell_ids)
+        
+        cursor.execute(f"""
+            SELECT o.id FROM official.spells o
+            WHERE o.id IN ({id_sql})
+              AND o.id NOT IN (SELECT id FROM main.spells)
+              AND o.id NOT IN (SELECT spell_id FROM main.spell_tombstones)
+        """, params)
+        pending = [row[0] for row in cursor.fetchall()]
+        if not pending:
+            return
+        
+        placeholders = ", ".join("?" * len(pending))
+        for table in self.OVERLAY_TABLES:
+            columns = [row[1] for row in cursor.execute(f"PRAGMA main.table_info({table})").fetchall()]
+            official_columns = {row[1] for row in cursor.execute(f"PRAGMA official.table_info({table})").fetchall()}
+            shared = ", ".join(column for column in columns if column in official_columns)
+            owner = "id" if table == 'spells' else "spell_id"
+            cursor.execute(
+                f"INSERT INTO main.{table} ({shared}) SELECT {shared} FROM official.{table} "
+                f"WHERE {owner} IN ({placeholders})",
+                pending
+            )
+    
+    def _delete_spell_rows(self, cursor, where_sql: str, params: list) -> List[str]:
+        """Delete spells matching where_sql; official ones are also hidden by a tombstone.
+        
+        Returns the names and original names of the deleted spells (empty if none).
+        """
+        cursor.execute(f"SELECT id, name, original_name FROM spells WHERE {where_sql}", params)
+        rows = cursor.fetchall()
+        if not rows:
+            return []
+        spell_ids = [row[0] for row in rows]
+        placeholders = ", ".join("?" * len(spell_ids))
+        cursor.execute(f"DELETE FROM main.spells WHERE id IN ({placeholders})", spell_ids)
+        if self.is_overlay:
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO main.spell_tombstones (spell_id)
+                SELECT id FROM official.spells WHERE id IN ({placeholders})
+            """, spell_ids)
+        return [name for row in rows for name in (row[1], row[2])]
+    
+    def _create_spell_tables(self, cursor):
+        """Create the spell tables, indexes and triggers."""
+        # Schema version table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY
+            )
+        """)
+        
+        # Main spells table (includes all columns from migrations)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS spells (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+                level INTEGER NOT NULL CHECK(level >= 0 AND level <= 9),
+                casting_time TEXT NOT NULL,
+                ritual INTEGER NOT NULL DEFAULT 0,
+                range_value INTEGER NOT NULL,
+                components TEXT NOT NULL,
+                duration TEXT NOT NULL,
+                concentration INTEGER NOT NULL DEFAULT 0,
+                description TEXT,
+                source TEXT,
+                is_modified INTEGER NOT NULL DEFAULT 0,
+                original_name TEXT DEFAULT '',
+                is_legacy INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                range_feet INTEGER NOT NULL DEFAULT 0,
+                has_v INTEGER NOT NULL DEFAULT 0,
+                has_s INTEGER NOT NULL DEFAULT 0,
+                has_m INTEGER NOT NULL DEFAULT 0,
+                has_costly_component INTEGER NOT NULL DEFAULT 0,
+                duration_seconds INTEGER NOT NULL DEFAULT 0,
+                source_key TEXT NOT NULL DEFAULT '',
+                has_non_legacy_twin INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        
+        # Spell classes junction table (many-to-many)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS spell_classes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                spell_id INTEGER NOT NULL,
+                class_name TEXT NOT NULL,
+                FOREIGN KEY (spell_id) REFERENCES spells(id) ON DELETE CASCADE,
+                UNIQUE(spell_id, class_name)
+            )
+        """)
+        
+        # Spell tags junction table (many-to-many)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS spell_tags (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                spell_id INTEGER NOT NULL,
+                tag TEXT NOT NULL,
+                FOREIGN KEY (spell_id) REFERENCES spells(id) ON DELETE CASCADE,
+                UNIQUE(spell_id, tag)
+            )
+        """)
+        
+        # Stat blocks table (for summoning spells)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stat_blocks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                spell_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                size TEXT NOT NULL DEFAULT 'Medium',
+                creature_type TEXT NOT NULL DEFAULT '',
+                creature_subtype TEXT DEFAULT '',
+                alignment TEXT DEFAULT 'Neutral',
+                armor_class TEXT NOT NULL DEFAULT '',
+                hit_points TEXT NOT NULL DEFAULT '',
+                speed TEXT NOT NULL DEFAULT '',
+                abilities_json TEXT,
+                damage_resistances TEXT DEFAULT '',
+                damage_immunities TEXT DEFAULT '',
+                condition_immunities TEXT DEFAULT '',
+                senses TEXT DEFAULT '',
+                languages TEXT DEFAULT '',
+                challenge_rating TEXT DEFAULT '',
+                traits_json TEXT DEFAULT '[]',
+                actions_json TEXT DEFAULT '[]',
+                bonus_actions_json TEXT DEFAULT '[]',
+                reactions_json TEXT DEFAULT '[]',
+                legendary_actions_json TEXT DEFAULT '[]',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (spell_id) REFERENCES spells(id) ON DELETE CASCADE
+            )
+        """)
+        
+        # Create indexes for faster queries
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spells_level ON spells(level)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spells_name ON spells(name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spells_level_name ON spells(level, name COLLATE NOCASE)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spell_classes_spell_id ON spell_classes(spell_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spell_classes_class ON spell_classes(class_name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spell_tags_spell_id ON spell_tags(spell_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spell_tags_tag ON spell_tags(tag)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_stat_blocks_spell_id ON stat_blocks(spell_id)")
+        
+        # Create trigger for updated_at
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS update_spell_timestamp 
+            AFTER UPDATE ON spells
+            BEGIN
+                UPDATE spells SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            END
+        """)
+        
+        # Key/value store for application metadata (schema fingerprint, etc.)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS app_metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        
+        # Official spells deleted in an overlay database (hidden from the merged view)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS spell_tombstones (
+                spell_id INTEGER PRIMARY KEY
+            )
+        """)
+        
+        # Content hash of each bundled seed item as of the last sync
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS seed_state (
+                dataset TEXT NOT NULL,
+                item_key TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                PRIMARY KEY (dataset, item_key)
+            ) WITHOUT ROWID
+        """)
+    
+    def _run_migrations(self, conn):
+        """Run schema migrations if needed."""
+        cursor = conn.cursor()
+        cursor.execute("SELECT version FROM schema_version LIMIT 1")
+        row = cursor.fetchone()
+        current_version = row['version'] if row else 0
         
         # Migration to version 2: add is_modified column
         if current_version < 2:
@@ -360,6 +1451,515 @@ class SpellDatabase:
             self._refresh_spell_descriptions_v13(cursor)
             cursor.execute("UPDATE schema_version SET version = 15")
             current_version = 15
+        
+        # Migration to version 16: build FTS5 spell search index
+        if current_version < 16:
+            if self._create_spell_search_index(cursor):
+                self._rebuild_spell_search_index(cursor)
+            cursor.execute("UPDATE schema_version SET version = 16")
+            current_version = 16
+        
+        # Migration to version 17: build unified global search index
+        if current_version < 17:
+            self._create_global_search_index(cursor)
+            self._rebuild_global_search_index(cursor)
+            cursor.execute("UPDATE schema_version SET version = 17")
+            current_version = 17
+        
+        # Migration to version 18: derived filter columns (range in feet, component flags, etc.)
+        if current_version < 18:
+            self._add_derived_spell_columns_v18(cursor)
+            cursor.execute("UPDATE schema_version SET version = 18")
+            current_version = 18
+        
+        # Migration to version 19: store large JSON columns compressed
+        if current_version < 19:
+            self._encode_json_columns_v19(cursor)
+            cursor.execute("UPDATE schema_version SET version = 19")
+            current_version = 19
+        
+        # Migration to version 20: per-level class, subclass and trackable feature tables
+        if current_version < 20:
+            self._rebuild_class_feature_tables(cursor)
+            cursor.execute("UPDATE schema_version SET version = 20")
+            current_version = 20
+        
+        # Migration to version 21: change counters for cross-instance cache invalidation
+        if current_version < 21:
+            self._create_change_tracking(cursor)
+            cursor.execute("UPDATE schema_version SET version = 21")
+            current_version = 21
+        
+        # Migration to version 22: content source registry
+        if current_version < 22:
+            self._register_content_sources(cursor)
+            cursor.execute("UPDATE schema_version SET version = 22")
+            current_version = 22
+    
+    def _create_derived_spell_indexes(self, cursor):
+        """Create indexes over the derived spell filter columns."""
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spells_range_feet ON spells(range_feet)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spells_duration_seconds ON spells(duration_seconds)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spells_source_key ON spells(source_key)")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_spells_components 
+            ON spells(has_v, has_s, has_m, has_costly_component)
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spells_legacy ON spells(is_legacy, has_non_legacy_twin)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spells_original_name ON spells(original_name COLLATE NOCASE)")
+    
+    def _add_derived_spell_columns_v18(self, cursor):
+        """Add the derived filter columns to an existing spells table and backfill them."""
+        cursor.execute("PRAGMA table_info(spells)")
+        existing_columns = {col[1] for col in cursor.fetchall()}
+        
+        columns_to_add = [
+            ("range_feet", "INTEGER NOT NULL DEFAULT 0"),
+            ("has_v", "INTEGER NOT NULL DEFAULT 0"),
+            ("has_s", "INTEGER NOT NULL DEFAULT 0"),
+            ("has_m", "INTEGER NOT NULL DEFAULT 0"),
+            ("has_costly_component", "INTEGER NOT NULL DEFAULT 0"),
+            ("duration_seconds", "INTEGER NOT NULL DEFAULT 0"),
+            ("source_key", "TEXT NOT NULL DEFAULT ''"),
+            ("has_non_legacy_twin", "INTEGER NOT NULL DEFAULT 0"),
+        ]
+        
+        for col_name, col_def in columns_to_add:
+            if col_name not in existing_columns:
+                cursor.execute(f"ALTER TABLE spells ADD COLUMN {col_name} {col_def}")
+        
+        self._create_derived_spell_indexes(cursor)
+        self._refresh_derived_spell_columns(cursor)
+        self._refresh_legacy_twins(cursor)
+    
+    def _encode_json_columns_v19(self, cursor):
+        """Re-encode existing JSON text in the content tables with encode_json_column()."""
+        for table, columns in self.ENCODED_JSON_COLUMNS.items():
+            for column in columns:
+                cursor.execute(f"""
+                    SELECT id, {column} FROM main.{table}
+                    WHERE typeof({column}) = 'text' AND length({column}) >= ?
+                """, (JSON_COMPRESS_MIN_BYTES,))
+                updates = [(encode_json_column(json.loads(raw)), row_id) for row_id, raw in cursor.fetchall()]
+                cursor.executemany(f"UPDATE main.{table} SET {column} = ? WHERE id = ?", updates)
+    
+    @staticmethod
+    def _derived_spell_values(spell_data: dict) -> tuple:
+        """
+        Compute the derived filter columns for a spell.
+        
+        Returns values in DERIVED_SPELL_COLUMNS order.
+        """
+        from spell import range_value_to_feet, components_have_cost, SpellComparison
+        
+        components = spell_data.get('components') or ''
+        components_upper = components.upper()
+        return (
+            range_value_to_feet(spell_data['range_value']),
+            1 if 'V' in components_upper else 0,
+            1 if 'S' in components_upper else 0,
+            1 if 'M' in components_upper else 0,
+            1 if components_have_cost(components) else 0,
+            SpellComparison.parse_duration_seconds(spell_data.get('duration') or ''),
+            (spell_data.get('source') or '').lower(),
+        )
+    
+    def _refresh_derived_spell_columns(self, cursor, spell_ids: Optional[List[int]] = None):
+        """
+        Recompute derived filter columns from the stored spell fields.
+        
+        Needed after raw UPDATEs that bypass insert_spell/update_spell
+        (migrations, bulk description updates).
+        
+        Args:
+            spell_ids: Spells to refresh (None for all)
+        """
+        query = "SELECT id, range_value, components, duration, source FROM spells"
+        params: list = []
+        if spell_ids is not None:
+            if not spell_ids:
+                return
+            query += f" WHERE id IN ({','.join('?' * len(spell_ids))})"
+            params = list(spell_ids)
+        cursor.execute(query, params)
+        
+        assignments = ", ".join(f"{col} = ?" for col in self.DERIVED_SPELL_COLUMNS)
+        cursor.executemany(
+            f"UPDATE main.spells SET {assignments} WHERE id = ?",
+            [(*self._derived_spell_values(dict(row)), row['id']) for row in cursor.fetchall()]
+        )
+    
+    TWIN_REFRESH_CHUNK = 400  # Names per scoped _refresh_legacy_twins statement (bound parameter limit)
+    
+    def _refresh_legacy_twins(self, cursor, names: Optional[Iterable[str]] = None):
+        """
+        Recompute has_non_legacy_twin after spells are added, renamed, or removed.
+        
+        A legacy spell has a twin when a non-legacy spell shares its name,
+        either directly or through the twin's original_name. Only rows whose
+        flag actually changes are written, so timestamps stay untouched.
+        The unary + keeps the planner on the name indexes: without ANALYZE
+        statistics it would otherwise scan idx_spells_legacy for every row.
+        
+        Args:
+            names: Recheck only spells with one of these names: the old and new
+                name and original_name of the rows just written, which are the
+                only flags a write can change. None rechecks every spell
+                (migrations, seed sync).
+        """
+        sql = """
+            UPDATE main.spells SET has_non_legacy_twin = 1 - has_non_legacy_twin
+            WHERE has_non_legacy_twin != (
+                spells.is_legacy = 1 AND EXISTS (
+                    SELECT 1 FROM spells t
+                    WHERE +t.is_legacy = 0 AND t.id != spells.id
+                    AND (t.name = spells.name COLLATE NOCASE
+                         OR t.original_name = spells.name COLLATE NOCASE)
+                )
+            )
+        """
+        if names is None:
+            cursor.execute(sql)
+            return
+        
+        # name is COLLATE NOCASE, so IN compares (and seeks its unique index) case-insensitively
+        unique_names = list({name.lower(): name for name in names if name}.values())
+        for start in range(0, len(unique_names), self.TWIN_REFRESH_CHUNK):
+            chunk = unique_names[start:start + self.TWIN_REFRESH_CHUNK]
+            cursor.execute(f"{sql} AND spells.name IN ({', '.join('?' * len(chunk))})", chunk)
+    
+    def _create_spell_search_index(self, cursor) -> bool:
+        """Create the spells_fts full-text index and the triggers that keep it in sync.
+        
+        Uses the trigram tokenizer so MATCH keeps the substring semantics of the
+        old LIKE '%text%' search. Returns False if this SQLite build lacks FTS5
+        or the trigram tokenizer, in which case searches fall back to LIKE.
+        """
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS spells_fts USING fts5(
+                    name, description, tags, source,
+                    tokenize = 'trigram'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search unavailable, using LIKE search: {e}")
+            return False
+        
+        # Tags are joined with newlines so a search can't match across two tags
+        tags_subquery = "(SELECT group_concat(tag, char(10)) FROM spell_tags WHERE spell_id = {ref})"
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS spells_fts_insert AFTER INSERT ON spells
+            BEGIN
+                INSERT INTO spells_fts (rowid, name, description, tags, source)
+                VALUES (NEW.id, NEW.name, COALESCE(NEW.description, ''),
+                        COALESCE({tags_subquery.format(ref='NEW.id')}, ''), COALESCE(NEW.source, ''));
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS spells_fts_delete AFTER DELETE ON spells
+            BEGIN
+                DELETE FROM spells_fts WHERE rowid = OLD.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS spells_fts_update AFTER UPDATE OF name, description, source ON spells
+            BEGIN
+                UPDATE spells_fts SET
+                    name = NEW.name,
+                    description = COALESCE(NEW.description, ''),
+                    source = COALESCE(NEW.source, '')
+                WHERE rowid = NEW.id;
+            END
+        """)
+        for event, ref in (("INSERT", "NEW"), ("DELETE", "OLD")):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS spell_tags_fts_{event.lower()} AFTER {event} ON spell_tags
+                BEGIN
+                    UPDATE spells_fts SET tags = COALESCE({tags_subquery.format(ref=f'{ref}.spell_id')}, '')
+                    WHERE rowid = {ref}.spell_id;
+                END
+            """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS spell_tags_fts_update AFTER UPDATE ON spell_tags
+            BEGIN
+                UPDATE spells_fts SET tags = COALESCE({tags_subquery.format(ref='OLD.spell_id')}, '')
+                WHERE rowid = OLD.spell_id;
+                UPDATE spells_fts SET tags = COALESCE({tags_subquery.format(ref='NEW.spell_id')}, '')
+                WHERE rowid = NEW.spell_id;
+            END
+        """)
+        return True
+    
+    def _rebuild_spell_search_index(self, cursor):
+        """Repopulate spells_fts from the spells and spell_tags tables."""
+        cursor.execute("DELETE FROM spells_fts")
+        cursor.execute("""
+            INSERT INTO spells_fts (rowid, name, description, tags, source)
+            SELECT s.id, s.name, COALESCE(s.description, ''),
+                   COALESCE((SELECT group_concat(tag, char(10)) FROM spell_tags WHERE spell_id = s.id), ''),
+                   COALESCE(s.source, '')
+            FROM spells s
+        """)
+    
+    def rebuild_spell_search_index(self) -> bool:
+        """Rebuild the full-text spell index from scratch. Returns False if FTS5 is unavailable."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if not self._create_spell_search_index(cursor):
+                return False
+            self._rebuild_spell_search_index(cursor)
+            return True
+    
+    @classmethod
+    def _global_search_rows_sql(cls, code: int, ref: str) -> Tuple[str, str, str]:
+        """SQL expressions (rowid, label, description) for one search_index row.
+        
+        ref is the row reference: 'NEW'/'OLD' inside triggers or a table alias.
+        Subclass labels include the parent class, e.g. "Path of the Berserker (Barbarian)".
+        """
+        section, table = cls.GLOBAL_SEARCH_SECTIONS[code]
+        rowid_sql = f"{ref}.id * 8 + {code}"
+        if table == 'subclasses':
+            label_sql = f"{ref}.name || ' (' || COALESCE((SELECT name FROM classes WHERE id = {ref}.class_id), '') || ')'"
+        else:
+            label_sql = f"{ref}.name"
+        # Classes have no prose description column
+        description_sql = "''" if table == 'classes' else f"COALESCE({ref}.description, '')"
+        return rowid_sql, label_sql, description_sql
+    
+    def _create_global_search_index(self, cursor):
+        """Create the search_index table used by global_search and its sync triggers.
+        
+        One row per spell, lineage, feat, background, class and subclass. It is
+        an FTS5 trigram table when available, otherwise a plain table searched
+        with LIKE.
+        """
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                    section UNINDEXED, item_id UNINDEXED, label UNINDEXED,
+                    name, description,
+                    tokenize = 'trigram'
+                )
+            """)
+        except sqlite3.OperationalError:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS search_index (
+                    section TEXT NOT NULL,
+                    item_id INTEGER NOT NULL,
+                    label TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    description TEXT DEFAULT ''
+                )
+            """)
+        
+        for code, (section, table) in enumerate(self.GLOBAL_SEARCH_SECTIONS):
+            new_rowid, new_label, new_description = self._global_search_rows_sql(code, 'NEW')
+            old_rowid, _, _ = self._global_search_rows_sql(code, 'OLD')
+            watched = "name, class_id, description" if table == 'subclasses' else (
+                "name" if table == 'classes' else "name, description")
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS search_index_{table}_insert AFTER INSERT ON {table}
+                BEGIN
+                    INSERT INTO search_index (rowid, section, item_id, label, name, description)
+                    VALUES ({new_rowid}, '{section}', NEW.id, {new_label}, NEW.name, {new_description});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS search_index_{table}_delete AFTER DELETE ON {table}
+                BEGIN
+                    DELETE FROM search_index WHERE rowid = {old_rowid};
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS search_index_{table}_update AFTER UPDATE OF {watched} ON {table}
+                BEGIN
+                    DELETE FROM search_index WHERE rowid = {old_rowid};
+                    INSERT INTO search_index (rowid, section, item_id, label, name, description)
+                    VALUES ({new_rowid}, '{section}', NEW.id, {new_label}, NEW.name, {new_description});
+                END
+            """)
+        
+        # Renaming a class changes the labels of its subclasses
+        subclass_code = [t for _, t in self.GLOBAL_SEARCH_SECTIONS].index('subclasses')
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS search_index_class_rename AFTER UPDATE OF name ON classes
+            BEGIN
+                UPDATE search_index SET label = (
+                    SELECT sc.name || ' (' || NEW.name || ')' FROM subclasses sc
+                    WHERE sc.id * 8 + {subclass_code} = search_index.rowid
+                )
+                WHERE rowid IN (SELECT id * 8 + {subclass_code} FROM subclasses WHERE class_id = NEW.id);
+            END
+        """)
+    
+    def _create_change_tracking(self, cursor):
+        """
+        Create table_changes and the triggers that bump its counters.
+        
+        Every insert, update or delete on a CHANGE_TRACKED_TABLES table bumps its
+        counter in the same transaction, whichever connection or process made it.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS table_changes (
+                name TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+        counters: Dict[str, List[str]] = {}
+        for name, tables in self.CHANGE_TRACKED_TABLES.items():
+            cursor.execute("INSERT OR IGNORE INTO table_changes (name) VALUES (?)", (name,))
+            for table in tables:
+                counters.setdefault(table, []).append(name)
+        for table, names in counters.items():
+            name_list = ", ".join(f"'{name}'" for name in names)
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS table_changes_{table}_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE table_changes SET generation = generation + 1 WHERE name IN ({name_list});
+                    END
+                """)
+    
+    def _create_content_sources(self, cursor):
+        """
+        Create the content_sources registry and the triggers that fill it.
+        
+        Every distinct source of a SOURCED_CONTENT_TABLES row is registered on
+        insert or rename. Disabled sources sit in a partial index, so listings
+        exclude them with a lookup that is empty when nothing is disabled, and
+        each content table has a source index to find the rows they hide.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS content_sources (
+                name TEXT PRIMARY KEY COLLATE NOCASE,
+                enabled INTEGER NOT NULL DEFAULT 1
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_content_sources_disabled
+            ON content_sources(name) WHERE enabled = 0
+        """)
+        for table in self.SOURCED_CONTENT_TABLES:
+            # Spells are looked up through idx_spells_source_key instead
+            if table != 'spells':
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_source ON {table}(source COLLATE NOCASE)"
+                )
+            for event in ('INSERT', 'UPDATE OF source'):
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS content_sources_{table}_{event.split()[0].lower()}
+                    AFTER {event} ON {table}
+                    WHEN COALESCE(NEW.source, '') != ''
+                    BEGIN
+                        INSERT OR IGNORE INTO content_sources (name) VALUES (NEW.source);
+                    END
+                """)
+    
+    def _register_content_sources(self, cursor):
+        """Register the sources of existing content, including official spells of an overlay."""
+        tables = [f"main.{table}" for table in self.SOURCED_CONTENT_TABLES]
+        if self.is_overlay:
+            tables.append("official.spells")
+        for table in tables:
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO main.content_sources (name)
+                SELECT DISTINCT source FROM {table} WHERE COALESCE(source, '') != ''
+            """)
+    
+    @staticmethod
+    def _enabled_source_sql(column: str) -> str:
+        """SQL condition that is true unless column holds a disabled content source."""
+        return (f"COALESCE({column}, '') COLLATE NOCASE NOT IN "
+                "(SELECT name FROM main.content_sources WHERE enabled = 0)")
+    
+    def _hidden_search_rows_sql(self) -> str:
+        """SQL selecting the search_index rowids of content from disabled sources.
+        
+        Each branch seeks the disabled names in the content table's source index,
+        so the set is found without scanning when few (or no) sources are disabled.
+        Subclasses are also hidden when their parent class is.
+        """
+        disabled = "SELECT name FROM main.content_sources WHERE enabled = 0"
+        branches = []
+        for code, (_, table) in enumerate(self.GLOBAL_SEARCH_SECTIONS):
+            if table == 'spells':
+                condition = f"source_key IN (SELECT lower(name) FROM ({disabled}))"
+            else:
+                condition = f"source COLLATE NOCASE IN ({disabled})"
+            if table == 'subclasses':
+                condition += f" OR class_id IN (SELECT id FROM classes WHERE source COLLATE NOCASE IN ({disabled}))"
+            branches.append(f"SELECT id * 8 + {code} FROM {table} WHERE {condition}")
+        return " UNION ALL ".join(branches)
+    
+    def _rebuild_global_search_index(self, cursor):
+        """Repopulate search_index from all content tables."""
+        cursor.execute("DELETE FROM search_index")
+        for code, (section, table) in enumerate(self.GLOBAL_SEARCH_SECTIONS):
+            rowid_sql, label_sql, description_sql = self._global_search_rows_sql(code, 't')
+            cursor.execute(f"""
+                INSERT INTO search_index (rowid, section, item_id, label, name, description)
+                SELECT {rowid_sql}, ?, t.id, {label_sql}, t.name, {description_sql}
+                FROM {table} t
+            """, (section,))
+    
+    def rebuild_global_search_index(self):
+        """Rebuild the global search index from scratch."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self._create_global_search_index(cursor)
+            self._rebuild_global_search_index(cursor)
+            self._search_index_is_fts = None
+    
+    def _spell_fts_available(self, conn: sqlite3.Connection) -> bool:
+        """Check (once per instance) whether the spells_fts index exists."""
+        if self._has_spell_fts is None:
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'spells_fts'"
+            ).fetchone()
+            self._has_spell_fts = row is not None
+        return self._has_spell_fts
+    
+    def _spell_text_search(self, conn: sqlite3.Connection, search_text: str) -> Tuple[str, str, list]:
+        """Build the SQL that restricts spells (alias s) to those matching search_text.
+        
+        Returns (from_sql, condition_sql, params). When the FTS index can be used,
+        from_sql replaces "spells s" with a ranked subquery exposing fts.rank
+        (bm25, lower is better) and condition_sql is empty. Otherwise from_sql is
+        empty and condition_sql is the LIKE fallback.
+        """
+        if len(search_text) >= self.SPELL_FTS_MIN_QUERY_LENGTH and self._spell_fts_available(conn):
+            # Quote as a single phrase so user text is matched literally as a substring
+            phrase = '"' + search_text.replace('"', '""') + '"'
+            weights = ", ".join(str(w) for w in self.SPELL_FTS_WEIGHTS)
+            match = f"{self.SPELL_FTS_SEARCH_COLUMNS} : {phrase}"
+            match_sql = f"""
+                    SELECT rowid AS spell_id, bm25(spells_fts, {weights}) AS rank
+                    FROM main.spells_fts WHERE spells_fts MATCH ?"""
+            params = [match]
+            if self.is_overlay:
+                # Official matches, minus spells the overlay replaced or deleted
+                match_sql += f"""
+                    UNION ALL
+                    SELECT rowid, bm25(spells_fts, {weights})
+                    FROM official.spells_fts WHERE spells_fts MATCH ?
+                      AND rowid NOT IN (SELECT id FROM main.spells)
+                      AND rowid NOT IN (SELECT spell_id FROM main.spell_tombstones)"""
+                params.append(match)
+            # CROSS JOIN keeps the match set as the outer loop; otherwise the planner
+            # may drive from a spells index and rescan the FTS index per row
+            from_sql = f"({match_sql}\n                ) fts CROSS JOIN spells s ON s.id = fts.spell_id"
+            return from_sql, "", params
+        
+        search_pattern = f"%{search_text}%"
+        condition_sql = """(
+            s.name LIKE ? COLLATE NOCASE OR 
+            s.description LIKE ? COLLATE NOCASE OR
+            EXISTS (SELECT 1 FROM spell_tags st WHERE st.spell_id = s.id AND st.tag LIKE ? COLLATE NOCASE)
+        )"""
+        return "", condition_sql, [search_pattern, search_pattern, search_pattern]
     
     def _create_content_tables(self, cursor):
         """Create tables for lineages, feats, backgrounds, and classes."""
@@ -481,6 +2081,79 @@ class SpellDatabase:
         """)
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_subclasses_name ON subclasses(name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_subclasses_class_id ON subclasses(class_id)")
+        
+        # Per-level feature tables, derived from class_features_json, features_json
+        # and trackable_features_json on every class/subclass write
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS class_features (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                class_id INTEGER NOT NULL,
+                level INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                title TEXT NOT NULL DEFAULT '',
+                description TEXT DEFAULT '',
+                is_subclass_feature INTEGER NOT NULL DEFAULT 0,
+                subclass_name TEXT DEFAULT '',
+                tables_json TEXT DEFAULT '[]',
+                FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_class_features_level
+            ON class_features(class_id, level, position)
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS subclass_features (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                subclass_id INTEGER NOT NULL,
+                class_id INTEGER NOT NULL,
+                level INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                title TEXT NOT NULL DEFAULT '',
+                description TEXT DEFAULT '',
+                tables_json TEXT DEFAULT '[]',
+                FOREIGN KEY (subclass_id) REFERENCES subclasses(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_subclass_features_level
+            ON subclass_features(subclass_id, level, position)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_subclass_features_class_level
+            ON subclass_features(class_id, level)
+        """)
+        
+        # level is the first level the feature has uses at (lowest level_scaling key, else 1);
+        # subclass_id is NULL for the class's own trackable features
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS trackable_features (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                class_id INTEGER NOT NULL,
+                subclass_id INTEGER,
+                level INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                title TEXT NOT NULL DEFAULT '',
+                description TEXT DEFAULT '',
+                tracked_value TEXT DEFAULT '',
+                has_uses INTEGER NOT NULL DEFAULT 0,
+                max_uses INTEGER NOT NULL DEFAULT 0,
+                current_uses INTEGER NOT NULL DEFAULT 0,
+                recharge TEXT DEFAULT 'long_rest',
+                level_scaling_json TEXT DEFAULT '{}',
+                FOREIGN KEY (class_id) REFERENCES classes(id) ON DELETE CASCADE,
+                FOREIGN KEY (subclass_id) REFERENCES subclasses(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_trackable_features_class_level
+            ON trackable_features(class_id, subclass_id, level)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_trackable_features_subclass_level
+            ON trackable_features(subclass_id, level)
+        """)
     
     def _migrate_json_to_database(self, cursor):
         """Migrate data from JSON files to database tables."""
@@ -512,7 +2185,7 @@ class SpellDatabase:
                         lin.get('creature_type', 'Humanoid'),
                         lin.get('size', 'Medium'),
                         lin.get('speed', 30),
-                        json.dumps(lin.get('traits', [])),
+                        encode_json_column(lin.get('traits', [])),
                         lin.get('source', ''),
                         1 if lin.get('is_official', True) else 0,
                         1 if lin.get('is_custom', False) else 0,
@@ -538,11 +2211,11 @@ class SpellDatabase:
                         feat.get('name', ''),
                         feat.get('type', ''),
                         1 if feat.get('is_spellcasting', False) else 0,
-                        json.dumps(feat.get('spell_lists', [])),
-                        json.dumps(feat.get('spells_num', {})),
+                        encode_json_column(feat.get('spell_lists', [])),
+                        encode_json_column(feat.get('spells_num', {})),
                         1 if feat.get('has_prereq', False) else 0,
                         feat.get('prereq', ''),
-                        json.dumps(feat.get('set_spells', [])),
+                        encode_json_column(feat.get('set_spells', [])),
                         feat.get('description', ''),
                         feat.get('source', ''),
                         1 if feat.get('is_official', True) else 0,
@@ -570,12 +2243,12 @@ class SpellDatabase:
                         bg.get('source', ''),
                         1 if bg.get('is_legacy', False) else 0,
                         bg.get('description', ''),
-                        json.dumps(bg.get('skills', [])),
-                        json.dumps(bg.get('other_proficiencies', [])),
-                        json.dumps(bg.get('ability_scores', [])),
-                        json.dumps(bg.get('feats', [])),
+                        encode_json_column(bg.get('skills', [])),
+                        encode_json_column(bg.get('other_proficiencies', [])),
+                        encode_json_column(bg.get('ability_scores', [])),
+                        encode_json_column(bg.get('feats', [])),
                         bg.get('equipment', ''),
-                        json.dumps(bg.get('features', [])),
+                        encode_json_column(bg.get('features', [])),
                         1 if bg.get('is_official', True) else 0,
                         1 if bg.get('is_custom', False) else 0
                     ))
@@ -610,20 +2283,20 @@ class SpellDatabase:
                         class_name,
                         cls.get('hit_die', 'd8'),
                         cls.get('primary_ability', ''),
-                        json.dumps(cls.get('saving_throw_proficiencies', [])),
-                        json.dumps(cls.get('armor_proficiencies', [])),
-                        json.dumps(cls.get('weapon_proficiencies', [])),
-                        json.dumps(cls.get('tool_proficiencies', [])),
-                        json.dumps(cls.get('skill_proficiency_options', [])),
+                        encode_json_column(cls.get('saving_throw_proficiencies', [])),
+                        encode_json_column(cls.get('armor_proficiencies', [])),
+                        encode_json_column(cls.get('weapon_proficiencies', [])),
+                        encode_json_column(cls.get('tool_proficiencies', [])),
+                        encode_json_column(cls.get('skill_proficiency_options', [])),
                         cls.get('skill_proficiency_choices', 2),
-                        json.dumps(cls.get('starting_equipment_options', [])),
-                        json.dumps(cls.get('levels', {})),
-                        json.dumps(spellcasting_info) if spellcasting_info else 'null',
+                        encode_json_column(cls.get('starting_equipment_options', [])),
+                        encode_json_column(cls.get('levels', {})),
+                        encode_json_column(spellcasting_info) if spellcasting_info else 'null',
                         cls.get('subclass_name', ''),
                         cls.get('subclass_level', 3),
-                        json.dumps(cls.get('class_table_columns', [])),
-                        json.dumps(cls.get('trackable_features', [])),
-                        json.dumps(cls.get('class_spells', [])),
+                        encode_json_column(cls.get('class_table_columns', [])),
+                        encode_json_column(cls.get('trackable_features', [])),
+                        encode_json_column(cls.get('class_spells', [])),
                         cls.get('unarmored_defense', ''),
                         cls.get('source', ''),
                         1 if cls.get('is_official', True) else 0,
@@ -655,7 +2328,7 @@ class SpellDatabase:
                                 subclass.get('name', ''),
                                 class_id,
                                 subclass.get('description', ''),
-                                json.dumps(features_data),
+                                encode_json_column(features_data),
                                 subclass.get('source', ''),
                                 1 if subclass.get('is_official', True) else 0,
                                 1 if subclass.get('is_custom', False) else 0,
@@ -700,12 +2373,12 @@ class SpellDatabase:
                             spellcasting_json = ?
                         WHERE name = ? COLLATE NOCASE
                     """, (
-                        json.dumps(cls.get('levels', {})),
-                        json.dumps(cls.get('saving_throw_proficiencies', [])),
-                        json.dumps(cls.get('skill_proficiency_options', [])),
+                        encode_json_column(cls.get('levels', {})),
+                        encode_json_column(cls.get('saving_throw_proficiencies', [])),
+                        encode_json_column(cls.get('skill_proficiency_options', [])),
                         cls.get('skill_proficiency_choices', 2),
-                        json.dumps(cls.get('starting_equipment_options', [])),
-                        json.dumps(spellcasting_info) if spellcasting_info else 'null',
+                        encode_json_column(cls.get('starting_equipment_options', [])),
+                        encode_json_column(spellcasting_info) if spellcasting_info else 'null',
                         class_name
                     ))
                     if cursor.rowcount > 0:
@@ -755,9 +2428,9 @@ class SpellDatabase:
                             unarmored_defense = ?
                         WHERE name = ? COLLATE NOCASE
                     """, (
-                        json.dumps(cls.get('class_table_columns', [])),
-                        json.dumps(cls.get('trackable_features', [])),
-                        json.dumps(cls.get('class_spells', [])),
+                        encode_json_column(cls.get('class_table_columns', [])),
+                        encode_json_column(cls.get('trackable_features', [])),
+                        encode_json_column(cls.get('class_spells', [])),
                         cls.get('unarmored_defense', ''),
                         class_name
                     ))
@@ -790,7 +2463,7 @@ class SpellDatabase:
                             class_features_json = ?
                         WHERE name = ? COLLATE NOCASE
                     """, (
-                        json.dumps(cls.get('levels', {})),
+                        encode_json_column(cls.get('levels', {})),
                         class_name
                     ))
                     if cursor.rowcount > 0:
@@ -874,81 +2547,13 @@ class SpellDatabase:
         spells = get_all_spells()
         count = self.bulk_insert_spells(spells)
         
-        # Also populate stat blocks
-        self._populate_initial_stat_blocks()
+        # Also populate stat blocks and record the seed baseline
+        self.sync_seed_data()
         
         return count
     
-    def _populate_initial_stat_blocks(self):
-        """Populate stat blocks for summoning spells."""
-        from tools.stat_block_data import get_all_stat_blocks
-        
-        stat_blocks = get_all_stat_blocks()
-        
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            for sb in stat_blocks:
-                # Get the spell_id from the spell_name
-                spell_name = sb.get('spell_name')
-                if not spell_name:
-                    continue
-                    
-                cursor.execute(
-                    "SELECT id FROM spells WHERE name = ? COLLATE NOCASE",
-                    (spell_name,)
-                )
-                row = cursor.fetchone()
-                if not row:
-                    print(f"Warning: Spell '{spell_name}' not found for stat block '{sb.get('name')}'")
-                    continue
-                
-                spell_id = row['id']
-                
-                # Check if stat block already exists
-                cursor.execute(
-                    "SELECT id FROM stat_blocks WHERE spell_id = ? AND name = ?",
-                    (spell_id, sb.get('name'))
-                )
-                if cursor.fetchone():
-                    continue  # Skip duplicates
-                
-                # Insert stat block
-                cursor.execute("""
-                    INSERT INTO stat_blocks (
-                        spell_id, name, size, creature_type, creature_subtype, alignment,
-                        armor_class, hit_points, speed, abilities_json,
-                        damage_resistances, damage_immunities, condition_immunities,
-                        senses, languages, challenge_rating,
-                        traits_json, actions_json, bonus_actions_json,
-                        reactions_json, legendary_actions_json
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    spell_id,
-                    sb.get('name', ''),
-                    sb.get('size', 'Medium'),
-                    sb.get('creature_type', ''),
-                    sb.get('creature_subtype', ''),
-                    sb.get('alignment', 'Neutral'),
-                    sb.get('armor_class', ''),
-                    sb.get('hit_points', ''),
-                    sb.get('speed', ''),
-                    sb.get('abilities_json', '{}'),
-                    sb.get('damage_resistances', ''),
-                    sb.get('damage_immunities', ''),
-                    sb.get('condition_immunities', ''),
-                    sb.get('senses', ''),
-                    sb.get('languages', ''),
-                    sb.get('challenge_rating', ''),
-                    sb.get('traits_json', '[]'),
-                    sb.get('actions_json', '[]'),
-                    sb.get('bonus_actions_json', '[]'),
-                    sb.get('reactions_json', '[]'),
-                    sb.get('legendary_actions_json', '[]')
-                ))
-    
-    def get_schema_version(self) -> int:
-        """Get current schema version."""
+    def get_schema_version(self) -> int:
+        """Get current schema version."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT version FROM schema_version LIMIT 1")
@@ -972,10 +2577,11 @@ class SpellDatabase:
             
             # Insert main spell data
             cursor.execute("""
-                INSERT INTO spells (
+                INSERT INTO main.spells (
                     name, level, casting_time, ritual, range_value, 
-                    components, duration, concentration, description, source, original_name, is_legacy
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    components, duration, concentration, description, source, original_name, is_legacy,
+                    range_feet, has_v, has_s, has_m, has_costly_component, duration_seconds, source_key
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 spell_data['name'],
                 spell_data['level'],
@@ -988,7 +2594,8 @@ class SpellDatabase:
                 spell_data.get('description', ''),
                 spell_data.get('source', ''),
                 spell_data.get('original_name', ''),
-                1 if spell_data.get('is_legacy', False) else 0
+                1 if spell_data.get('is_legacy', False) else 0,
+                *self._derived_spell_values(spell_data)
             ))
             
             spell_id = cursor.lastrowid
@@ -998,7 +2605,7 @@ class SpellDatabase:
             classes = spell_data.get('classes', [])
             if classes:
                 cursor.executemany(
-                    "INSERT INTO spell_classes (spell_id, class_name) VALUES (?, ?)",
+                    "INSERT INTO main.spell_classes (spell_id, class_name) VALUES (?, ?)",
                     [(spell_id, cls) for cls in classes]
                 )
             
@@ -1007,10 +2614,11 @@ class SpellDatabase:
             if tags:
                 normalized_tags = [self.normalize_tag(tag) for tag in tags]
                 cursor.executemany(
-                    "INSERT INTO spell_tags (spell_id, tag) VALUES (?, ?)",
+                    "INSERT INTO main.spell_tags (spell_id, tag) VALUES (?, ?)",
                     [(spell_id, tag) for tag in normalized_tags]
                 )
             
+            self._refresh_legacy_twins(cursor, [spell_data['name'], spell_data.get('original_name', '')])
             return spell_id
     
     def update_spell(self, spell_id: int, spell_data: dict) -> bool:
@@ -1027,13 +2635,22 @@ class SpellDatabase:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            self._materialize_spells(cursor, [spell_id])
+            
+            # Names whose legacy twins the update can change: old and new name, original_name
+            cursor.execute("SELECT name, original_name FROM main.spells WHERE id = ?", (spell_id,))
+            previous = cursor.fetchone()
+            twin_names = [spell_data['name'], *(previous or ())]
+            
             # Update main spell data (including is_modified and is_legacy)
             cursor.execute("""
-                UPDATE spells SET
+                UPDATE main.spells SET
                     name = ?, level = ?, casting_time = ?, ritual = ?,
                     range_value = ?, components = ?, duration = ?,
                     concentration = ?, description = ?, source = ?,
-                    is_modified = ?, is_legacy = ?
+                    is_modified = ?, is_legacy = ?,
+                    range_feet = ?, has_v = ?, has_s = ?, has_m = ?,
+                    has_costly_component = ?, duration_seconds = ?, source_key = ?
                 WHERE id = ?
             """, (
                 spell_data['name'],
@@ -1048,43 +2665,159 @@ class SpellDatabase:
                 spell_data.get('source', ''),
                 1 if spell_data.get('is_modified', False) else 0,
                 1 if spell_data.get('is_legacy', False) else 0,
+                *self._derived_spell_values(spell_data),
                 spell_id
             ))
+            updated = cursor.rowcount > 0
             
-            # Update classes - delete and re-insert
-            cursor.execute("DELETE FROM spell_classes WHERE spell_id = ?", (spell_id,))
-            classes = spell_data.get('classes', [])
-            if classes:
-                cursor.executemany(
-                    "INSERT INTO spell_classes (spell_id, class_name) VALUES (?, ?)",
-                    [(spell_id, cls) for cls in classes]
-                )
+            # Update classes and tags - apply only what changed
+            self._sync_spell_links(cursor, 'spell_classes', 'class_name', spell_id,
+                                   spell_data.get('classes', []))
+            self._sync_spell_links(cursor, 'spell_tags', 'tag', spell_id,
+                                   [self.normalize_tag(tag) for tag in spell_data.get('tags', [])])
             
-            # Update tags - delete and re-insert (normalized)
-            cursor.execute("DELETE FROM spell_tags WHERE spell_id = ?", (spell_id,))
-            tags = spell_data.get('tags', [])
-            if tags:
-                normalized_tags = [self.normalize_tag(tag) for tag in tags]
-                cursor.executemany(
-                    "INSERT INTO spell_tags (spell_id, tag) VALUES (?, ?)",
-                    [(spell_id, tag) for tag in normalized_tags]
-                )
-            
-            return cursor.rowcount > 0
+            if updated:
+                self._refresh_legacy_twins(cursor, twin_names)
+            return updated
     
     def delete_spell(self, spell_id: int) -> bool:
         """Delete a spell by ID."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM spells WHERE id = ?", (spell_id,))
-            return cursor.rowcount > 0
+            names = self._delete_spell_rows(cursor, "id = ?", [spell_id])
+            if names:
+                self._refresh_legacy_twins(cursor, names)
+            return bool(names)
     
     def delete_spell_by_name(self, name: str) -> bool:
         """Delete a spell by name (case-insensitive)."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM spells WHERE name = ? COLLATE NOCASE", (name,))
-            return cursor.rowcount > 0
+            names = self._delete_spell_rows(cursor, "name = ? COLLATE NOCASE", [name])
+            if names:
+                self._refresh_legacy_twins(cursor, names)
+            return bool(names)
+    
+    def restore_official_spell(self, spell_id: int, spell_data: dict) -> bool:
+        """
+        Undo the user's changes to an official spell.
+        
+        On an overlay database the user's copy (spell row, classes, tags and
+        stat blocks) and any tombstone are dropped, so the official row shows
+        through again and later official releases reach it. A standalone
+        database has spell_data written over the row instead. Nothing is
+        written when the spell has no changes to undo.
+        
+        Args:
+            spell_id: The spell's database ID
+            spell_data: The bundled spell data (same as update_spell), used by standalone databases
+        
+        Returns:
+            True if anything was changed
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            if self.is_overlay:
+                cursor.execute("SELECT name FROM official.spells WHERE id = ?", (spell_id,))
+                official = cursor.fetchone()
+                if official:
+                    cursor.execute("SELECT name, original_name FROM main.spells WHERE id = ?", (spell_id,))
+                    previous = cursor.fetchone()
+                    for table in self.OVERLAY_TABLES:
+                        owner = "id" if table == 'spells' else "spell_id"
+                        cursor.execute(f"DELETE FROM main.{table} WHERE {owner} = ?", (spell_id,))
+                    cursor.execute("DELETE FROM main.spell_tombstones WHERE spell_id = ?", (spell_id,))
+                    if previous is None and cursor.rowcount == 0:
+                        return False
+                    self._refresh_legacy_twins(cursor, [official[0], *(previous or ())])
+                    return True
+            
+            cursor.execute("SELECT is_modified FROM spells WHERE id = ?", (spell_id,))
+            row = cursor.fetchone()
+            if not row or not row[0]:
+                return False
+            return self.update_spell(spell_id, spell_data)
+    
+    def _sync_spell_links(self, cursor, table: str, column: str, spell_id: int, values: List[str]):
+        """
+        Make a spell's spell_classes/spell_tags rows match values.
+        
+        Only the difference between the stored and wanted sets is written,
+        so unchanged links (and their search index triggers) are left alone.
+        """
+        cursor.execute(f"SELECT {column} FROM {table} WHERE spell_id = ?", (spell_id,))
+        current = {row[0] for row in cursor.fetchall()}
+        wanted = list(dict.fromkeys(values))  # De-duplicate, keep order
+        
+        to_remove = current.difference(wanted)
+        if to_remove:
+            cursor.executemany(
+                f"DELETE FROM main.{table} WHERE spell_id = ? AND {column} = ?",
+                [(spell_id, value) for value in to_remove]
+            )
+        
+        to_add = [value for value in wanted if value not in current]
+        if to_add:
+            cursor.executemany(
+                f"INSERT INTO main.{table} (spell_id, {column}) VALUES (?, ?)",
+                [(spell_id, value) for value in to_add]
+            )
+    
+    def _stage_spell_ids(self, cursor, spell_names: List[str]) -> int:
+        """
+        Resolve spell names (case-insensitive) into the temp.spell_id_batch table.
+        
+        The batch table lets set-based statements join against any number of
+        spells without one query per name. Unknown names are skipped.
+        
+        Returns:
+            Number of spells staged
+        """
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS spell_name_batch (name TEXT NOT NULL)")
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS spell_id_batch (spell_id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp.spell_name_batch")
+        cursor.execute("DELETE FROM temp.spell_id_batch")
+        cursor.executemany(
+            "INSERT INTO temp.spell_name_batch (name) VALUES (?)",
+            [(name,) for name in spell_names]
+        )
+        cursor.execute("""
+            INSERT OR IGNORE INTO temp.spell_id_batch (spell_id)
+            SELECT s.id FROM temp.spell_name_batch b
+            INNER JOIN spells s ON s.name = b.name COLLATE NOCASE
+        """)
+        staged = cursor.rowcount
+        cursor.execute("DELETE FROM temp.spell_name_batch")
+        self._materialize_spells(cursor, staged=True)
+        return staged
+    
+    def _add_links_to_staged_spells(self, cursor, table: str, column: str, values: List[str]) -> int:
+        """Link each value to every staged spell that lacks it (case-insensitive). Returns rows added."""
+        added = 0
+        for value in dict.fromkeys(values):
+            cursor.execute(f"""
+                INSERT INTO main.{table} (spell_id, {column})
+                SELECT b.spell_id, ? FROM temp.spell_id_batch b
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {table} t
+                    WHERE t.spell_id = b.spell_id AND t.{column} = ? COLLATE NOCASE
+                )
+            """, (value, value))
+            added += cursor.rowcount
+        return added
+    
+    def _remove_links_from_staged_spells(self, cursor, table: str, column: str, values: List[str]) -> int:
+        """Unlink each value from every staged spell (case-insensitive). Returns rows removed."""
+        removed = 0
+        for value in dict.fromkeys(values):
+            cursor.execute(f"""
+                DELETE FROM main.{table}
+                WHERE {column} = ? COLLATE NOCASE
+                AND spell_id IN (SELECT spell_id FROM temp.spell_id_batch)
+            """, (value,))
+            removed += cursor.rowcount
+        return removed
     
     def add_class_to_spells(self, class_name: str, spell_names: List[str]) -> int:
         """
@@ -1101,31 +2834,56 @@ class SpellDatabase:
         if not spell_names:
             return 0
         
-        updated_count = 0
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            self._stage_spell_ids(cursor, spell_names)
+            added = self._add_links_to_staged_spells(cursor, 'spell_classes', 'class_name', [class_name])
+            return added
+    
+    def bulk_edit_spells(self, spell_names: List[str],
+                         add_tags: Optional[List[str]] = None,
+                         remove_tags: Optional[List[str]] = None,
+                         add_classes: Optional[List[str]] = None,
+                         remove_classes: Optional[List[str]] = None) -> int:
+        """
+        Add/remove tags and classes across many spells in one transaction.
+        
+        Like add_class_to_spells, this does NOT mark the spells as modified.
+        Removals are applied before additions.
+        
+        Args:
+            spell_names: Spells to edit (case-insensitive; unknown names are skipped)
+            add_tags: Tags to add (normalized)
+            remove_tags: Tags to remove (normalized)
+            add_classes: Class names to add
+            remove_classes: Class names to remove
+        
+        Returns:
+            Number of class/tag links added or removed
+        """
+        if not spell_names:
+            return 0
+        
+        changed = 0
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if not self._stage_spell_ids(cursor, spell_names):
+                return 0
             
-            for spell_name in spell_names:
-                # Get spell ID
-                cursor.execute("SELECT id FROM spells WHERE name = ? COLLATE NOCASE", (spell_name,))
-                row = cursor.fetchone()
-                
-                if row:
-                    spell_id = row['id']
-                    # Check if class already exists for this spell
-                    cursor.execute(
-                        "SELECT 1 FROM spell_classes WHERE spell_id = ? AND class_name = ?",
-                        (spell_id, class_name)
-                    )
-                    if not cursor.fetchone():
-                        # Add the class to the spell
-                        cursor.execute(
-                            "INSERT INTO spell_classes (spell_id, class_name) VALUES (?, ?)",
-                            (spell_id, class_name)
-                        )
-                        updated_count += 1
+            if remove_tags:
+                changed += self._remove_links_from_staged_spells(
+                    cursor, 'spell_tags', 'tag', [self.normalize_tag(t) for t in remove_tags])
+            if remove_classes:
+                changed += self._remove_links_from_staged_spells(
+                    cursor, 'spell_classes', 'class_name', remove_classes)
+            if add_tags:
+                changed += self._add_links_to_staged_spells(
+                    cursor, 'spell_tags', 'tag', [self.normalize_tag(t) for t in add_tags])
+            if add_classes:
+                changed += self._add_links_to_staged_spells(
+                    cursor, 'spell_classes', 'class_name', add_classes)
         
-        return updated_count
+        return changed
     
     def remove_class_from_all_spells(self, class_name: str) -> int:
         """
@@ -1140,7 +2898,9 @@ class SpellDatabase:
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM spell_classes WHERE class_name = ?", (class_name,))
+            cursor.execute("SELECT DISTINCT spell_id FROM spell_classes WHERE class_name = ?", (class_name,))
+            self._materialize_spells(cursor, [row[0] for row in cursor.fetchall()])
+            cursor.execute("DELETE FROM main.spell_classes WHERE class_name = ?", (class_name,))
             return cursor.rowcount
     
     def get_spell_by_id(self, spell_id: int) -> Optional[dict]:
@@ -1176,11 +2936,11 @@ class SpellDatabase:
             return row['id'] if row else None
     
     def get_all_spells(self) -> List[dict]:
-        """Get all spells from the database."""
+        """Get all spells from enabled sources."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute("SELECT * FROM spells ORDER BY level, name")
+            cursor.execute(f"SELECT * FROM spells WHERE {self._enabled_source_sql('source')} ORDER BY level, name")
             rows = cursor.fetchall()
             
             # Use batch query optimization to avoid N+1 queries
@@ -1200,53 +2960,86 @@ class SpellDatabase:
             cursor.execute("SELECT COUNT(*) as count FROM spells")
             return cursor.fetchone()['count']
     
-    def get_all_sources(self) -> List[str]:
-        """Get all unique sources."""
+    @property
+    def spell_metadata_version(self) -> int:
+        """Version of the distinct-value metadata; unchanged means dropdowns are still current."""
+        return self.spell_generation
+    
+    def get_spell_metadata(self) -> dict:
+        """
+        Get the distinct values used to populate spell filter dropdowns.
+        
+        Computed in one pass and cached until the next spell write.
+        
+        Returns:
+            Dict with sorted lists under 'sources', 'casting_times', 'durations',
+            'range_values', 'ranges_for_display', 'tags' and 'classes'
+        """
+        generation = self.spell_generation
+        if self._metadata_cache is None or self._metadata_cache[0] != generation:
+            self._metadata_cache = (generation, self._compute_spell_metadata())
+        return {key: list(values) for key, values in self._metadata_cache[1].items()}
+    
+    def _compute_spell_metadata(self) -> dict:
+        """Collect all distinct filter values of enabled spells with a single UNION ALL query."""
+        values = {'source': [], 'casting_time': [], 'duration': [],
+                  'range_value': [], 'tag': [], 'class': []}
+        enabled = self._enabled_source_sql('source')
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT DISTINCT source FROM spells 
-                WHERE source IS NOT NULL AND source != '' 
-                ORDER BY source
+            cursor.execute(f"""
+                SELECT DISTINCT 'source', source FROM spells WHERE source IS NOT NULL AND source != '' AND {enabled}
+                UNION ALL
+                SELECT DISTINCT 'casting_time', casting_time FROM spells WHERE casting_time IS NOT NULL AND casting_time != '' AND {enabled}
+                UNION ALL
+                SELECT DISTINCT 'duration', duration FROM spells WHERE duration IS NOT NULL AND duration != '' AND {enabled}
+                UNION ALL
+                SELECT DISTINCT 'range_value', range_value FROM spells WHERE {enabled}
+                UNION ALL
+                SELECT DISTINCT 'tag', tag FROM spell_tags WHERE spell_id IN (SELECT id FROM spells WHERE {enabled})
+                UNION ALL
+                SELECT DISTINCT 'class', class_name FROM spell_classes WHERE spell_id IN (SELECT id FROM spells WHERE {enabled})
             """)
-            return [row['source'] for row in cursor.fetchall()]
+            for kind, value in cursor.fetchall():
+                values[kind].append(value)
+        
+        range_values = sorted(values['range_value'])
+        return {
+            'sources': sorted(values['source']),
+            'casting_times': sorted(values['casting_time']),
+            'durations': sorted(values['duration']),
+            'range_values': range_values,
+            'ranges_for_display': self._ranges_for_display(range_values),
+            'tags': sorted(values['tag']),
+            'classes': sorted(values['class']),
+        }
+    
+    def get_all_sources(self) -> List[str]:
+        """Get all unique sources."""
+        return self.get_spell_metadata()['sources']
     
     def get_all_casting_times(self) -> List[str]:
         """Get all unique casting times."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT DISTINCT casting_time FROM spells 
-                WHERE casting_time IS NOT NULL AND casting_time != '' 
-                ORDER BY casting_time
-            """)
-            return [row['casting_time'] for row in cursor.fetchall()]
+        return self.get_spell_metadata()['casting_times']
     
     def get_all_durations(self) -> List[str]:
         """Get all unique durations."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT DISTINCT duration FROM spells 
-                WHERE duration IS NOT NULL AND duration != '' 
-                ORDER BY duration
-            """)
-            return [row['duration'] for row in cursor.fetchall()]
+        return self.get_spell_metadata()['durations']
     
     def get_all_range_values(self) -> List[int]:
         """Get all unique range_value integers, sorted for display."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT range_value FROM spells ORDER BY range_value")
-            return [row['range_value'] for row in cursor.fetchall()]
+        return self.get_spell_metadata()['range_values']
     
     def get_all_ranges_for_display(self) -> List[tuple]:
         """Get all unique range values with display labels, ordered appropriately.
         Returns list of (value, display_label) tuples.
         Order: Self (0), Touch (3), numeric feet ascending, Special (2), Sight (1), miles (negative, ascending by abs)
         """
-        raw_values = self.get_all_range_values()
-        
+        return self.get_spell_metadata()['ranges_for_display']
+    
+    @staticmethod
+    def _ranges_for_display(raw_values: List[int]) -> List[tuple]:
+        """Order range values and attach display labels (see get_all_ranges_for_display)."""
         results = []
         feet_values = []
         mile_values = []
@@ -1287,17 +3080,11 @@ class SpellDatabase:
     
     def get_all_tags(self) -> List[str]:
         """Get all unique tags."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT tag FROM spell_tags ORDER BY tag")
-            return [row['tag'] for row in cursor.fetchall()]
+        return self.get_spell_metadata()['tags']
     
     def get_all_classes(self) -> List[str]:
         """Get all unique class names used in spells."""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT class_name FROM spell_classes ORDER BY class_name")
-            return [row['class_name'] for row in cursor.fetchall()]
+        return self.get_spell_metadata()['classes']
     
     def _row_to_spell_dict(self, conn: sqlite3.Connection, row: sqlite3.Row) -> dict:
         """Convert a database row to a spell dictionary.
@@ -1405,6 +3192,156 @@ class SpellDatabase:
         
         return result
     
+    def _build_spell_filter_query(self, conn: sqlite3.Connection, columns: str,
+                                  search_text: str = "",
+                                  level: int = -1,
+                                  class_name: Optional[str] = None,
+                                  ritual: Optional[bool] = None,
+                                  concentration: Optional[bool] = None,
+                                  min_range: int = 0,
+                                  source: Optional[str] = None,
+                                  sources: Optional[List[str]] = None,
+                                  sources_mode: str = "include",
+                                  tags: Optional[List[str]] = None,
+                                  tags_mode: str = "has_all",
+                                  casting_time: Optional[str] = None,
+                                  duration: Optional[str] = None,
+                                  has_verbal: Optional[bool] = None,
+                                  has_somatic: Optional[bool] = None,
+                                  has_material: Optional[bool] = None,
+                                  costly_component: Optional[bool] = None,
+                                  legacy_filter: str = "show_all",
+                                  visible_classes: Optional[List[str]] = None,
+                                  after: Optional[Tuple[int, str]] = None) -> Tuple[str, list, bool]:
+        """
+        Build the SELECT ... WHERE part of a filtered spell query.
+        
+        Args:
+            columns: Select list over spells aliased as s (e.g. "s.*", "s.id")
+            after: Keyset cursor; only spells ordered after this (level, name) match
+            (remaining arguments as documented on search_spells)
+        
+        Returns:
+            (query without ORDER BY, params, whether fts.rank is selected)
+        """
+        query = f"SELECT DISTINCT {columns} FROM spells s"
+        # Spells from disabled content sources never match
+        conditions = [self._enabled_source_sql("s.source")]
+        params = []
+        has_rank = False
+        
+        # Full-text search (joined first so its parameter comes first)
+        if search_text:
+            from_sql, condition_sql, search_params = self._spell_text_search(conn, search_text)
+            if from_sql:
+                query = f"SELECT DISTINCT {columns}, fts.rank FROM {from_sql}"
+                has_rank = True
+            else:
+                conditions.append(condition_sql)
+            params.extend(search_params)
+        
+        # Join for class filtering
+        if class_name:
+            query += " INNER JOIN spell_classes sc ON s.id = sc.spell_id"
+            conditions.append("sc.class_name = ? COLLATE NOCASE")
+            params.append(class_name)
+        
+        # Tag filtering based on mode
+        if tags:
+            if tags_mode == "has_all":
+                # Must have ALL specified tags (use JOINs)
+                for i, tag in enumerate(tags):
+                    alias = f"st{i}"
+                    query += f" INNER JOIN spell_tags {alias} ON s.id = {alias}.spell_id"
+                    conditions.append(f"{alias}.tag = ? COLLATE NOCASE")
+                    params.append(tag)
+            elif tags_mode == "has_any":
+                # Must have at least ONE specified tag (use EXISTS with OR)
+                tag_conditions = " OR ".join(["st.tag = ? COLLATE NOCASE" for _ in tags])
+                conditions.append(f"EXISTS (SELECT 1 FROM spell_tags st WHERE st.spell_id = s.id AND ({tag_conditions}))")
+                params.extend(tags)
+            elif tags_mode == "has_none":
+                # Must NOT have any of the specified tags
+                tag_conditions = " OR ".join(["st.tag = ? COLLATE NOCASE" for _ in tags])
+                conditions.append(f"NOT EXISTS (SELECT 1 FROM spell_tags st WHERE st.spell_id = s.id AND ({tag_conditions}))")
+                params.extend(tags)
+        
+        if level >= 0:
+            conditions.append("s.level = ?")
+            params.append(level)
+        
+        if ritual is not None:
+            conditions.append("s.ritual = ?")
+            params.append(1 if ritual else 0)
+        
+        if concentration is not None:
+            conditions.append("s.concentration = ?")
+            params.append(1 if concentration else 0)
+        
+        if min_range != 0:
+            from spell import range_value_to_feet
+            conditions.append("s.range_feet >= ?")
+            params.append(range_value_to_feet(min_range))
+        
+        if source:
+            conditions.append("s.source = ? COLLATE NOCASE")
+            params.append(source)
+        
+        # Multi-select source filter: substring match on the lowercased source
+        if sources:
+            source_conditions = " OR ".join(["instr(s.source_key, ?) > 0" for _ in sources])
+            if sources_mode == "exclude":
+                conditions.append(f"NOT ({source_conditions})")
+            else:
+                conditions.append(f"({source_conditions})")
+            params.extend(src.lower() for src in sources)
+        
+        if casting_time:
+            conditions.append("s.casting_time = ? COLLATE NOCASE")
+            params.append(casting_time)
+        
+        if duration:
+            conditions.append("s.duration = ? COLLATE NOCASE")
+            params.append(duration)
+        
+        # Component filters use the precomputed flag columns
+        for column, wanted in (("has_v", has_verbal), ("has_s", has_somatic),
+                               ("has_m", has_material), ("has_costly_component", costly_component)):
+            if wanted is not None:
+                conditions.append(f"s.{column} = ?")
+                params.append(1 if wanted else 0)
+        
+        if legacy_filter == "no_legacy":
+            conditions.append("s.is_legacy = 0")
+        elif legacy_filter == "legacy_only":
+            conditions.append("s.is_legacy = 1")
+        elif legacy_filter == "show_unupdated":
+            # Non-legacy spells + legacy spells without a non-legacy version
+            conditions.append("(s.is_legacy = 0 OR s.has_non_legacy_twin = 0)")
+        
+        # Hide spells whose classes are all missing from the system
+        if visible_classes is not None:
+            if not visible_classes:
+                conditions.append("0")
+            else:
+                placeholders = ",".join("?" * len(visible_classes))
+                conditions.append(
+                    "EXISTS (SELECT 1 FROM spell_classes vc WHERE vc.spell_id = s.id "
+                    f"AND vc.class_name COLLATE NOCASE IN ({placeholders}))"
+                )
+                params.extend(visible_classes)
+        
+        # Keyset pagination on the (level, name) list ordering
+        if after is not None:
+            after_level, after_name = after
+            # Row-value form lets SQLite seek idx_spells_level_name (name is COLLATE NOCASE)
+            conditions.append("(s.level, s.name) > (?, ?)")
+            params.extend([after_level, after_name])
+        
+        query += " WHERE " + " AND ".join(conditions)
+        
+        return query, params, has_rank
+    
     def search_spells(self, 
                       search_text: str = "",
                       level: int = -1,
@@ -1419,7 +3356,13 @@ class SpellDatabase:
                       duration: Optional[str] = None,
                       has_verbal: Optional[bool] = None,
                       has_somatic: Optional[bool] = None,
-                      has_material: Optional[bool] = None) -> List[dict]:
+                      has_material: Optional[bool] = None,
+                      rank_by_relevance: bool = False,
+                      sources: Optional[List[str]] = None,
+                      sources_mode: str = "include",
+                      costly_component: Optional[bool] = None,
+                      legacy_filter: str = "show_all",
+                      visible_classes: Optional[List[str]] = None) -> List[dict]:
         """
         Search spells with various filters using optimized SQL queries.
         
@@ -1429,7 +3372,7 @@ class SpellDatabase:
             class_name: Filter by class
             ritual: Filter by ritual (None for any)
             concentration: Filter by concentration (None for any)
-            min_range: Minimum range (0 for no filter, sight/touch always pass)
+            min_range: Minimum range in range encoding (0 for no filter), compared in feet
             source: Filter by source (exact match)
             tags: List of tags to filter by
             tags_mode: "has_all" (must have ALL), "has_any" (must have at least one), "has_none" (must have none)
@@ -1438,6 +3381,12 @@ class SpellDatabase:
             has_verbal: Filter by verbal component
             has_somatic: Filter by somatic component
             has_material: Filter by material component
+            rank_by_relevance: Order text matches by bm25 relevance instead of (level, name)
+            sources: Sources to match as case-insensitive substrings of the spell source
+            sources_mode: "include" (keep matching spells) or "exclude" (drop them)
+            costly_component: Filter by material component with a coin cost
+            legacy_filter: "show_all", "show_unupdated", "no_legacy" or "legacy_only"
+            visible_classes: Only keep spells available to at least one of these classes
         
         Returns:
             List of matching spell dictionaries
@@ -1445,99 +3394,22 @@ class SpellDatabase:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            query = "SELECT DISTINCT s.* FROM spells s"
-            conditions = []
-            params = []
-            
-            # Join for class filtering
-            if class_name:
-                query += " INNER JOIN spell_classes sc ON s.id = sc.spell_id"
-                conditions.append("sc.class_name = ? COLLATE NOCASE")
-                params.append(class_name)
-            
-            # Tag filtering based on mode
-            if tags:
-                if tags_mode == "has_all":
-                    # Must have ALL specified tags (use JOINs)
-                    for i, tag in enumerate(tags):
-                        alias = f"st{i}"
-                        query += f" INNER JOIN spell_tags {alias} ON s.id = {alias}.spell_id"
-                        conditions.append(f"{alias}.tag = ? COLLATE NOCASE")
-                        params.append(tag)
-                elif tags_mode == "has_any":
-                    # Must have at least ONE specified tag (use EXISTS with OR)
-                    tag_conditions = " OR ".join(["st.tag = ? COLLATE NOCASE" for _ in tags])
-                    conditions.append(f"EXISTS (SELECT 1 FROM spell_tags st WHERE st.spell_id = s.id AND ({tag_conditions}))")
-                    params.extend(tags)
-                elif tags_mode == "has_none":
-                    # Must NOT have any of the specified tags
-                    tag_conditions = " OR ".join(["st.tag = ? COLLATE NOCASE" for _ in tags])
-                    conditions.append(f"NOT EXISTS (SELECT 1 FROM spell_tags st WHERE st.spell_id = s.id AND ({tag_conditions}))")
-                    params.extend(tags)
-            
-            # Add WHERE clause conditions
-            if search_text:
-                # Search in name, description, and check if any tag matches
-                conditions.append("""(
-                    s.name LIKE ? COLLATE NOCASE OR 
-                    s.description LIKE ? COLLATE NOCASE OR
-                    EXISTS (SELECT 1 FROM spell_tags st WHERE st.spell_id = s.id AND st.tag LIKE ? COLLATE NOCASE)
-                )""")
-                search_pattern = f"%{search_text}%"
-                params.extend([search_pattern, search_pattern, search_pattern])
-            
-            if level >= 0:
-                conditions.append("s.level = ?")
-                params.append(level)
-            
-            if ritual is not None:
-                conditions.append("s.ritual = ?")
-                params.append(1 if ritual else 0)
-            
-            if concentration is not None:
-                conditions.append("s.concentration = ?")
-                params.append(1 if concentration else 0)
-            
-            if min_range > 0:
-                # range_value=1 (Sight) and range_value=3 (Touch) always pass
-                conditions.append("(s.range_value = 1 OR s.range_value = 3 OR s.range_value >= ?)")
-                params.append(min_range)
-            
-            if source:
-                conditions.append("s.source = ? COLLATE NOCASE")
-                params.append(source)
-            
-            if casting_time:
-                conditions.append("s.casting_time = ? COLLATE NOCASE")
-                params.append(casting_time)
-            
-            if duration:
-                conditions.append("s.duration = ? COLLATE NOCASE")
-                params.append(duration)
-            
-            # Component filters using LIKE on the components string
-            if has_verbal is not None:
-                if has_verbal:
-                    conditions.append("UPPER(s.components) LIKE '%V%'")
-                else:
-                    conditions.append("UPPER(s.components) NOT LIKE '%V%'")
-            
-            if has_somatic is not None:
-                if has_somatic:
-                    conditions.append("UPPER(s.components) LIKE '%S%'")
-                else:
-                    conditions.append("UPPER(s.components) NOT LIKE '%S%'")
-            
-            if has_material is not None:
-                if has_material:
-                    conditions.append("UPPER(s.components) LIKE '%M%'")
-                else:
-                    conditions.append("UPPER(s.components) NOT LIKE '%M%'")
-            
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
+            query, params, has_rank = self._build_spell_filter_query(
+                conn, "s.*",
+                search_text=search_text, level=level, class_name=class_name,
+                ritual=ritual, concentration=concentration, min_range=min_range,
+                source=source, sources=sources, sources_mode=sources_mode,
+                tags=tags, tags_mode=tags_mode,
+                casting_time=casting_time, duration=duration,
+                has_verbal=has_verbal, has_somatic=has_somatic, has_material=has_material,
+                costly_component=costly_component, legacy_filter=legacy_filter,
+                visible_classes=visible_classes
+            )
             
-            query += " ORDER BY s.level, s.name COLLATE NOCASE"
+            if has_rank and rank_by_relevance:
+                query += " ORDER BY fts.rank, s.level, s.name COLLATE NOCASE"
+            else:
+                query += " ORDER BY s.level, s.name COLLATE NOCASE"
             
             cursor.execute(query, params)
             rows = cursor.fetchall()
@@ -1558,189 +3430,935 @@ class SpellDatabase:
                                duration: Optional[str] = None,
                                has_verbal: Optional[bool] = None,
                                has_somatic: Optional[bool] = None,
-                               has_material: Optional[bool] = None) -> List[int]:
+                               has_material: Optional[bool] = None,
+                               tags_mode: str = "has_all",
+                               sources: Optional[List[str]] = None,
+                               sources_mode: str = "include",
+                               costly_component: Optional[bool] = None,
+                               legacy_filter: str = "show_all",
+                               visible_classes: Optional[List[str]] = None) -> List[int]:
         """
         Get IDs of spells matching filters (faster than full search for large result sets).
         Uses same parameters as search_spells.
         
         Returns:
-            List of spell IDs matching the criteria
+            List of spell IDs matching the criteria, best text matches first
+            when search_text is given
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            query = "SELECT DISTINCT s.id FROM spells s"
-            conditions = []
-            params = []
+            query, params, has_rank = self._build_spell_filter_query(
+                conn, "s.id",
+                search_text=search_text, level=level, class_name=class_name,
+                ritual=ritual, concentration=concentration, min_range=min_range,
+                source=source, sources=sources, sources_mode=sources_mode,
+                tags=tags, tags_mode=tags_mode,
+                casting_time=casting_time, duration=duration,
+                has_verbal=has_verbal, has_somatic=has_somatic, has_material=has_material,
+                costly_component=costly_component, legacy_filter=legacy_filter,
+                visible_classes=visible_classes
+            )
             
-            # Join for class filtering
-            if class_name:
-                query += " INNER JOIN spell_classes sc ON s.id = sc.spell_id"
-                conditions.append("sc.class_name = ? COLLATE NOCASE")
-                params.append(class_name)
+            if has_rank:
+                query += " ORDER BY fts.rank"
             
-            # Join for tag filtering
-            if tags:
-                for i, tag in enumerate(tags):
-                    alias = f"st{i}"
-                    query += f" INNER JOIN spell_tags {alias} ON s.id = {alias}.spell_id"
-                    conditions.append(f"{alias}.tag = ? COLLATE NOCASE")
-                    params.append(tag)
+            cursor.execute(query, params)
+            return [row[0] for row in cursor.fetchall()]
+    
+    
+    # Columns needed to draw a spell list row (see SpellListItem)
+    SPELL_LIST_COLUMNS = (
+        "s.id, s.name, s.level, s.ritual, s.concentration, s.source, s.is_modified, s.is_legacy, "
+        "EXISTS (SELECT 1 FROM spell_tags ot WHERE ot.spell_id = s.id AND ot.tag = 'Official') AS is_official"
+    )
+    SPELL_PAGE_SIZE = 100
+    
+    def get_spell_list_page(self, after: Optional[Tuple[int, str]] = None,
+                            limit: int = SPELL_PAGE_SIZE, **filters) -> List[dict]:
+        """
+        Get one page of the filtered spell list, ordered by (level, name).
+        
+        Only the columns a list row displays are loaded; fetch the full record
+        with get_spell_by_id when a spell is selected.
+        
+        Args:
+            after: (level, name) of the last row of the previous page, None for the first page
+            limit: Maximum rows to return
+            **filters: Same filter keywords as search_spells (except rank_by_relevance)
+        
+        Returns:
+            List of dicts with id, name, level, ritual, concentration, source,
+            is_official, is_modified and is_legacy
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             
-            # Build WHERE conditions (same as search_spells)
-            if search_text:
-                conditions.append("""(
-                    s.name LIKE ? COLLATE NOCASE OR 
-                    s.description LIKE ? COLLATE NOCASE OR
-                    EXISTS (SELECT 1 FROM spell_tags st WHERE st.spell_id = s.id AND st.tag LIKE ? COLLATE NOCASE)
-                )""")
-                search_pattern = f"%{search_text}%"
-                params.extend([search_pattern, search_pattern, search_pattern])
-            
-            if level >= 0:
-                conditions.append("s.level = ?")
-                params.append(level)
-            
-            if ritual is not None:
-                conditions.append("s.ritual = ?")
-                params.append(1 if ritual else 0)
-            
-            if concentration is not None:
-                conditions.append("s.concentration = ?")
-                params.append(1 if concentration else 0)
-            
-            if min_range > 0:
-                conditions.append("(s.range_value = 1 OR s.range_value = 3 OR s.range_value >= ?)")
-                params.append(min_range)
-            
-            if source:
-                conditions.append("s.source = ? COLLATE NOCASE")
-                params.append(source)
-            
-            if casting_time:
-                conditions.append("s.casting_time = ? COLLATE NOCASE")
-                params.append(casting_time)
-            
-            if duration:
-                conditions.append("s.duration = ? COLLATE NOCASE")
-                params.append(duration)
-            
-            if has_verbal is not None:
-                if has_verbal:
-                    conditions.append("UPPER(s.components) LIKE '%V%'")
-                else:
-                    conditions.append("UPPER(s.components) NOT LIKE '%V%'")
+            query, params, _ = self._build_spell_filter_query(
+                conn, self.SPELL_LIST_COLUMNS, after=after, **filters
+            )
+            query += " ORDER BY s.level, s.name COLLATE NOCASE LIMIT ?"
+            params.append(limit)
             
-            if has_somatic is not None:
-                if has_somatic:
-                    conditions.append("UPPER(s.components) LIKE '%S%'")
-                else:
-                    conditions.append("UPPER(s.components) NOT LIKE '%S%'")
+            cursor.execute(query, params)
+            return [self._row_to_spell_list_dict(row) for row in cursor.fetchall()]
+    
+    def count_spells(self, **filters) -> int:
+        """
+        Count spells matching the filters without loading them.
+        
+        Args:
+            **filters: Same filter keywords as search_spells (except rank_by_relevance)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             
-            if has_material is not None:
-                if has_material:
-                    conditions.append("UPPER(s.components) LIKE '%M%'")
-                else:
-                    conditions.append("UPPER(s.components) NOT LIKE '%M%'")
+            query, params, _ = self._build_spell_filter_query(conn, "s.id", **filters)
+            cursor.execute(f"SELECT COUNT(*) FROM ({query})", params)
+            return cursor.fetchone()[0]
+    
+    def _row_to_spell_list_dict(self, row) -> dict:
+        """Convert a SPELL_LIST_COLUMNS row to a dictionary."""
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'level': row['level'],
+            'ritual': bool(row['ritual']),
+            'concentration': bool(row['concentration']),
+            'source': row['source'] or '',
+            'is_official': bool(row['is_official']),
+            'is_modified': bool(row['is_modified']),
+            'is_legacy': bool(row['is_legacy']),
+        }
+    
+    FACET_CACHE_SIZE = 32  # Filter states whose facet counts are kept per instance
+    
+    @staticmethod
+    def _filter_cache_key(filters: dict) -> tuple:
+        """Canonical, hashable form of search_spells filter keywords."""
+        items = []
+        for name, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                value = tuple(sorted(value)) or None
+            elif value == "":
+                value = None
+            if value is not None:
+                items.append((name, value))
+        return tuple(sorted(items))
+    
+    def get_spell_facets(self, **filters) -> dict:
+        """
+        Count the spells matching the filters, broken down per filter value.
+        
+        Scalar facets come from one grouped pass over the matching spells and
+        class/tag facets from one more; results are cached until the next
+        spell write.
+        
+        Args:
+            **filters: Same filter keywords as search_spells (except rank_by_relevance)
+        
+        Returns:
+            Dict with 'total' and, per facet, a {value: count} dict:
+            'level', 'class', 'source', 'tag', 'casting_time', 'duration',
+            'ritual', 'concentration', 'verbal', 'somatic', 'material',
+            'costly_component' (the last six keyed by True/False)
+        """
+        key = self._filter_cache_key(filters)
+        generation = self.spell_generation
+        cached = self._facet_cache.get(key)
+        if cached is None or cached[0] != generation:
+            facets = self._compute_spell_facets(filters)
+            if len(self._facet_cache) >= self.FACET_CACHE_SIZE:
+                # Drop stale generations first, then the oldest entry
+                stale = [k for k, (gen, _) in self._facet_cache.items() if gen != generation]
+                for k in stale:
+                    del self._facet_cache[k]
+                if len(self._facet_cache) >= self.FACET_CACHE_SIZE:
+                    del self._facet_cache[next(iter(self._facet_cache))]
+            self._facet_cache[key] = (generation, facets)
+            cached = self._facet_cache[key]
+        
+        # Hand out copies so callers cannot corrupt the cache
+        return {name: dict(value) if isinstance(value, dict) else value
+                for name, value in cached[1].items()}
+    
+    def _compute_spell_facets(self, filters: dict) -> dict:
+        """Run the grouped facet queries for get_spell_facets."""
+        # (facet name, column position in the grouped query below)
+        flag_facets = (('ritual', 4), ('concentration', 5), ('verbal', 6),
+                       ('somatic', 7), ('material', 8), ('costly_component', 9))
+        facets = {'total': 0, 'level': {}, 'class': {}, 'source': {}, 'tag': {},
+                  'casting_time': {}, 'duration': {}}
+        for name, _ in flag_facets:
+            facets[name] = {True: 0, False: 0}
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
+            # Materialize the matching ids once; every facet reads from this set
+            query, params, _ = self._build_spell_filter_query(conn, "s.id", **filters)
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS facet_spell_ids (spell_id INTEGER PRIMARY KEY)")
+            cursor.execute("DELETE FROM temp.facet_spell_ids")
+            cursor.execute(f"INSERT OR IGNORE INTO temp.facet_spell_ids (spell_id) SELECT id FROM ({query})", params)
             
-            cursor.execute(query, params)
-            return [row[0] for row in cursor.fetchall()]
+            # One grouped pass for all single-valued facets
+            cursor.execute("""
+                SELECT s.level, s.source, s.casting_time, s.duration, 
+                       s.ritual, s.concentration, s.has_v, s.has_s, s.has_m, s.has_costly_component,
+                       COUNT(*)
+                FROM temp.facet_spell_ids f CROSS JOIN spells s ON s.id = f.spell_id
+                GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9, 10
+            """)
+            for row in cursor.fetchall():
+                count = row[10]
+                facets['total'] += count
+                for name, value in (('level', row[0]), ('source', row[1] or ''),
+                                    ('casting_time', row[2]), ('duration', row[3])):
+                    facets[name][value] = facets[name].get(value, 0) + count
+                for name, index in flag_facets:
+                    facets[name][bool(row[index])] += count
+            
+            # Multi-valued facets (a spell counts once per class/tag it has)
+            cursor.execute("""
+                SELECT 'class', sc.class_name, COUNT(*)
+                FROM temp.facet_spell_ids f INNER JOIN spell_classes sc ON sc.spell_id = f.spell_id
+                GROUP BY sc.class_name
+                UNION ALL
+                SELECT 'tag', st.tag, COUNT(*)
+                FROM temp.facet_spell_ids f INNER JOIN spell_tags st ON st.spell_id = f.spell_id
+                GROUP BY st.tag
+            """)
+            for facet, value, count in cursor.fetchall():
+                facets[facet][value] = count
+            
+            cursor.execute("DELETE FROM temp.facet_spell_ids")
+        
+        return facets
+    
+    def bulk_insert_spells(self, spells: List[dict]) -> int:
+        """
+        Insert multiple spells at once (more efficient for imports).
+        
+        Args:
+            spells: List of spell dictionaries
+        
+        Returns:
+            Number of spells inserted
+        """
+        inserted = 0
+        twin_names: List[str] = []  # Names whose legacy twin flags the new rows can change
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            for spell_data in spells:
+                try:
+                    # Check if spell exists
+                    cursor.execute(
+                        "SELECT id FROM spells WHERE name = ? COLLATE NOCASE", 
+                        (spell_data['name'],)
+                    )
+                    if cursor.fetchone():
+                        continue  # Skip duplicates
+                    
+                    # Insert spell (for official spells, original_name = name)
+                    original_name = spell_data.get('original_name', spell_data['name'])
+                    cursor.execute("""
+                        INSERT INTO main.spells (
+                            name, level, casting_time, ritual, range_value,
+                            components, duration, concentration, description, source, original_name,
+                            range_feet, has_v, has_s, has_m, has_costly_component, duration_seconds, source_key
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (
+                        spell_data['name'],
+                        spell_data['level'],
+                        spell_data['casting_time'],
+                        1 if spell_data.get('ritual', False) else 0,
+                        spell_data['range_value'],
+                        spell_data['components'],
+                        spell_data['duration'],
+                        1 if spell_data.get('concentration', False) else 0,
+                        spell_data.get('description', ''),
+                        spell_data.get('source', ''),
+                        original_name,
+                        *self._derived_spell_values(spell_data)
+                    ))
+                    
+                    spell_id = cursor.lastrowid
+                    
+                    # Insert classes
+                    classes = spell_data.get('classes', [])
+                    if classes:
+                        cursor.executemany(
+                            "INSERT INTO main.spell_classes (spell_id, class_name) VALUES (?, ?)",
+                            [(spell_id, cls) for cls in classes]
+                        )
+                    
+                    # Insert tags (normalized)
+                    tags = spell_data.get('tags', [])
+                    if tags:
+                        normalized_tags = [self.normalize_tag(tag) for tag in tags]
+                        cursor.executemany(
+                            "INSERT INTO main.spell_tags (spell_id, tag) VALUES (?, ?)",
+                            [(spell_id, tag) for tag in normalized_tags]
+                        )
+                    
+                    inserted += 1
+                    twin_names += (spell_data['name'], original_name)
+                    
+                except sqlite3.IntegrityError:
+                    continue  # Skip duplicates
+            
+            if inserted:
+                self._refresh_legacy_twins(cursor, twin_names)
+        
+        return inserted
+    
+    def clear_all_spells(self):
+        """Remove all spells from the database. Use with caution!"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM main.spell_tags")
+            cursor.execute("DELETE FROM main.spell_classes")
+            cursor.execute("DELETE FROM main.spells")
+            if self.is_overlay:
+                cursor.execute("INSERT OR IGNORE INTO main.spell_tombstones (spell_id) SELECT id FROM official.spells")
+    
+    def reset_all_spell_modified_flags(self) -> int:
+        """
+        Reset all spell is_modified flags to 0.
+        
+        Returns:
+            Number of spells affected
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            # Official rows are never modified; only overlay rows can carry the flag
+            cursor.execute("UPDATE main.spells SET is_modified = 0 WHERE is_modified = 1")
+            return cursor.rowcount
+    
+    # ==================== BACKUP & RESTORE ====================
+    
+    BACKUP_PAGES_PER_STEP = 256  # Pages copied per backup step (1 MB at the default page size)
+    BACKUP_STEP_SLEEP = 0.005  # Seconds between steps so other connections get the database
+    
+    def backup_to(self, dest_path: str, progress: Optional[Callable[[int, int], None]] = None) -> bool:
+        """
+        Write a consistent snapshot of this database file to dest_path.
+        
+        Uses the SQLite online backup API in page batches on a dedicated
+        connection. The connection holds a read transaction for the whole copy,
+        so with WAL the snapshot is the database as of the start of the backup
+        even if other connections keep writing. Only the user's own database
+        (schema main) is copied; an attached official database is not.
+        
+        Args:
+            dest_path: Backup file to create (replaced atomically if it exists)
+            progress: Optional callback(remaining_pages, total_pages) after each step
+        
+        Returns:
+            True if the backup was written
+        """
+        tmp_path = dest_path + ".partial"
+        src = dest = None
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            src = sqlite3.connect(self.db_path, timeout=ConnectionManager.BUSY_TIMEOUT_MS / 1000,
+                                  isolation_level=None)
+            # Pin a read snapshot; writers keep going in the WAL meanwhile
+            src.execute("BEGIN")
+            src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            dest = sqlite3.connect(tmp_path)
+            src.backup(
+                dest,
+                pages=self.BACKUP_PAGES_PER_STEP,
+                progress=(lambda _status, remaining, total: progress(remaining, total)) if progress else None,
+                sleep=self.BACKUP_STEP_SLEEP,
+            )
+            # Self-contained file: no -wal/-shm companions needed to open it
+            dest.execute("PRAGMA journal_mode = DELETE")
+            dest.close()
+            dest = None
+            os.replace(tmp_path, dest_path)
+            return True
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error backing up database: {e}")
+            return False
+        finally:
+            if dest is not None:
+                dest.close()
+            if src is not None:
+                src.close()
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+    
+    @classmethod
+    def backup_storage_mode(cls, backup_path: str) -> Optional[str]:
+        """
+        Check a backup file and return its storage mode ('overlay' or 'standalone').
+        
+        Returns:
+            The storage mode, or None if the file is not a readable Spellbook database
+        """
+        try:
+            conn = sqlite3.connect(cls._read_only_uri(backup_path), uri=True)
+            try:
+                if conn.execute("PRAGMA quick_check").fetchone()[0] != 'ok':
+                    return None
+                tables = {row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'")}
+                if 'spells' not in tables:
+                    return None
+                row = None
+                if 'app_metadata' in tables:
+                    row = conn.execute(
+                        "SELECT value FROM app_metadata WHERE key = 'storage_mode'").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else 'standalone'
+    
+    def restore_from(self, backup_path: str) -> bool:
+        """
+        Replace this database's contents with a backup made by backup_to().
+        
+        The copy runs through the backup API into the live file, so it is
+        atomic for other connections. Pooled connections are then retired (each
+        thread reopens its own, see ConnectionManager.reset) and the schema
+        check re-run, which migrates backups from older versions.
+        
+        Returns:
+            True if the database was restored
+        """
+        mode = self.backup_storage_mode(backup_path)
+        if mode is None:
+            print(f"Error restoring database: {backup_path} is not a valid Spellbook backup")
+            return False
+        if mode == 'overlay' and not self.official_db_is_usable(self.official_db_path):
+            print("Error restoring database: backup needs the official content database, which is missing")
+            return False
+        
+        src = dest = None
+        try:
+            src = sqlite3.connect(self._read_only_uri(backup_path), uri=True)
+            dest = sqlite3.connect(self.db_path, timeout=ConnectionManager.BUSY_TIMEOUT_MS / 1000)
+            src.backup(dest, pages=self.BACKUP_PAGES_PER_STEP, sleep=self.BACKUP_STEP_SLEEP)
+            dest.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.Error as e:
+            print(f"Error restoring database: {e}")
+            return False
+        finally:
+            if dest is not None:
+                dest.close()
+            if src is not None:
+                src.close()
+        
+        # Storage mode, overlay views and schema version may all differ now
+        key = ConnectionManager._key(self.db_path)
+        _connections.set_setup(self.db_path, None)
+        _connections.reset(self.db_path)
+        SpellDatabase._overlay_paths.pop(key, None)
+        SpellDatabase._initialized_paths.discard(key)
+        self._has_spell_fts = None
+        self._search_index_is_fts = None
+        self.initialize()
+        self._mark_data_changed()
+        return True
+    
+    # ==================== MAINTENANCE ====================
+    
+    MAINTENANCE_WRITE_THRESHOLD = 1000  # Row changes that make planner statistics worth refreshing
+    MAINTENANCE_IDLE_SECONDS = 30.0  # No database access for this long counts as idle
+    ANALYSIS_LIMIT = 1000  # Rows sampled per index by ANALYZE (bounds its cost as content grows)
+    VACUUM_MIN_FREE_PAGES = 256  # Free pages (1 MB at the default page size) worth reclaiming
+    VACUUM_CONVERT_FREE_RATIO = 0.25  # Free-page share that justifies a one-off VACUUM (shutdown only)
+    
+    def _record_writes(self, count: int):
+        """Count committed row changes toward the next maintenance run."""
+        key = ConnectionManager._key(self.db_path)
+        SpellDatabase._pending_writes[key] = SpellDatabase._pending_writes.get(key, 0) + count
+    
+    @property
+    def pending_writes(self) -> int:
+        """Row changes committed since maintenance last ran (including earlier sessions)."""
+        key = ConnectionManager._key(self.db_path)
+        if key not in SpellDatabase._pending_writes:
+            # Carried over from a session that ended below the threshold
+            with self.get_connection() as conn:
+                row = conn.execute(
+                    "SELECT value FROM app_metadata WHERE key = 'maintenance_pending_writes'"
+                ).fetchone()
+            SpellDatabase._pending_writes.setdefault(key, int(row['value']) if row else 0)
+        return SpellDatabase._pending_writes[key]
+    
+    def seconds_since_activity(self) -> float:
+        """Seconds since this process last used the database file."""
+        last = SpellDatabase._last_activity.get(ConnectionManager._key(self.db_path))
+        return float('inf') if last is None else time.monotonic() - last
+    
+    def maintenance_due(self) -> bool:
+        """Whether enough has been written (or statistics are missing) to run maintenance."""
+        if self.pending_writes >= self.MAINTENANCE_WRITE_THRESHOLD:
+            return True
+        with self.get_connection() as conn:
+            return conn.execute(
+                "SELECT 1 FROM main.sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone() is None
+    
+    def run_maintenance(self, allow_vacuum: bool = False, force: bool = False) -> Dict[str, float]:
+        """
+        Refresh query planner statistics and reclaim free pages.
+        
+        Runs ANALYZE when enough rows changed since the last run (or no
+        statistics exist), then PRAGMA optimize, then an incremental vacuum if
+        deletes left many free pages. With allow_vacuum (used at shutdown), a
+        database created before incremental auto-vacuum is converted with a
+        one-off VACUUM once a quarter of it is free space. Only the user's
+        database is touched; the attached official database is read-only.
+        
+        Args:
+            allow_vacuum: Permit a full VACUUM (slow; meant for shutdown)
+            force: Run ANALYZE even if maintenance is not due
+        
+        Returns:
+            Milliseconds taken per step that ran (e.g. {'analyze': 12.5, 'optimize': 0.3}),
+            plus 'writes' (row changes since the last run) and 'freed_pages'
+        """
+        writes = self.pending_writes
+        report: Dict[str, float] = {}
+        
+        def timed(step: str, sql: str):
+            start = time.perf_counter()
+            conn.execute(sql).fetchall()
+            report[step] = round((time.perf_counter() - start) * 1000, 2)
+        
+        try:
+            pooled = _connections.acquire(self.db_path)
+            conn = pooled.conn
+            if pooled.depth or conn.in_transaction:
+                return {}  # Never inside someone else's transaction
+            
+            if force or self.maintenance_due():
+                conn.execute(f"PRAGMA main.analysis_limit = {self.ANALYSIS_LIMIT}")
+                timed('analyze', "ANALYZE main")
+            timed('optimize', "PRAGMA main.optimize")
+            
+            free_pages = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+            page_count = conn.execute("PRAGMA main.page_count").fetchone()[0]
+            auto_vacuum = conn.execute("PRAGMA main.auto_vacuum").fetchone()[0]
+            if free_pages >= self.VACUUM_MIN_FREE_PAGES:
+                if auto_vacuum == 2:  # INCREMENTAL
+                    timed('incremental_vacuum', "PRAGMA main.incremental_vacuum")
+                elif allow_vacuum and free_pages >= page_count * self.VACUUM_CONVERT_FREE_RATIO:
+                    conn.execute("PRAGMA main.auto_vacuum = INCREMENTAL")
+                    timed('vacuum', "VACUUM main")
+            report['freed_pages'] = free_pages - conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+            
+            report['writes'] = writes
+            with self.get_connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO app_metadata (key, value) VALUES ('last_maintenance', ?)",
+                    (json.dumps({'time': time.time(), **report}),)
+                )
+                conn.execute("DELETE FROM app_metadata WHERE key = 'maintenance_pending_writes'")
+        except sqlite3.Error as e:
+            print(f"Error running database maintenance: {e}")
+            return report
+        
+        SpellDatabase._pending_writes[ConnectionManager._key(self.db_path)] = 0
+        steps = ", ".join(f"{step} {ms:.1f} ms" for step, ms in report.items()
+                          if step not in ('writes', 'freed_pages'))
+        print(f"Database maintenance ({writes} writes since last run): {steps}")
+        return report
+    
+    def run_maintenance_if_idle(self) -> Dict[str, float]:
+        """Run maintenance if it is due and the database has been idle; returns the report or {}."""
+        if self.seconds_since_activity() < self.MAINTENANCE_IDLE_SECONDS or not self.maintenance_due():
+            return {}
+        return self.run_maintenance()
+    
+    def run_shutdown_maintenance(self) -> Dict[str, float]:
+        """
+        Maintenance for application shutdown.
+        
+        Runs maintenance (including a full VACUUM if worthwhile) when it is due;
+        otherwise saves the write count so it carries over to the next session.
+        
+        Returns:
+            The maintenance report, or {} if nothing ran
+        """
+        if self.maintenance_due():
+            return self.run_maintenance(allow_vacuum=True)
+        writes = self.pending_writes
+        if writes:
+            with self.get_connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO app_metadata (key, value) VALUES ('maintenance_pending_writes', ?)",
+                    (str(writes),)
+                )
+            # The bookkeeping row itself is not a content change
+            SpellDatabase._pending_writes[ConnectionManager._key(self.db_path)] = writes
+        return {}
+    
+    # ==================== SEED DATA SYNC ====================
+    
+    # Bundled seed datasets, synced in this order: (dataset, module, loader function)
+    SEED_DATASETS = (
+        ('official_spells', 'tools.spell_data', 'get_all_spells'),
+        ('spell_descriptions', 'tools.update_spell_descriptions', 'get_spell_updates'),
+        ('stat_blocks', 'tools.stat_block_data', 'get_all_stat_blocks'),
+    )
+    
+    # Spell columns a seed dataset may set (classes and tags are left to the user)
+    SEED_SPELL_COLUMNS = (
+        'name', 'level', 'casting_time', 'ritual', 'range_value', 'components',
+        'duration', 'concentration', 'description', 'source',
+    )
+    
+    # Stat block columns stored by the seed datasets, with their defaults
+    SEED_STAT_BLOCK_COLUMNS = (
+        ('name', ''), ('size', 'Medium'), ('creature_type', ''), ('creature_subtype', ''),
+        ('alignment', 'Neutral'), ('armor_class', ''), ('hit_points', ''), ('speed', ''),
+        ('abilities_json', '{}'), ('damage_resistances', ''), ('damage_immunities', ''),
+        ('condition_immunities', ''), ('senses', ''), ('languages', ''), ('challenge_rating', ''),
+        ('traits_json', '[]'), ('actions_json', '[]'), ('bonus_actions_json', '[]'),
+        ('reactions_json', '[]'), ('legendary_actions_json', '[]'),
+    )
+    
+    def sync_seed_data(self, datasets: Optional[List[str]] = None, force: bool = False) -> Dict[str, int]:
+        """
+        Bring bundled seed data (official spells, description updates, stat blocks) up to date.
+        
+        Each dataset's source hash is kept in app_metadata, so an unchanged dataset
+        costs one metadata read and is never imported. A changed dataset is diffed
+        item by item against the hashes recorded at the last sync (seed_state) and
+        only new or changed items are applied, in one transaction. Rows the user
+        has edited since the last sync are left alone.
+        
+        Args:
+            datasets: Dataset names to sync (default: all of SEED_DATASETS)
+            force: Re-check every item even if the dataset's source hash is unchanged
+        
+        Returns:
+            Dict of dataset name -> rows changed, for each dataset that was re-checked
+        """
+        if self.is_overlay:
+            return {}  # Official content comes from the prebuilt official database
+        
+        with self.get_connection() as conn:
+            stored = {row['key']: row['value'] for row in conn.execute(
+                "SELECT key, value FROM app_metadata WHERE key LIKE 'seed_hash:%'"
+            )}
+        
+        results = {}
+        for dataset, module_name, loader in self.SEED_DATASETS:
+            if datasets is not None and dataset not in datasets:
+                continue
+            source_hash = self._seed_source_hash(module_name)
+            if not force and source_hash is not None and stored.get(f"seed_hash:{dataset}") == source_hash:
+                continue
+            
+            data = getattr(importlib.import_module(module_name), loader)()
+            items = self._seed_items(dataset, data)
+            dataset_hash = source_hash or self._seed_content_hash(items)
+            if not force and stored.get(f"seed_hash:{dataset}") == dataset_hash:
+                continue
+            results[dataset] = self._sync_seed_dataset(dataset, dataset, items, dataset_hash, force)
+        return results
     
-    def bulk_insert_spells(self, spells: List[dict]) -> int:
+    def sync_stat_block_seed(self, stat_blocks: List[dict], dataset: str) -> int:
         """
-        Insert multiple spells at once (more efficient for imports).
+        Sync a list of stat block rows from another seed source as its own dataset.
         
         Args:
-            spells: List of spell dictionaries
+            stat_blocks: Dicts of stat_blocks column values plus a 'spell_name' key
+            dataset: Name the dataset's hashes are recorded under
         
         Returns:
-            Number of spells inserted
+            Number of stat blocks inserted or updated (0 if the data is unchanged)
         """
-        inserted = 0
+        if self.is_overlay:
+            return 0
+        items = self._seed_items('stat_blocks', stat_blocks)
+        dataset_hash = self._seed_content_hash(items)
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT value FROM app_metadata WHERE key = ?", (f"seed_hash:{dataset}",)
+            ).fetchone()
+        if row is not None and row['value'] == dataset_hash:
+            return 0
+        return self._sync_seed_dataset(dataset, 'stat_blocks', items, dataset_hash)
+    
+    @staticmethod
+    def _seed_source_hash(module_name: str) -> Optional[str]:
+        """Hash a seed module's source file without importing it (None if it has no readable source)."""
+        try:
+            spec = importlib.util.find_spec(module_name)
+            origin = spec.origin if spec else None
+            if not origin or not origin.endswith('.py') or not os.path.isfile(origin):
+                return None  # e.g. frozen builds; fall back to hashing the loaded data
+            with open(origin, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except (ImportError, OSError):
+            return None
+    
+    @staticmethod
+    def _seed_content_hash(payload) -> str:
+        """Stable hash of a JSON-serializable seed payload."""
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+    
+    def _seed_items(self, kind: str, data) -> Dict[str, dict]:
+        """Key a loaded seed dataset by item and keep only the fields that are synced."""
+        items = {}
+        if kind == 'official_spells':
+            for spell in data:
+                payload = {column: spell.get(column) for column in self.SEED_SPELL_COLUMNS}
+                payload['classes'] = list(spell.get('classes', []))
+                payload['tags'] = list(spell.get('tags', []))
+                items[spell['name'].lower()] = payload
+        elif kind == 'spell_descriptions':
+            for spell_name, fields in data.items():
+                payload = {column: value for column, value in fields.items()
+                           if column in self.SEED_SPELL_COLUMNS and column != 'name'}
+                payload['name'] = spell_name
+                items[spell_name.lower()] = payload
+        else:
+            for stat_block in data:
+                if not stat_block.get('spell_name'):
+                    continue
+                payload = {column: stat_block.get(column, default)
+                           for column, default in self.SEED_STAT_BLOCK_COLUMNS}
+                payload['spell_name'] = stat_block['spell_name']
+                items[f"{stat_block['spell_name'].lower()}\x1f{payload['name']}"] = payload
+        return items
+    
+    def _sync_seed_dataset(self, dataset: str, kind: str, items: Dict[str, dict], dataset_hash: str,
+                           force: bool = False) -> int:
+        """Apply the new or changed items of one dataset (of a SEED_DATASETS kind) and record their hashes."""
+        item_hashes = [(key, self._seed_content_hash(payload)) for key, payload in items.items()]
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS seed_batch (
+                    item_key TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL
+                )
+            """)
+            cursor.execute("DELETE FROM temp.seed_batch")
+            cursor.executemany("INSERT INTO temp.seed_batch (item_key, content_hash) VALUES (?, ?)", item_hashes)
             
-            for spell_data in spells:
-                try:
-                    # Check if spell exists
-                    cursor.execute(
-                        "SELECT id FROM spells WHERE name = ? COLLATE NOCASE", 
-                        (spell_data['name'],)
-                    )
-                    if cursor.fetchone():
-                        continue  # Skip duplicates
-                    
-                    # Insert spell (for official spells, original_name = name)
-                    original_name = spell_data.get('original_name', spell_data['name'])
-                    cursor.execute("""
-                        INSERT INTO spells (
-                            name, level, casting_time, ritual, range_value,
-                            components, duration, concentration, description, source, original_name
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        spell_data['name'],
-                        spell_data['level'],
-                        spell_data['casting_time'],
-                        1 if spell_data.get('ritual', False) else 0,
-                        spell_data['range_value'],
-                        spell_data['components'],
-                        spell_data['duration'],
-                        1 if spell_data.get('concentration', False) else 0,
-                        spell_data.get('description', ''),
-                        spell_data.get('source', ''),
-                        original_name
-                    ))
-                    
-                    spell_id = cursor.lastrowid
-                    
-                    # Insert classes
-                    classes = spell_data.get('classes', [])
-                    if classes:
-                        cursor.executemany(
-                            "INSERT INTO spell_classes (spell_id, class_name) VALUES (?, ?)",
-                            [(spell_id, cls) for cls in classes]
-                        )
-                    
-                    # Insert tags (normalized)
-                    tags = spell_data.get('tags', [])
-                    if tags:
-                        normalized_tags = [self.normalize_tag(tag) for tag in tags]
-                        cursor.executemany(
-                            "INSERT INTO spell_tags (spell_id, tag) VALUES (?, ?)",
-                            [(spell_id, tag) for tag in normalized_tags]
-                        )
-                    
-                    inserted += 1
-                    
-                except sqlite3.IntegrityError:
-                    continue  # Skip duplicates
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM seed_state WHERE dataset = ?)", (dataset,))
+            has_baseline = bool(cursor.fetchone()[0])
+            
+            # New or changed items, with the hash recorded at the previous sync (None if new)
+            cursor.execute("""
+                SELECT b.item_key, s.content_hash
+                FROM temp.seed_batch b
+                LEFT JOIN seed_state s ON s.dataset = ? AND s.item_key = b.item_key
+                WHERE ? OR s.content_hash IS NOT b.content_hash
+            """, (dataset, 1 if force else 0))
+            previous = {row[0]: row[1] for row in cursor.fetchall()}
+            
+            changed = 0
+            if previous:
+                delta = {key: items[key] for key in previous}
+                if kind == 'official_spells':
+                    changed = self._apply_official_spell_seed(cursor, delta, previous, has_baseline or force)
+                elif kind == 'spell_descriptions':
+                    changed = self._apply_spell_description_seed(cursor, delta, has_baseline or force)
+                else:
+                    changed = self._apply_stat_block_seed(cursor, delta, previous)
             
-            conn.commit()
+            cursor.execute("""
+                DELETE FROM seed_state
+                WHERE dataset = ? AND item_key NOT IN (SELECT item_key FROM temp.seed_batch)
+            """, (dataset,))
+            cursor.execute("""
+                INSERT OR REPLACE INTO seed_state (dataset, item_key, content_hash)
+                SELECT ?, item_key, content_hash FROM temp.seed_batch
+            """, (dataset,))
+            cursor.execute(
+                "INSERT OR REPLACE INTO app_metadata (key, value) VALUES (?, ?)",
+                (f"seed_hash:{dataset}", dataset_hash)
+            )
+            cursor.execute("DELETE FROM temp.seed_batch")
         
-        return inserted
+        if changed:
+            print(f"Synced {changed} {dataset.replace('_', ' ')} from bundled data")
+        return changed
     
-    def clear_all_spells(self):
-        """Remove all spells from the database. Use with caution!"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM spell_tags")
-            cursor.execute("DELETE FROM spell_classes")
-            cursor.execute("DELETE FROM spells")
+    def _stage_seed_spells(self, cursor, delta: Dict[str, dict], columns: List[str]):
+        """Load seed spell rows into temp.seed_spells (name + columns, NULL where unset)."""
+        cursor.execute("DROP TABLE IF EXISTS temp.seed_spells")
+        cursor.execute(f"""
+            CREATE TEMP TABLE seed_spells (
+                name TEXT PRIMARY KEY COLLATE NOCASE{''.join(f', {column}' for column in columns)}
+            )
+        """)
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO temp.seed_spells (name{''.join(f', {c}' for c in columns)}) "
+            f"VALUES (?{', ?' * len(columns)})",
+            [(payload['name'], *(payload.get(column) for column in columns)) for payload in delta.values()]
+        )
     
-    def reset_all_spell_modified_flags(self) -> int:
+    @staticmethod
+    def _seed_owned_sql(alias: str) -> str:
+        """SQL condition for spell rows that came from the seed (Official tag or an original_name)."""
+        return (f"(NULLIF({alias}.original_name, '') IS NOT NULL"
+                f" OR {alias}.id IN (SELECT spell_id FROM spell_tags WHERE tag = 'Official'))")
+    
+    def _apply_official_spell_seed(self, cursor, delta: Dict[str, dict], previous: Dict[str, Optional[str]],
+                                   has_baseline: bool) -> int:
+        """Insert spells new to the seed and update unmodified official spells whose seed text changed.
+        
+        Only items the seed shipped before (with a recorded hash) update
+        existing rows, and only rows the seed owns: a user's spell that
+        happens to share a name with a new seed item is never rewritten.
+        Without a baseline the database predates seed tracking (or was just
+        populated), so its current spells are taken as the synced state.
         """
-        Reset all spell is_modified flags to 0.
+        if not has_baseline:
+            return 0
         
-        Returns:
-            Number of spells affected
+        columns = [column for column in self.SEED_SPELL_COLUMNS if column != 'name']
+        changed_items = {key: payload for key, payload in delta.items() if previous[key] is not None}
+        new_items = {key: payload for key, payload in delta.items() if previous[key] is None}
+        
+        # Changed items: unmodified seed-owned spells still matching the official name
+        updated_ids = []
+        if changed_items:
+            self._stage_seed_spells(cursor, changed_items, columns)
+            cursor.execute(f"""
+                SELECT s.id FROM spells s
+                JOIN temp.seed_spells b ON b.name = COALESCE(NULLIF(s.original_name, ''), s.name) COLLATE NOCASE
+                WHERE s.is_modified = 0 AND {self._seed_owned_sql('s')}
+            """)
+            updated_ids = [row[0] for row in cursor.fetchall()]
+            if updated_ids:
+                assignments = ', '.join(f"{column} = b.{column}" for column in columns)
+                cursor.execute(f"""
+                    UPDATE spells SET {assignments}
+                    FROM temp.seed_spells b
+                    WHERE b.name = COALESCE(NULLIF(spells.original_name, ''), spells.name) COLLATE NOCASE
+                      AND spells.is_modified = 0 AND {self._seed_owned_sql('spells')}
+                """)
+                self._refresh_derived_spell_columns(cursor, updated_ids)
+            cursor.execute("DROP TABLE temp.seed_spells")
+        
+        # Items new to the seed that the database doesn't have under any name
+        new_spells = []
+        if new_items:
+            self._stage_seed_spells(cursor, new_items, [])
+            cursor.execute("""
+                SELECT b.name FROM temp.seed_spells b
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM spells s
+                    WHERE s.name = b.name COLLATE NOCASE OR s.original_name = b.name COLLATE NOCASE
+                )
+            """)
+            missing = {row[0].lower() for row in cursor.fetchall()}
+            new_spells = [payload for key, payload in new_items.items() if key in missing]
+            cursor.execute("DROP TABLE temp.seed_spells")
+        
+        inserted = self.bulk_insert_spells(new_spells) if new_spells else 0
+        if updated_ids:
+            self._refresh_legacy_twins(cursor)
+        return len(updated_ids) + inserted
+    
+    def _apply_spell_description_seed(self, cursor, delta: Dict[str, dict], has_baseline: bool) -> int:
+        """Update unmodified official spells whose description/source update is new or changed.
+        
+        Only rows the seed owns are updated (see _seed_owned_sql), so a user's
+        spell sharing an official spell's name is left alone. Without a baseline
+        the updates were already applied by migration 4 (or the database was
+        populated from newer data), so nothing is rewritten.
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE spells SET is_modified = 0 WHERE is_modified = 1")
-            return cursor.rowcount
+        if not has_baseline:
+            return 0
+        
+        columns = sorted({column for payload in delta.values() for column in payload if column != 'name'})
+        if not columns:
+            return 0
+        self._stage_seed_spells(cursor, delta, columns)
+        cursor.execute(f"""
+            SELECT s.id FROM spells s
+            JOIN temp.seed_spells b ON b.name = s.name COLLATE NOCASE
+            WHERE s.is_modified = 0 AND {self._seed_owned_sql('s')}
+        """)
+        updated_ids = [row[0] for row in cursor.fetchall()]
+        if updated_ids:
+            assignments = ', '.join(f"{column} = COALESCE(b.{column}, spells.{column})" for column in columns)
+            cursor.execute(f"""
+                UPDATE spells SET {assignments}
+                FROM temp.seed_spells b
+                WHERE b.name = spells.name COLLATE NOCASE AND spells.is_modified = 0
+                  AND {self._seed_owned_sql('spells')}
+            """)
+            self._refresh_derived_spell_columns(cursor, updated_ids)
+        cursor.execute("DROP TABLE temp.seed_spells")
+        return len(updated_ids)
+    
+    def _apply_stat_block_seed(self, cursor, delta: Dict[str, dict], previous: Dict[str, Optional[str]]) -> int:
+        """Insert missing stat blocks and update ones still matching their previously synced text."""
+        columns = [column for column, _ in self.SEED_STAT_BLOCK_COLUMNS]
+        cursor.execute("DROP TABLE IF EXISTS temp.seed_stat_blocks")
+        cursor.execute(f"""
+            CREATE TEMP TABLE seed_stat_blocks (item_key TEXT PRIMARY KEY, spell_name TEXT, {', '.join(columns)})
+        """)
+        cursor.executemany(
+            f"INSERT INTO temp.seed_stat_blocks (item_key, spell_name, {', '.join(columns)}) "
+            f"VALUES (?, ?{', ?' * len(columns)})",
+            [(key, payload['spell_name'], *(payload[column] for column in columns))
+             for key, payload in delta.items()]
+        )
+        
+        cursor.execute("""
+            SELECT b.spell_name, b.name FROM temp.seed_stat_blocks b
+            WHERE NOT EXISTS (SELECT 1 FROM spells s WHERE s.name = b.spell_name COLLATE NOCASE)
+        """)
+        for spell_name, name in cursor.fetchall():
+            print(f"Warning: Spell '{spell_name}' not found for stat block '{name}'")
+        
+        # Changed items whose stored row is untouched since the last sync
+        changed_keys = [key for key, old_hash in previous.items() if old_hash is not None]
+        updated = 0
+        if changed_keys:
+            cursor.execute(f"""
+                SELECT b.item_key, b.spell_name, sb.id, {', '.join(f'sb.{c}' for c in columns)}
+                FROM temp.seed_stat_blocks b
+                JOIN spells s ON s.name = b.spell_name COLLATE NOCASE
+                JOIN stat_blocks sb ON sb.spell_id = s.id AND sb.name = b.name
+                WHERE b.item_key IN ({', '.join('?' * len(changed_keys))})
+            """, changed_keys)
+            for row in cursor.fetchall():
+                stored = {column: row[column] for column in columns}
+                stored['spell_name'] = row['spell_name']
+                if self._seed_content_hash(stored) != previous[row['item_key']]:
+                    continue  # Edited by the user since the last sync
+                payload = delta[row['item_key']]
+                cursor.execute(
+                    f"UPDATE stat_blocks SET {', '.join(f'{c} = ?' for c in columns)}, "
+                    f"updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (*(payload[column] for column in columns), row['id'])
+                )
+                updated += 1
+        
+        cursor.execute(f"""
+            INSERT INTO stat_blocks (spell_id, {', '.join(columns)})
+            SELECT s.id, {', '.join(f'b.{c}' for c in columns)}
+            FROM temp.seed_stat_blocks b
+            JOIN spells s ON s.name = b.spell_name COLLATE NOCASE
+            WHERE NOT EXISTS (SELECT 1 FROM stat_blocks sb WHERE sb.spell_id = s.id AND sb.name = b.name)
+        """)
+        inserted = cursor.rowcount
+        cursor.execute("DROP TABLE temp.seed_stat_blocks")
+        return updated + inserted
     
     # ==================== Stat Block Methods ====================
     
@@ -1756,9 +4374,10 @@ class SpellDatabase:
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            self._materialize_spells(cursor, [stat_block_data['spell_id']])
             
             cursor.execute("""
-                INSERT INTO stat_blocks (
+                INSERT INTO main.stat_blocks (
                     spell_id, name, size, creature_type, creature_subtype, alignment,
                     armor_class, hit_points, speed, abilities_json,
                     damage_resistances, damage_immunities, condition_immunities,
@@ -1776,18 +4395,18 @@ class SpellDatabase:
                 stat_block_data.get('armor_class', ''),
                 stat_block_data.get('hit_points', ''),
                 stat_block_data.get('speed', ''),
-                json.dumps(stat_block_data.get('abilities')) if stat_block_data.get('abilities') else None,
+                encode_json_column(stat_block_data.get('abilities')) if stat_block_data.get('abilities') else None,
                 stat_block_data.get('damage_resistances', ''),
                 stat_block_data.get('damage_immunities', ''),
                 stat_block_data.get('condition_immunities', ''),
                 stat_block_data.get('senses', ''),
                 stat_block_data.get('languages', ''),
                 stat_block_data.get('challenge_rating', ''),
-                json.dumps(stat_block_data.get('traits', [])),
-                json.dumps(stat_block_data.get('actions', [])),
-                json.dumps(stat_block_data.get('bonus_actions', [])),
-                json.dumps(stat_block_data.get('reactions', [])),
-                json.dumps(stat_block_data.get('legendary_actions', []))
+                encode_json_column(stat_block_data.get('traits', [])),
+                encode_json_column(stat_block_data.get('actions', [])),
+                encode_json_column(stat_block_data.get('bonus_actions', [])),
+                encode_json_column(stat_block_data.get('reactions', [])),
+                encode_json_column(stat_block_data.get('legendary_actions', []))
             ))
             
             stat_block_id = cursor.lastrowid
@@ -1798,9 +4417,10 @@ class SpellDatabase:
         """Update an existing stat block."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            self._materialize_stat_block_spell(cursor, stat_block_id)
             
             cursor.execute("""
-                UPDATE stat_blocks SET
+                UPDATE main.stat_blocks SET
                     name = ?, size = ?, creature_type = ?, creature_subtype = ?,
                     alignment = ?, armor_class = ?, hit_points = ?, speed = ?,
                     abilities_json = ?, damage_resistances = ?, damage_immunities = ?,
@@ -1818,18 +4438,18 @@ class SpellDatabase:
                 stat_block_data.get('armor_class', ''),
                 stat_block_data.get('hit_points', ''),
                 stat_block_data.get('speed', ''),
-                json.dumps(stat_block_data.get('abilities')) if stat_block_data.get('abilities') else None,
+                encode_json_column(stat_block_data.get('abilities')) if stat_block_data.get('abilities') else None,
                 stat_block_data.get('damage_resistances', ''),
                 stat_block_data.get('damage_immunities', ''),
                 stat_block_data.get('condition_immunities', ''),
                 stat_block_data.get('senses', ''),
                 stat_block_data.get('languages', ''),
                 stat_block_data.get('challenge_rating', ''),
-                json.dumps(stat_block_data.get('traits', [])),
-                json.dumps(stat_block_data.get('actions', [])),
-                json.dumps(stat_block_data.get('bonus_actions', [])),
-                json.dumps(stat_block_data.get('reactions', [])),
-                json.dumps(stat_block_data.get('legendary_actions', [])),
+                encode_json_column(stat_block_data.get('traits', [])),
+                encode_json_column(stat_block_data.get('actions', [])),
+                encode_json_column(stat_block_data.get('bonus_actions', [])),
+                encode_json_column(stat_block_data.get('reactions', [])),
+                encode_json_column(stat_block_data.get('legendary_actions', [])),
                 stat_block_id
             ))
             
@@ -1839,9 +4459,18 @@ class SpellDatabase:
         """Delete a stat block by ID."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM stat_blocks WHERE id = ?", (stat_block_id,))
+            self._materialize_stat_block_spell(cursor, stat_block_id)
+            cursor.execute("DELETE FROM main.stat_blocks WHERE id = ?", (stat_block_id,))
             return cursor.rowcount > 0
     
+    def _materialize_stat_block_spell(self, cursor, stat_block_id: int):
+        """Copy an official stat block's spell into the overlay before the block is written."""
+        if self.is_overlay:
+            cursor.execute("SELECT spell_id FROM stat_blocks WHERE id = ?", (stat_block_id,))
+            row = cursor.fetchone()
+            if row is not None:
+                self._materialize_spells(cursor, [row[0]])
+    
     def get_stat_blocks_for_spell(self, spell_id: int) -> List[dict]:
         """Get all stat blocks linked to a spell."""
         with self.get_connection() as conn:
@@ -1890,18 +4519,18 @@ class SpellDatabase:
             'armor_class': row['armor_class'],
             'hit_points': row['hit_points'],
             'speed': row['speed'],
-            'abilities': json.loads(row['abilities_json']) if row['abilities_json'] else None,
+            'abilities': decode_json_column(row['abilities_json']),
             'damage_resistances': row['damage_resistances'] or '',
             'damage_immunities': row['damage_immunities'] or '',
             'condition_immunities': row['condition_immunities'] or '',
             'senses': row['senses'] or '',
             'languages': row['languages'] or '',
             'challenge_rating': row['challenge_rating'] or '',
-            'traits': json.loads(row['traits_json']) if row['traits_json'] else [],
-            'actions': json.loads(row['actions_json']) if row['actions_json'] else [],
-            'bonus_actions': json.loads(row['bonus_actions_json']) if row['bonus_actions_json'] else [],
-            'reactions': json.loads(row['reactions_json']) if row['reactions_json'] else [],
-            'legendary_actions': json.loads(row['legendary_actions_json']) if row['legendary_actions_json'] else []
+            'traits': decode_json_column(row['traits_json'], []),
+            'actions': decode_json_column(row['actions_json'], []),
+            'bonus_actions': decode_json_column(row['bonus_actions_json'], []),
+            'reactions': decode_json_column(row['reactions_json'], []),
+            'legendary_actions': decode_json_column(row['legendary_actions_json'], [])
         }
     
     def get_spells_with_stat_blocks(self) -> List[int]:
@@ -1914,10 +4543,10 @@ class SpellDatabase:
     # ==================== LINEAGE METHODS ====================
     
     def get_all_lineages(self) -> List[dict]:
-        """Get all lineages from the database."""
+        """Get all lineages from enabled sources."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM lineages ORDER BY name")
+            cursor.execute(f"SELECT * FROM lineages WHERE {self._enabled_source_sql('source')} ORDER BY name")
             return [self._row_to_lineage_dict(row) for row in cursor.fetchall()]
     
     def get_lineage_by_name(self, name: str) -> Optional[dict]:
@@ -1942,7 +4571,7 @@ class SpellDatabase:
                 lineage_data.get('creature_type', 'Humanoid'),
                 lineage_data.get('size', 'Medium'),
                 lineage_data.get('speed', 30),
-                json.dumps(lineage_data.get('traits', [])),
+                encode_json_column(lineage_data.get('traits', [])),
                 lineage_data.get('source', ''),
                 1 if lineage_data.get('is_official', True) else 0,
                 1 if lineage_data.get('is_custom', False) else 0,
@@ -1965,7 +4594,7 @@ class SpellDatabase:
                 lineage_data.get('creature_type', 'Humanoid'),
                 lineage_data.get('size', 'Medium'),
                 lineage_data.get('speed', 30),
-                json.dumps(lineage_data.get('traits', [])),
+                encode_json_column(lineage_data.get('traits', [])),
                 lineage_data.get('source', ''),
                 1 if lineage_data.get('is_official', True) else 0,
                 1 if lineage_data.get('is_custom', False) else 0,
@@ -1990,7 +4619,7 @@ class SpellDatabase:
             'creature_type': row['creature_type'] or 'Humanoid',
             'size': row['size'] or 'Medium',
             'speed': row['speed'] or 30,
-            'traits': json.loads(row['traits_json']) if row['traits_json'] else [],
+            'traits': decode_json_column(row['traits_json'], []),
             'source': row['source'] or '',
             'is_official': bool(row['is_official']),
             'is_custom': bool(row['is_custom']),
@@ -2000,10 +4629,10 @@ class SpellDatabase:
     # ==================== FEAT METHODS ====================
     
     def get_all_feats(self) -> List[dict]:
-        """Get all feats from the database."""
+        """Get all feats from enabled sources."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM feats ORDER BY name")
+            cursor.execute(f"SELECT * FROM feats WHERE {self._enabled_source_sql('source')} ORDER BY name")
             return [self._row_to_feat_dict(row) for row in cursor.fetchall()]
     
     def get_feat_by_name(self, name: str) -> Optional[dict]:
@@ -2027,11 +4656,11 @@ class SpellDatabase:
                 feat_data['name'],
                 feat_data.get('type', ''),
                 1 if feat_data.get('is_spellcasting', False) else 0,
-                json.dumps(feat_data.get('spell_lists', [])),
-                json.dumps(feat_data.get('spells_num', {})),
+                encode_json_column(feat_data.get('spell_lists', [])),
+                encode_json_column(feat_data.get('spells_num', {})),
                 1 if feat_data.get('has_prereq', False) else 0,
                 feat_data.get('prereq', ''),
-                json.dumps(feat_data.get('set_spells', [])),
+                encode_json_column(feat_data.get('set_spells', [])),
                 feat_data.get('description', ''),
                 feat_data.get('source', ''),
                 1 if feat_data.get('is_official', True) else 0,
@@ -2053,11 +4682,11 @@ class SpellDatabase:
                 feat_data['name'],
                 feat_data.get('type', ''),
                 1 if feat_data.get('is_spellcasting', False) else 0,
-                json.dumps(feat_data.get('spell_lists', [])),
-                json.dumps(feat_data.get('spells_num', {})),
+                encode_json_column(feat_data.get('spell_lists', [])),
+                encode_json_column(feat_data.get('spells_num', {})),
                 1 if feat_data.get('has_prereq', False) else 0,
                 feat_data.get('prereq', ''),
-                json.dumps(feat_data.get('set_spells', [])),
+                encode_json_column(feat_data.get('set_spells', [])),
                 feat_data.get('description', ''),
                 feat_data.get('source', ''),
                 1 if feat_data.get('is_official', True) else 0,
@@ -2076,18 +4705,18 @@ class SpellDatabase:
     
     def _row_to_feat_dict(self, row) -> dict:
         """Convert a database row to a feat dictionary."""
-        spells_num_raw = json.loads(row['spells_num_json']) if row['spells_num_json'] else {}
+        spells_num_raw = decode_json_column(row['spells_num_json'], {})
         spells_num = {int(k): v for k, v in spells_num_raw.items()} if spells_num_raw else {}
         return {
             'id': row['id'],
             'name': row['name'],
             'type': row['type'] or '',
             'is_spellcasting': bool(row['is_spellcasting']),
-            'spell_lists': json.loads(row['spell_lists_json']) if row['spell_lists_json'] else [],
+            'spell_lists': decode_json_column(row['spell_lists_json'], []),
             'spells_num': spells_num,
             'has_prereq': bool(row['has_prereq']),
             'prereq': row['prereq'] or '',
-            'set_spells': json.loads(row['set_spells_json']) if row['set_spells_json'] else [],
+            'set_spells': decode_json_column(row['set_spells_json'], []),
             'description': row['description'] or '',
             'source': row['source'] or '',
             'is_official': bool(row['is_official']),
@@ -2098,10 +4727,10 @@ class SpellDatabase:
     # ==================== BACKGROUND METHODS ====================
     
     def get_all_backgrounds(self) -> List[dict]:
-        """Get all backgrounds from the database."""
+        """Get all backgrounds from enabled sources."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM backgrounds ORDER BY name")
+            cursor.execute(f"SELECT * FROM backgrounds WHERE {self._enabled_source_sql('source')} ORDER BY name")
             return [self._row_to_background_dict(row) for row in cursor.fetchall()]
     
     def get_background_by_name(self, name: str) -> Optional[dict]:
@@ -2126,12 +4755,12 @@ class SpellDatabase:
                 bg_data.get('source', ''),
                 1 if bg_data.get('is_legacy', False) else 0,
                 bg_data.get('description', ''),
-                json.dumps(bg_data.get('skills', [])),
-                json.dumps(bg_data.get('other_proficiencies', [])),
-                json.dumps(bg_data.get('ability_scores', [])),
-                json.dumps(bg_data.get('feats', [])),
+                encode_json_column(bg_data.get('skills', [])),
+                encode_json_column(bg_data.get('other_proficiencies', [])),
+                encode_json_column(bg_data.get('ability_scores', [])),
+                encode_json_column(bg_data.get('feats', [])),
                 bg_data.get('equipment', ''),
-                json.dumps(bg_data.get('features', [])),
+                encode_json_column(bg_data.get('features', [])),
                 1 if bg_data.get('is_official', True) else 0,
                 1 if bg_data.get('is_custom', False) else 0
             ))
@@ -2151,12 +4780,12 @@ class SpellDatabase:
                 bg_data.get('source', ''),
                 1 if bg_data.get('is_legacy', False) else 0,
                 bg_data.get('description', ''),
-                json.dumps(bg_data.get('skills', [])),
-                json.dumps(bg_data.get('other_proficiencies', [])),
-                json.dumps(bg_data.get('ability_scores', [])),
-                json.dumps(bg_data.get('feats', [])),
+                encode_json_column(bg_data.get('skills', [])),
+                encode_json_column(bg_data.get('other_proficiencies', [])),
+                encode_json_column(bg_data.get('ability_scores', [])),
+                encode_json_column(bg_data.get('feats', [])),
                 bg_data.get('equipment', ''),
-                json.dumps(bg_data.get('features', [])),
+                encode_json_column(bg_data.get('features', [])),
                 1 if bg_data.get('is_official', True) else 0,
                 1 if bg_data.get('is_custom', False) else 0,
                 bg_id
@@ -2178,29 +4807,39 @@ class SpellDatabase:
             'source': row['source'] or '',
             'is_legacy': bool(row['is_legacy']),
             'description': row['description'] or '',
-            'skills': json.loads(row['skills_json']) if row['skills_json'] else [],
-            'other_proficiencies': json.loads(row['other_proficiencies_json']) if row['other_proficiencies_json'] else [],
-            'ability_scores': json.loads(row['ability_scores_json']) if row['ability_scores_json'] else [],
-            'feats': json.loads(row['feats_json']) if row['feats_json'] else [],
+            'skills': decode_json_column(row['skills_json'], []),
+            'other_proficiencies': decode_json_column(row['other_proficiencies_json'], []),
+            'ability_scores': decode_json_column(row['ability_scores_json'], []),
+            'feats': decode_json_column(row['feats_json'], []),
             'equipment': row['equipment'] or '',
-            'features': json.loads(row['features_json']) if row['features_json'] else [],
+            'features': decode_json_column(row['features_json'], []),
             'is_official': bool(row['is_official']),
             'is_custom': bool(row['is_custom'])
         }
     
     # ==================== CLASS METHODS ====================
     
-    def get_all_character_classes(self) -> List[dict]:
-        """Get all character classes from the database."""
+    def get_all_character_classes(self, lazy: bool = False, with_subclasses: bool = True) -> List[dict]:
+        """
+        Get all character classes from enabled sources.
+        
+        Args:
+            lazy: Leave the large feature columns undecoded (see _row_to_class_dict)
+            with_subclasses: Also load each class's subclasses
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM classes ORDER BY name")
+            enabled = self._enabled_source_sql('source')
+            cursor.execute(f"SELECT * FROM classes WHERE {enabled} ORDER BY name")
             classes = []
             for row in cursor.fetchall():
-                cls_dict = self._row_to_class_dict(row)
+                cls_dict = self._row_to_class_dict(row, lazy=lazy)
                 # Get subclasses for this class
-                cursor.execute("SELECT * FROM subclasses WHERE class_id = ? ORDER BY name", (row['id'],))
-                cls_dict['subclasses'] = [self._row_to_subclass_dict(sub_row) for sub_row in cursor.fetchall()]
+                if with_subclasses:
+                    cursor.execute(f"SELECT * FROM subclasses WHERE class_id = ? AND {enabled} ORDER BY name",
+                                   (row['id'],))
+                    cls_dict['subclasses'] = [self._row_to_subclass_dict(sub_row, lazy=lazy)
+                                              for sub_row in cursor.fetchall()]
                 classes.append(cls_dict)
             return classes
     
@@ -2235,27 +4874,30 @@ class SpellDatabase:
                 class_data['name'],
                 class_data.get('hit_die', 8),
                 class_data.get('primary_ability', ''),
-                json.dumps(class_data.get('saving_throws', [])),
-                json.dumps(class_data.get('armor_proficiencies', [])),
-                json.dumps(class_data.get('weapon_proficiencies', [])),
-                json.dumps(class_data.get('tool_proficiencies', [])),
-                json.dumps(class_data.get('skill_proficiencies', [])),
+                encode_json_column(class_data.get('saving_throws', [])),
+                encode_json_column(class_data.get('armor_proficiencies', [])),
+                encode_json_column(class_data.get('weapon_proficiencies', [])),
+                encode_json_column(class_data.get('tool_proficiencies', [])),
+                encode_json_column(class_data.get('skill_proficiencies', [])),
                 class_data.get('num_skills', 2),
-                json.dumps(class_data.get('starting_equipment', [])),
-                json.dumps(class_data.get('class_features', [])),
-                json.dumps(class_data.get('spellcasting')) if class_data.get('spellcasting') else 'null',
+                encode_json_column(class_data.get('starting_equipment', [])),
+                encode_json_column(class_data.get('class_features', [])),
+                encode_json_column(class_data.get('spellcasting')) if class_data.get('spellcasting') else 'null',
                 class_data.get('subclass_name', ''),
                 class_data.get('subclass_level', 3),
-                json.dumps(class_data.get('class_table_columns', [])),
-                json.dumps(class_data.get('trackable_features', [])),
-                json.dumps(class_data.get('class_spells', [])),
+                encode_json_column(class_data.get('class_table_columns', [])),
+                encode_json_column(class_data.get('trackable_features', [])),
+                encode_json_column(class_data.get('class_spells', [])),
                 class_data.get('unarmored_defense', ''),
                 class_data.get('source', ''),
                 1 if class_data.get('is_official', True) else 0,
                 1 if class_data.get('is_custom', False) else 0,
                 1 if class_data.get('is_legacy', False) else 0
             ))
-            return cursor.lastrowid or 0
+            class_id = cursor.lastrowid or 0
+            self._write_class_feature_rows(cursor, class_id, class_data.get('class_features', []),
+                                           class_data.get('trackable_features', []))
+            return class_id
     
     def update_class(self, class_id: int, class_data: dict) -> bool:
         """Update an existing class."""
@@ -2274,20 +4916,20 @@ class SpellDatabase:
                 class_data['name'],
                 class_data.get('hit_die', 8),
                 class_data.get('primary_ability', ''),
-                json.dumps(class_data.get('saving_throws', [])),
-                json.dumps(class_data.get('armor_proficiencies', [])),
-                json.dumps(class_data.get('weapon_proficiencies', [])),
-                json.dumps(class_data.get('tool_proficiencies', [])),
-                json.dumps(class_data.get('skill_proficiencies', [])),
+                encode_json_column(class_data.get('saving_throws', [])),
+                encode_json_column(class_data.get('armor_proficiencies', [])),
+                encode_json_column(class_data.get('weapon_proficiencies', [])),
+                encode_json_column(class_data.get('tool_proficiencies', [])),
+                encode_json_column(class_data.get('skill_proficiencies', [])),
                 class_data.get('num_skills', 2),
-                json.dumps(class_data.get('starting_equipment', [])),
-                json.dumps(class_data.get('class_features', [])),
-                json.dumps(class_data.get('spellcasting')) if class_data.get('spellcasting') else 'null',
+                encode_json_column(class_data.get('starting_equipment', [])),
+                encode_json_column(class_data.get('class_features', [])),
+                encode_json_column(class_data.get('spellcasting')) if class_data.get('spellcasting') else 'null',
                 class_data.get('subclass_name', ''),
                 class_data.get('subclass_level', 3),
-                json.dumps(class_data.get('class_table_columns', [])),
-                json.dumps(class_data.get('trackable_features', [])),
-                json.dumps(class_data.get('class_spells', [])),
+                encode_json_column(class_data.get('class_table_columns', [])),
+                encode_json_column(class_data.get('trackable_features', [])),
+                encode_json_column(class_data.get('class_spells', [])),
                 class_data.get('unarmored_defense', ''),
                 class_data.get('source', ''),
                 1 if class_data.get('is_official', True) else 0,
@@ -2295,7 +4937,11 @@ class SpellDatabase:
                 1 if class_data.get('is_legacy', False) else 0,
                 class_id
             ))
-            return cursor.rowcount > 0
+            if cursor.rowcount == 0:
+                return False
+            self._write_class_feature_rows(cursor, class_id, class_data.get('class_features', []),
+                                           class_data.get('trackable_features', []))
+            return True
     
     def delete_class(self, class_id: int) -> bool:
         """Delete a class by ID (cascades to subclasses)."""
@@ -2304,11 +4950,14 @@ class SpellDatabase:
             cursor.execute("DELETE FROM classes WHERE id = ?", (class_id,))
             return cursor.rowcount > 0
     
-    def _row_to_class_dict(self, row) -> dict:
-        """Convert a database row to a class dictionary."""
-        spellcasting = None
-        if row['spellcasting_json'] and row['spellcasting_json'] != 'null':
-            spellcasting = json.loads(row['spellcasting_json'])
+    def _row_to_class_dict(self, row, lazy: bool = False) -> dict:
+        """Convert a database row to a class dictionary.
+        
+        Args:
+            row: classes row
+            lazy: Leave class_features as an undecoded LazyJSON
+        """
+        spellcasting = decode_json_column(row['spellcasting_json'])
         
         # Handle new columns that might not exist in older databases
         class_table_columns = []
@@ -2319,19 +4968,19 @@ class SpellDatabase:
         # Try to access new columns, fall back to defaults if they don't exist
         try:
             if row['class_table_columns_json']:
-                class_table_columns = json.loads(row['class_table_columns_json'])
+                class_table_columns = decode_json_column(row['class_table_columns_json'])
         except (KeyError, IndexError):
             pass
         
         try:
             if row['trackable_features_json']:
-                trackable_features = json.loads(row['trackable_features_json'])
+                trackable_features = decode_json_column(row['trackable_features_json'])
         except (KeyError, IndexError):
             pass
         
         try:
             if row['class_spells_json']:
-                class_spells = json.loads(row['class_spells_json'])
+                class_spells = decode_json_column(row['class_spells_json'])
         except (KeyError, IndexError):
             pass
         
@@ -2345,14 +4994,15 @@ class SpellDatabase:
             'name': row['name'],
             'hit_die': row['hit_die'] or 8,
             'primary_ability': row['primary_ability'] or '',
-            'saving_throws': json.loads(row['saving_throws_json']) if row['saving_throws_json'] else [],
-            'armor_proficiencies': json.loads(row['armor_proficiencies_json']) if row['armor_proficiencies_json'] else [],
-            'weapon_proficiencies': json.loads(row['weapon_proficiencies_json']) if row['weapon_proficiencies_json'] else [],
-            'tool_proficiencies': json.loads(row['tool_proficiencies_json']) if row['tool_proficiencies_json'] else [],
-            'skill_proficiencies': json.loads(row['skill_proficiencies_json']) if row['skill_proficiencies_json'] else [],
+            'saving_throws': decode_json_column(row['saving_throws_json'], []),
+            'armor_proficiencies': decode_json_column(row['armor_proficiencies_json'], []),
+            'weapon_proficiencies': decode_json_column(row['weapon_proficiencies_json'], []),
+            'tool_proficiencies': decode_json_column(row['tool_proficiencies_json'], []),
+            'skill_proficiencies': decode_json_column(row['skill_proficiencies_json'], []),
             'num_skills': row['num_skills'] or 2,
-            'starting_equipment': json.loads(row['starting_equipment_json']) if row['starting_equipment_json'] else [],
-            'class_features': json.loads(row['class_features_json']) if row['class_features_json'] else [],
+            'starting_equipment': decode_json_column(row['starting_equipment_json'], []),
+            'class_features': (LazyJSON(row['class_features_json']) if lazy
+                               else decode_json_column(row['class_features_json'], [])),
             'spellcasting': spellcasting,
             'subclass_name': row['subclass_name'] or '',
             'subclass_level': row['subclass_level'] or 3,
@@ -2367,51 +5017,62 @@ class SpellDatabase:
             'subclasses': []  # Filled by get_all_classes or get_class_by_name
         }
     
-    def _row_to_subclass_dict(self, row) -> dict:
-        """Convert a database row to a subclass dictionary."""
-        # features_json contains all subclass data
-        features_data = json.loads(row['features_json']) if row['features_json'] else {}
-        
+    @staticmethod
+    def subclass_feature_fields(features_data) -> dict:
+        """Split a decoded subclass features_json value into its subclass fields."""
         # Handle both old format (list of features) and new format (dict with multiple fields)
         if isinstance(features_data, list):
-            features = features_data
-            subclass_spells = []
-            armor_proficiencies = []
-            weapon_proficiencies = []
-            unarmored_defense = ''
-            trackable_features = []
-        else:
-            features = features_data.get('features', [])
-            subclass_spells = features_data.get('subclass_spells', [])
-            armor_proficiencies = features_data.get('armor_proficiencies', [])
-            weapon_proficiencies = features_data.get('weapon_proficiencies', [])
-            unarmored_defense = features_data.get('unarmored_defense', '')
-            trackable_features = features_data.get('trackable_features', [])
-        
+            return {
+                'features': features_data,
+                'subclass_spells': [],
+                'armor_proficiencies': [],
+                'weapon_proficiencies': [],
+                'unarmored_defense': '',
+                'trackable_features': []
+            }
         return {
+            'features': features_data.get('features', []),
+            'subclass_spells': features_data.get('subclass_spells', []),
+            'armor_proficiencies': features_data.get('armor_proficiencies', []),
+            'weapon_proficiencies': features_data.get('weapon_proficiencies', []),
+            'unarmored_defense': features_data.get('unarmored_defense', ''),
+            'trackable_features': features_data.get('trackable_features', [])
+        }
+    
+    def _row_to_subclass_dict(self, row, lazy: bool = False) -> dict:
+        """Convert a database row to a subclass dictionary.
+        
+        Args:
+            row: subclasses row
+            lazy: Return the undecoded features_json as 'features_data' (a
+                LazyJSON for subclass_feature_fields()) instead of the fields
+                stored in it
+        """
+        subclass = {
             'id': row['id'],
             'name': row['name'],
             'class_id': row['class_id'],
             'description': row['description'] or '',
-            'features': features,
-            'subclass_spells': subclass_spells,
-            'armor_proficiencies': armor_proficiencies,
-            'weapon_proficiencies': weapon_proficiencies,
-            'unarmored_defense': unarmored_defense,
-            'trackable_features': trackable_features,
             'source': row['source'] or '',
             'is_official': bool(row['is_official']),
             'is_custom': bool(row['is_custom']),
             'is_legacy': bool(row['is_legacy'])
         }
+        # features_json contains all subclass data
+        if lazy:
+            subclass['features_data'] = LazyJSON(row['features_json'], dict)
+        else:
+            subclass.update(self.subclass_feature_fields(decode_json_column(row['features_json'], {})))
+        return subclass
     
     # ==================== SUBCLASS METHODS ====================
     
     def get_subclasses_for_class(self, class_id: int) -> List[dict]:
-        """Get all subclasses for a class."""
+        """Get all subclasses of a class from enabled sources."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM subclasses WHERE class_id = ? ORDER BY name", (class_id,))
+            cursor.execute(f"SELECT * FROM subclasses WHERE class_id = ? AND {self._enabled_source_sql('source')} "
+                           "ORDER BY name", (class_id,))
             return [self._row_to_subclass_dict(row) for row in cursor.fetchall()]
     
     def insert_subclass(self, subclass_data: dict) -> int:
@@ -2435,13 +5096,15 @@ class SpellDatabase:
                 subclass_data['name'],
                 subclass_data['class_id'],
                 subclass_data.get('description', ''),
-                json.dumps(features_data),
+                encode_json_column(features_data),
                 subclass_data.get('source', ''),
                 1 if subclass_data.get('is_official', True) else 0,
                 1 if subclass_data.get('is_custom', False) else 0,
                 1 if subclass_data.get('is_legacy', False) else 0
             ))
-            return cursor.lastrowid or 0
+            subclass_id = cursor.lastrowid or 0
+            self._write_subclass_feature_rows(cursor, subclass_id, subclass_data['class_id'], features_data)
+            return subclass_id
     
     def update_subclass(self, subclass_id: int, subclass_data: dict) -> bool:
         """Update an existing subclass."""
@@ -2463,14 +5126,18 @@ class SpellDatabase:
             """, (
                 subclass_data['name'],
                 subclass_data.get('description', ''),
-                json.dumps(features_data),
+                encode_json_column(features_data),
                 subclass_data.get('source', ''),
                 1 if subclass_data.get('is_official', True) else 0,
                 1 if subclass_data.get('is_custom', False) else 0,
                 1 if subclass_data.get('is_legacy', False) else 0,
                 subclass_id
             ))
-            return cursor.rowcount > 0
+            if cursor.rowcount == 0:
+                return False
+            cursor.execute("SELECT class_id FROM main.subclasses WHERE id = ?", (subclass_id,))
+            self._write_subclass_feature_rows(cursor, subclass_id, cursor.fetchone()[0], features_data)
+            return True
     
     def delete_subclass(self, subclass_id: int) -> bool:
         """Delete a subclass by ID."""
@@ -2479,19 +5146,23 @@ class SpellDatabase:
             cursor.execute("DELETE FROM subclasses WHERE id = ?", (subclass_id,))
             return cursor.rowcount > 0
     
-    def get_all_subclasses(self) -> List[dict]:
-        """Get all subclasses with their parent class name."""
+    def get_all_subclasses(self, lazy: bool = False) -> List[dict]:
+        """Get all enabled subclasses with their parent class name (lazy: see _row_to_subclass_dict).
+        
+        Subclasses of a class from a disabled source are left out too.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT s.*, c.name as parent_class 
                 FROM subclasses s 
                 JOIN classes c ON s.class_id = c.id 
+                WHERE {self._enabled_source_sql('s.source')} AND {self._enabled_source_sql('c.source')}
                 ORDER BY s.name
             """)
             results = []
             for row in cursor.fetchall():
-                sub_dict = self._row_to_subclass_dict(row)
+                sub_dict = self._row_to_subclass_dict(row, lazy=lazy)
                 sub_dict['parent_class'] = row['parent_class']
                 results.append(sub_dict)
             return results
@@ -2531,82 +5202,377 @@ class SpellDatabase:
                 results.append(sub_dict)
             return results
     
+    # ==================== CLASS FEATURE METHODS ====================
+    
+    @staticmethod
+    def _class_feature_rows(class_features) -> List[tuple]:
+        """
+        Split a decoded class_features value into class_features rows.
+        
+        Accepts both stored formats: {level: ClassLevel dict} and the older
+        flat list of feature dicts with a 'level' key.
+        
+        Returns:
+            (level, position, title, description, is_subclass_feature,
+            subclass_name, tables_json) tuples
+        """
+        rows = []
+        if isinstance(class_features, dict):
+            for lvl_str, lvl_data in class_features.items():
+                if not isinstance(lvl_data, dict):
+                    continue
+                level = int(lvl_data.get('level', lvl_str))
+                for position, ability in enumerate(lvl_data.get('abilities', [])):
+                    rows.append((
+                        level, position,
+                        ability.get('title', ''),
+                        ability.get('description', ''),
+                        1 if ability.get('is_subclass_feature', False) else 0,
+                        ability.get('subclass_name', ''),
+                        encode_json_column(ability.get('tables', [])),
+                    ))
+        elif isinstance(class_features, list):
+            positions: Dict[int, int] = {}
+            for feature in class_features:
+                if not isinstance(feature, dict) or ('name' not in feature and 'title' not in feature):
+                    continue
+                level = feature.get('level', 1)
+                position = positions.get(level, 0)
+                positions[level] = position + 1
+                rows.append((
+                    level, position,
+                    feature.get('title', feature.get('name', '')),
+                    feature.get('description', ''),
+                    0, '', '[]',
+                ))
+        return rows
+    
+    @staticmethod
+    def _trackable_feature_rows(trackable_features) -> List[tuple]:
+        """
+        Convert decoded trackable feature dicts into trackable_features rows.
+        
+        Returns:
+            (level, position, title, description, tracked_value, has_uses,
+            max_uses, current_uses, recharge, level_scaling_json) tuples
+        """
+        rows = []
+        for position, feature in enumerate(trackable_features or []):
+            level_scaling = feature.get('level_scaling') or {}
+            level = min(int(k) for k in level_scaling) if level_scaling else 1
+            rows.append((
+                level, position,
+                feature.get('title', ''),
+                feature.get('description', ''),
+                feature.get('tracked_value', ''),
+                1 if feature.get('has_uses', False) else 0,
+                feature.get('max_uses', 0),
+                feature.get('current_uses', 0),
+                feature.get('recharge', 'long_rest'),
+                encode_json_column({str(k): v for k, v in level_scaling.items()}),
+            ))
+        return rows
+    
+    def _write_class_feature_rows(self, cursor, class_id: int, class_features, trackable_features):
+        """Replace a class's rows in class_features and its own rows in trackable_features."""
+        cursor.execute("DELETE FROM main.class_features WHERE class_id = ?", (class_id,))
+        cursor.execute("""
+            DELETE FROM main.trackable_features WHERE class_id = ? AND subclass_id IS NULL
+        """, (class_id,))
+        cursor.executemany("""
+            INSERT INTO main.class_features (class_id, level, position, title, description,
+                                             is_subclass_feature, subclass_name, tables_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(class_id,) + row for row in self._class_feature_rows(class_features)])
+        cursor.executemany("""
+            INSERT INTO main.trackable_features (class_id, subclass_id, level, position, title,
+                                                 description, tracked_value, has_uses, max_uses,
+                                                 current_uses, recharge, level_scaling_json)
+            VALUES (?, NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(class_id,) + row for row in self._trackable_feature_rows(trackable_features)])
+    
+    def _write_subclass_feature_rows(self, cursor, subclass_id: int, class_id: int, fields: dict):
+        """Replace a subclass's rows in subclass_features and trackable_features.
+        
+        Args:
+            fields: Subclass fields as returned by subclass_feature_fields()
+        """
+        cursor.execute("DELETE FROM main.subclass_features WHERE subclass_id = ?", (subclass_id,))
+        cursor.execute("DELETE FROM main.trackable_features WHERE subclass_id = ?", (subclass_id,))
+        cursor.executemany("""
+            INSERT INTO main.subclass_features (subclass_id, class_id, level, position,
+                                                title, description, tables_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (subclass_id, class_id, feature.get('level', 1), position,
+             feature.get('title', ''), feature.get('description', ''),
+             encode_json_column(feature.get('tables', [])))
+            for position, feature in enumerate(fields.get('features', []))
+            if isinstance(feature, dict)
+        ])
+        cursor.executemany("""
+            INSERT INTO main.trackable_features (class_id, subclass_id, level, position, title,
+                                                 description, tracked_value, has_uses, max_uses,
+                                                 current_uses, recharge, level_scaling_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(class_id, subclass_id) + row
+              for row in self._trackable_feature_rows(fields.get('trackable_features', []))])
+    
+    def _rebuild_class_feature_tables(self, cursor):
+        """Regenerate the per-level feature tables from every class and subclass row."""
+        cursor.execute("DELETE FROM main.class_features")
+        cursor.execute("DELETE FROM main.subclass_features")
+        cursor.execute("DELETE FROM main.trackable_features")
+        cursor.execute("SELECT id, class_features_json, trackable_features_json FROM main.classes")
+        for class_id, class_features, trackable_features in cursor.fetchall():
+            self._write_class_feature_rows(cursor, class_id,
+                                           decode_json_column(class_features, []),
+                                           decode_json_column(trackable_features, []))
+        cursor.execute("SELECT id, class_id, features_json FROM main.subclasses")
+        for subclass_id, class_id, features_json in cursor.fetchall():
+            self._write_subclass_feature_rows(
+                cursor, subclass_id, class_id,
+                self.subclass_feature_fields(decode_json_column(features_json, {})))
+    
+    @staticmethod
+    def _row_to_class_feature_dict(row) -> dict:
+        """Convert a class_features row to a ClassAbility dictionary."""
+        return {
+            'level': row['level'],
+            'title': row['title'],
+            'description': row['description'] or '',
+            'is_subclass_feature': bool(row['is_subclass_feature']),
+            'subclass_name': row['subclass_name'] or '',
+            'tables': decode_json_column(row['tables_json'], []),
+        }
+    
+    @staticmethod
+    def _row_to_subclass_feature_dict(row) -> dict:
+        """Convert a subclass_features row to a SubclassFeature dictionary."""
+        return {
+            'level': row['level'],
+            'title': row['title'],
+            'description': row['description'] or '',
+            'tables': decode_json_column(row['tables_json'], []),
+        }
+    
+    @staticmethod
+    def _row_to_trackable_feature_dict(row) -> dict:
+        """Convert a trackable_features row to a TrackableFeature dictionary."""
+        return {
+            'title': row['title'],
+            'description': row['description'] or '',
+            'tracked_value': row['tracked_value'] or '',
+            'has_uses': bool(row['has_uses']),
+            'max_uses': row['max_uses'],
+            'current_uses': row['current_uses'],
+            'recharge': row['recharge'] or 'long_rest',
+            'level_scaling': decode_json_column(row['level_scaling_json'], {}),
+        }
+    
+    def get_class_features_at_level(self, class_id: int, level: int) -> List[dict]:
+        """Get the abilities a class gains at exactly one level, in class table order."""
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT * FROM class_features WHERE class_id = ? AND level = ?
+                ORDER BY position
+            """, (class_id, level))
+            return [self._row_to_class_feature_dict(row) for row in cursor.fetchall()]
+    
+    def get_class_features_up_to_level(self, class_id: int, level: int) -> List[dict]:
+        """Get the abilities a class gains from level 1 up to level, ordered by level."""
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT * FROM class_features WHERE class_id = ? AND level BETWEEN 1 AND ?
+                ORDER BY level, position
+            """, (class_id, level))
+            return [self._row_to_class_feature_dict(row) for row in cursor.fetchall()]
+    
+    def get_subclass_features_at_level(self, subclass_id: int, level: int) -> List[dict]:
+        """Get the features a subclass grants at exactly one class level."""
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT * FROM subclass_features WHERE subclass_id = ? AND level = ?
+                ORDER BY position
+            """, (subclass_id, level))
+            return [self._row_to_subclass_feature_dict(row) for row in cursor.fetchall()]
+    
+    def get_subclass_features_up_to_level(self, subclass_id: int, level: int) -> List[dict]:
+        """Get the features a subclass grants up to a class level, in stored order."""
+        with self.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT * FROM subclass_features WHERE subclass_id = ? AND level <= ?
+                ORDER BY position
+            """, (subclass_id, level))
+            return [self._row_to_subclass_feature_dict(row) for row in cursor.fetchall()]
+    
+    def get_trackable_features_up_to_level(self, class_id: int, level: int,
+                                           subclass_id: Optional[int] = None) -> List[dict]:
+        """
+        Get the trackable features available by a class level.
+        
+        Args:
+            class_id: Class whose own trackable features are returned
+            level: Class level
+            subclass_id: Return this subclass's trackable features instead
+        """
+        with self.get_connection() as conn:
+            if subclass_id is None:
+                cursor = conn.execute("""
+                    SELECT * FROM trackable_features
+                    WHERE class_id = ? AND subclass_id IS NULL AND level <= ?
+                    ORDER BY position
+                """, (class_id, level))
+            else:
+                cursor = conn.execute("""
+                    SELECT * FROM trackable_features WHERE subclass_id = ? AND level <= ?
+                    ORDER BY position
+                """, (subclass_id, level))
+            return [self._row_to_trackable_feature_dict(row) for row in cursor.fetchall()]
+    
+    # ==================== CONTENT SOURCES ====================
+    
+    def get_content_sources(self) -> List[dict]:
+        """Get every registered content source as dicts with 'name' and 'enabled'."""
+        with self.get_connection() as conn:
+            cursor = conn.execute("SELECT name, enabled FROM main.content_sources ORDER BY name")
+            return [{'name': row['name'], 'enabled': bool(row['enabled'])} for row in cursor.fetchall()]
+    
+    def get_disabled_sources(self) -> List[str]:
+        """Get the names of disabled content sources."""
+        with self.get_connection() as conn:
+            cursor = conn.execute("SELECT name FROM main.content_sources WHERE enabled = 0 ORDER BY name")
+            return [row['name'] for row in cursor.fetchall()]
+    
+    def set_source_enabled(self, name: str, enabled: bool) -> bool:
+        """
+        Enable or disable a content source (case-insensitive name).
+        
+        Content from a disabled source stays stored but is left out of every
+        spell, lineage, feat, background, class and subclass listing and of
+        global search. Toggling updates one registry row; the change counters
+        of all content bump with it, so every cache reloads.
+        
+        Returns:
+            True if the source exists and its state changed
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                "UPDATE main.content_sources SET enabled = ? WHERE name = ? AND enabled != ?",
+                (int(enabled), name, int(enabled))
+            )
+            return cursor.rowcount > 0
+    
     # ==================== GLOBAL SEARCH ====================
     
-    def global_search(self, query: str, limit: int = 50) -> List[dict]:
+    def _global_search_fts_available(self, conn: sqlite3.Connection) -> Optional[bool]:
+        """Whether search_index is an FTS5 table (None if the index doesn't exist)."""
+        if self._search_index_is_fts is None:
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'search_index'"
+            ).fetchone()
+            if row is None:
+                return None
+            self._search_index_is_fts = 'fts5' in (row['sql'] or '').lower()
+        return self._search_index_is_fts
+    
+    def global_search(self, query: str, limit: int = 50,
+                      include_descriptions: bool = False) -> List[dict]:
         """
-        Search across all content types by name.
+        Search across all content types in a single ranked query.
         Returns list of dicts with 'name', 'section', and 'id'.
+        
+        Results are ordered by match quality: names starting with the query,
+        then names with a word starting with it, then names containing it,
+        then (with include_descriptions) description-only matches.
         """
         if not query or len(query) < 1:
             return []
         
-        results = []
-        search_pattern = f"%{query}%"
-        
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Search spells
-            cursor.execute("""
-                SELECT id, name FROM spells 
-                WHERE name LIKE ? COLLATE NOCASE 
-                ORDER BY name LIMIT ?
-            """, (search_pattern, limit))
-            for row in cursor.fetchall():
-                results.append({'id': row['id'], 'name': row['name'], 'section': 'Spells'})
+            is_fts = self._global_search_fts_available(conn)
+            if is_fts is None:
+                return self._global_search_legacy(conn, query, limit)
             
-            # Search lineages
-            cursor.execute("""
-                SELECT id, name FROM lineages 
-                WHERE name LIKE ? COLLATE NOCASE 
-                ORDER BY name LIMIT ?
-            """, (search_pattern, limit))
-            for row in cursor.fetchall():
-                results.append({'id': row['id'], 'name': row['name'], 'section': 'Lineages'})
-            
-            # Search feats
-            cursor.execute("""
-                SELECT id, name FROM feats 
-                WHERE name LIKE ? COLLATE NOCASE 
-                ORDER BY name LIMIT ?
-            """, (search_pattern, limit))
-            for row in cursor.fetchall():
-                results.append({'id': row['id'], 'name': row['name'], 'section': 'Feats'})
+            escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            prefix_pattern = f"{escaped}%"
+            word_pattern = f"% {escaped}%"
+            substring_pattern = f"%{escaped}%"
+            params: list = [prefix_pattern, word_pattern, substring_pattern]
             
-            # Search backgrounds
-            cursor.execute("""
-                SELECT id, name FROM backgrounds 
-                WHERE name LIKE ? COLLATE NOCASE 
-                ORDER BY name LIMIT ?
-            """, (search_pattern, limit))
-            for row in cursor.fetchall():
-                results.append({'id': row['id'], 'name': row['name'], 'section': 'Backgrounds'})
+            if is_fts and len(query) >= self.SPELL_FTS_MIN_QUERY_LENGTH:
+                phrase = '"' + query.replace('"', '""') + '"'
+                columns = "{name description}" if include_descriptions else "{name}"
+                where_sql = "search_index MATCH ?"
+                params.append(f"{columns} : {phrase}")
+            elif include_descriptions:
+                where_sql = "(name LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')"
+                params.extend([substring_pattern, substring_pattern])
+            else:
+                where_sql = "name LIKE ? ESCAPE '\\'"
+                params.append(substring_pattern)
+            where_sql += f" AND rowid NOT IN ({self._hidden_search_rows_sql()})"
             
-            # Search classes
-            cursor.execute("""
-                SELECT id, name FROM classes 
-                WHERE name LIKE ? COLLATE NOCASE 
-                ORDER BY name LIMIT ?
-            """, (search_pattern, limit))
-            for row in cursor.fetchall():
-                results.append({'id': row['id'], 'name': row['name'], 'section': 'Classes'})
+            from_sql = "search_index"
+            if self.is_overlay:
+                # Official spells not replaced or deleted by the overlay (the
+                # other sections were copied into the overlay's own index)
+                where_params = params[3:]
+                from_sql = f"""(
+                    SELECT section, item_id, label, name FROM main.search_index WHERE {where_sql}
+                    UNION ALL
+                    SELECT section, item_id, label, name FROM official.search_index WHERE {where_sql}
+                      AND section = '{self.GLOBAL_SEARCH_SECTIONS[0][0]}'
+                      AND item_id NOT IN (SELECT id FROM main.spells)
+                      AND item_id NOT IN (SELECT spell_id FROM main.spell_tombstones)
+                )"""
+                where_sql = "1"
+                params.extend(where_params)
+            params.append(limit)
             
-            # Search subclasses
-            cursor.execute("""
-                SELECT s.id, s.name, c.name as class_name FROM subclasses s
-                JOIN classes c ON s.class_id = c.id
-                WHERE s.name LIKE ? COLLATE NOCASE 
-                ORDER BY s.name LIMIT ?
-            """, (search_pattern, limit))
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT section, item_id, label,
+                    CASE
+                        WHEN name LIKE ? ESCAPE '\\' THEN 0
+                        WHEN name LIKE ? ESCAPE '\\' THEN 1
+                        WHEN name LIKE ? ESCAPE '\\' THEN 2
+                        ELSE 3
+                    END AS match_rank
+                FROM {from_sql}
+                WHERE {where_sql}
+                ORDER BY match_rank, label COLLATE NOCASE
+                LIMIT ?
+            """, params)
+            return [
+                {'id': row['item_id'], 'name': row['label'], 'section': row['section']}
+                for row in cursor.fetchall()
+            ]
+    
+    def _global_search_legacy(self, conn: sqlite3.Connection, query: str, limit: int) -> List[dict]:
+        """Name-only search for databases that predate the search_index table."""
+        results = []
+        search_pattern = f"%{query}%"
+        cursor = conn.cursor()
+        
+        for section, table in self.GLOBAL_SEARCH_SECTIONS:
+            if table == 'subclasses':
+                cursor.execute(f"""
+                    SELECT s.id, s.name || ' (' || c.name || ')' AS name FROM subclasses s
+                    JOIN classes c ON s.class_id = c.id
+                    WHERE s.name LIKE ? COLLATE NOCASE 
+                      AND {self._enabled_source_sql('s.source')} AND {self._enabled_source_sql('c.source')}
+                    ORDER BY s.name LIMIT ?
+                """, (search_pattern, limit))
+            else:
+                cursor.execute(f"""
+                    SELECT id, name FROM {table} 
+                    WHERE name LIKE ? COLLATE NOCASE AND {self._enabled_source_sql('source')}
+                    ORDER BY name LIMIT ?
+                """, (search_pattern, limit))
             for row in cursor.fetchall():
-                results.append({
-                    'id': row['id'], 
-                    'name': f"{row['name']} ({row['class_name']})", 
-                    'section': 'Subclasses'
-                })
+                results.append({'id': row['id'], 'name': row['name'], 'section': section})
         
         # Sort by name and limit total results
         results.sort(key=lambda x: x['name'].lower())
         return results[:limit]
-
@@ -0,0 +1,243 @@
+"""
+Background database worker for the Spellbook Application.
+Runs SQLite work on a dedicated thread so the Tk mainloop never blocks on disk,
+and hands results back to the Tk thread through after() polling.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+
+class DatabaseWorker:
+    """Single background thread that executes database requests in order.
+    
+    Every request returns a concurrent.futures.Future. Requests submitted with
+    a key supersede the previous request for the same key: a superseded
+    request that has not started yet is cancelled, and one that is already
+    running still finishes but its result is never delivered to Tk.
+    
+    SQLite connections are pooled per thread (see database.ConnectionManager),
+    so all work submitted here shares the worker thread's own connection.
+    """
+    
+    # How often the Tk thread checks for finished requests while any are outstanding
+    POLL_MS = 15
+    
+    def __init__(self, name: str = "SpellbookDB"):
+        self._name = name
+        self._requests: "queue.Queue" = queue.Queue()
+        self._completions: "queue.Queue" = queue.Queue()
+        self._latest: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._outstanding = 0
+        self._pump_widget = None
+        self._pump_id = None
+    
+    # ==================== REQUESTS ====================
+    
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue func(*args, **kwargs) to run on the worker thread.
+        
+        Returns:
+            Future resolving to the function's return value (or its exception)
+        """
+        future: Future = Future()
+        self._enqueue(future, func, args, kwargs)
+        return future
+    
+    def submit_latest(self, key: str, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue a request that supersedes any earlier request with the same key.
+        
+        Used for keystroke-driven queries where only the newest answer matters.
+        """
+        future: Future = Future()
+        with self._lock:
+            previous = self._latest.get(key)
+            self._latest[key] = future
+        if previous is not None:
+            previous.cancel()
+        self._enqueue(future, func, args, kwargs)
+        return future
+    
+    def cancel(self, key: str):
+        """Cancel the pending request for key so its result is never delivered."""
+        with self._lock:
+            previous = self._latest.pop(key, None)
+        if previous is not None:
+            previous.cancel()
+    
+    def is_current(self, key: str, future: Future) -> bool:
+        """Return True if future is still the newest request for key."""
+        with self._lock:
+            return self._latest.get(key) is future
+    
+    def _enqueue(self, future: Future, func: Callable[..., Any], args, kwargs):
+        """Hand a request to the worker thread, starting it on first use."""
+        self._ensure_thread()
+        self._requests.put((future, func, args, kwargs))
+    
+    def _ensure_thread(self):
+        """Start the worker thread on first use."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        """Worker loop: execute requests until a None sentinel arrives."""
+        while True:
+            item = self._requests.get()
+            if item is None:
+                break
+            future, func, args, kwargs = item
+            # Skips requests that were cancelled (superseded) while queued
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+        
+        # Close this thread's pooled connections before it exits
+        try:
+            from database import close_thread_connections
+            close_thread_connections()
+        except Exception:
+            pass
+    
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = 5.0):
+        """Cancel queued requests and stop the worker thread.
+        
+        Requests already running are allowed to finish (so writes are never
+        interrupted mid-transaction).
+        """
+        with self._lock:
+            self._latest.clear()
+            thread = self._thread
+            self._thread = None
+        while True:
+            try:
+                item = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].cancel()
+        if thread is not None and thread.is_alive():
+            self._requests.put(None)
+            if wait:
+                thread.join(timeout)
+    
+    # ==================== TK DELIVERY ====================
+    
+    def deliver(self, widget, future: Future, on_result: Callable[[Any], None],
+                on_error: Optional[Callable[[BaseException], None]] = None,
+                key: Optional[str] = None):
+        """Call on_result(result) on the Tk thread once future completes.
+        
+        Must be called from the Tk thread. Nothing is delivered if the future
+        was cancelled, if a newer request was submitted for key, or if the
+        widget has been destroyed by the time the result arrives.
+        
+        Args:
+            widget: Any Tk widget; used to schedule the after() polling
+            future: Future returned by submit()/submit_latest()
+            on_result: Callback receiving the result
+            on_error: Callback receiving the exception (default: print it)
+            key: Request key passed to submit_latest(), if any
+        """
+        def complete():
+            if future.cancelled():
+                return
+            if key is not None and not self.is_current(key, future):
+                return
+            if key is not None:
+                with self._lock:
+                    if self._latest.get(key) is future:
+                        del self._latest[key]
+            try:
+                if not widget.winfo_exists():
+                    return
+            except Exception:
+                return
+            error = future.exception()
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    print(f"Database request failed: {error}")
+            else:
+                on_result(future.result())
+        
+        with self._lock:
+            self._outstanding += 1
+        future.add_done_callback(lambda _f: self._completions.put((complete, True)))
+        self._schedule_pump(widget)
+    
+    def call_in_tk(self, func: Callable[[], None]):
+        """Run func on the Tk thread at the next poll.
+        
+        Intended for work running on the worker thread (e.g. listener
+        notifications after an async import); it is picked up while a
+        delivery is outstanding, which is always the case for requests
+        submitted through deliver().
+        """
+        self._completions.put((func, False))
+    
+    def _schedule_pump(self, widget):
+        """Start after() polling on the Tk thread if it is not already running."""
+        if self._pump_id is not None:
+            return
+        try:
+            # Poll on the root window so closing the requesting view can't strand the pump
+            self._pump_widget = widget._root()
+            self._pump_id = self._pump_widget.after(self.POLL_MS, self._pump)
+        except Exception:
+            self._pump_id = None
+    
+    def _pump(self):
+        """Drain finished requests on the Tk thread; keep polling while any remain."""
+        self._pump_id = None
+        while True:
+            try:
+                func, counted = self._completions.get_nowait()
+            except queue.Empty:
+                break
+            if counted:
+                with self._lock:
+                    self._outstanding -= 1
+            try:
+                func()
+            except Exception as e:
+                print(f"Error delivering database result: {e}")
+        
+        with self._lock:
+            outstanding = self._outstanding
+        if outstanding > 0 and self._pump_widget is not None:
+            self._schedule_pump(self._pump_widget)
+
+
+_db_worker: Optional[DatabaseWorker] = None
+_db_worker_lock = threading.Lock()
+
+
+def get_db_worker() -> DatabaseWorker:
+    """Get the global database worker instance."""
+    global _db_worker
+    if _db_worker is None:
+        with _db_worker_lock:
+            if _db_worker is None:
+                _db_worker = DatabaseWorker()
+    return _db_worker
+
+
+def shutdown_db_worker(wait: bool = True):
+    """Stop the global database worker if it was started."""
+    if _db_worker is not None:
+        _db_worker.shutdown(wait=wait)
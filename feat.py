@@ -133,6 +133,7 @@ class FeatManager:
     def __init__(self):
         self._db = None
         self._feats_cache: Optional[List[Feat]] = None
+        self._cache_generation: Optional[int] = None  # db.change_generation() the cache was built at
     
     @classmethod
     def get_instance(cls) -> 'FeatManager':
@@ -152,13 +153,14 @@ class FeatManager:
     
     @property
     def feats(self) -> List[Feat]:
-        """Get all feats, using cache if available."""
-        if self._feats_cache is None:
+        """Get all feats, reloading the cache when another write changed them."""
+        if self._feats_cache is None or self._cache_generation != self.db.change_generation('feats'):
             self._reload_cache()
         return self._feats_cache or []
     
     def _reload_cache(self):
         """Reload feats from database into cache."""
+        self._cache_generation = self.db.change_generation('feats')
         self._feats_cache = []
         for feat_dict in self.db.get_all_feats():
             self._feats_cache.append(self._dict_to_feat(feat_dict))
@@ -236,8 +238,6 @@ class FeatManager:
             self.db.update_feat(existing['id'], feat_dict)
         else:
             self.db.insert_feat(feat_dict)
-        
-        self._invalidate_cache()
         return True
     
     def update_feat(self, name: str, updated_feat: Feat) -> bool:
@@ -248,7 +248,6 @@ class FeatManager:
         
         feat_dict = self._feat_to_dict(updated_feat)
         result = self.db.update_feat(existing['id'], feat_dict)
-        self._invalidate_cache()
         return result
     
     def delete_feat(self, name: str) -> bool:
@@ -261,7 +260,6 @@ class FeatManager:
             return False  # Can't delete official feats
         
         result = self.db.delete_feat(existing['id'])
-        self._invalidate_cache()
         return result
     
     def search_feats(self, query: str, feat_type: Optional[str] = None) -> List[Feat]:
@@ -96,6 +96,7 @@ class LineageManager:
     def __init__(self):
         self._db = None
         self._lineages_cache: Optional[List[Lineage]] = None
+        self._cache_generation: Optional[int] = None  # db.change_generation() the cache was built at
     
     @property
     def db(self):
@@ -108,13 +109,14 @@ class LineageManager:
     
     @property
     def lineages(self) -> List[Lineage]:
-        """Get all lineages, using cache if available."""
-        if self._lineages_cache is None:
+        """Get all lineages, reloading the cache when another write changed them."""
+        if self._lineages_cache is None or self._cache_generation != self.db.change_generation('lineages'):
             self._reload_cache()
         return self._lineages_cache or []
     
     def _reload_cache(self):
         """Reload lineages from database into cache."""
+        self._cache_generation = self.db.change_generation('lineages')
         self._lineages_cache = []
         for lin_dict in self.db.get_all_lineages():
             self._lineages_cache.append(self._dict_to_lineage(lin_dict))
@@ -174,8 +176,6 @@ class LineageManager:
             self.db.update_lineage(existing['id'], lineage_dict)
         else:
             self.db.insert_lineage(lineage_dict)
-        
-        self._invalidate_cache()
         return True
     
     def remove_lineage(self, lineage_name: str) -> bool:
@@ -188,7 +188,6 @@ class LineageManager:
             return False  # Cannot remove official lineages
         
         result = self.db.delete_lineage(existing['id'])
-        self._invalidate_cache()
         return result
     
     def get_lineage(self, name: str) -> Optional[Lineage]:
@@ -56,6 +56,18 @@ def main():
                 splash.set_status("Saving data...")
                 root.update()
                 
+                # Let a running database write (import, restore) or backup finish
+                from db_worker import shutdown_db_worker
+                from backup_service import shutdown_backup_service
+                shutdown_db_worker()
+                shutdown_backup_service()
+                
+                # Refresh planner statistics / reclaim free pages if enough was written
+                splash.set_status("Optimizing database...")
+                root.update()
+                from database import SpellDatabase
+                SpellDatabase().run_shutdown_maintenance()
+                
                 # Destroy the main app window first
                 if app_ref[0]:
                     try:
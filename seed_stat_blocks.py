@@ -4,6 +4,7 @@ This script populates the database with the official stat blocks for summoning s
 Run once or call seed_stat_blocks() from main.py during first run.
 """
 
+import json
 from typing import Optional
 from database import SpellDatabase
 from stat_block import StatBlock, StatBlockFeature, AbilityScores
@@ -350,42 +351,44 @@ def get_official_stat_blocks():
 
 
 def seed_stat_blocks(db: Optional[SpellDatabase] = None):
-    """Seed the database with official stat blocks. Returns number of stat blocks added."""
+    """Seed the database with official stat blocks. Returns number of stat blocks added or updated.
+    
+    Synced as its own seed dataset, so re-running with unchanged definitions does nothing.
+    """
     if db is None:
         db = SpellDatabase()
     
-    stat_blocks = get_official_stat_blocks()
-    added_count = 0
-    
-    for spell_name, stat_block in stat_blocks:
-        # Get the spell ID
-        spell_id = db.get_spell_id_by_name(spell_name)
-        
-        if spell_id is None:
-            print(f"Warning: Spell '{spell_name}' not found in database, skipping stat block '{stat_block.name}'")
-            continue
-        
-        # Check if this stat block already exists for this spell
-        existing = db.get_stat_blocks_for_spell(spell_id)
-        if any(sb['name'] == stat_block.name for sb in existing):
-            print(f"Stat block '{stat_block.name}' already exists for '{spell_name}', skipping")
-            continue
-        
-        # Insert the stat block
-        stat_block_dict = stat_block.to_dict()
-        stat_block_dict['spell_id'] = spell_id
-        
-        try:
-            db.insert_stat_block(stat_block_dict)
-            added_count += 1
-            print(f"Added stat block '{stat_block.name}' for spell '{spell_name}'")
-        except Exception as e:
-            print(f"Error adding stat block '{stat_block.name}' for '{spell_name}': {e}")
+    rows = []
+    for spell_name, stat_block in get_official_stat_blocks():
+        data = stat_block.to_dict()
+        rows.append({
+            'spell_name': spell_name,
+            'name': data['name'],
+            'size': data['size'],
+            'creature_type': data['creature_type'],
+            'creature_subtype': data['creature_subtype'],
+            'alignment': data['alignment'],
+            'armor_class': data['armor_class'],
+            'hit_points': data['hit_points'],
+            'speed': data['speed'],
+            'abilities_json': json.dumps(data['abilities']) if data['abilities'] else None,
+            'damage_resistances': data['damage_resistances'],
+            'damage_immunities': data['damage_immunities'],
+            'condition_immunities': data['condition_immunities'],
+            'senses': data['senses'],
+            'languages': data['languages'],
+            'challenge_rating': data['challenge_rating'],
+            'traits_json': json.dumps(data['traits']),
+            'actions_json': json.dumps(data['actions']),
+            'bonus_actions_json': json.dumps(data['bonus_actions']),
+            'reactions_json': json.dumps(data['reactions']),
+            'legendary_actions_json': json.dumps(data['legendary_actions']),
+        })
     
-    return added_count
+    return db.sync_stat_block_seed(rows, dataset='seed_stat_blocks')
 
 
 if __name__ == "__main__":
     print("Seeding official stat blocks...")
     count = seed_stat_blocks()
-    print(f"\nDone! Added {count} stat blocks.")
+    print(f"\nDone! Added or updated {count} stat blocks.")
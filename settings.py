@@ -53,6 +53,12 @@ class AppSettings:
     preload_backgrounds: bool = True  # Preload backgrounds
     preload_character_sheets: bool = False  # Preload character sheet data
     
+    # Database backups (see backup_service.py)
+    auto_backup_enabled: bool = True  # Back up spellbook.db in the background after startup
+    backup_interval_hours: int = 24  # Minimum time between automatic backups
+    backup_keep_count: int = 10  # Maximum number of backups kept (oldest deleted first)
+    backup_retention_days: int = 30  # Also delete backups older than this, except the newest (0 = never)
+    
     # Internal flags (not user-configurable)
     initial_official_tag_applied: bool = False  # True after first run marks spells as Official
     
@@ -77,7 +83,8 @@ class AppSettings:
             'auto_fill_proficiencies', 'auto_apply_saving_throws',
             'warn_multiclass_removal', 'long_rest_hit_dice', 'legacy_content_filter',
             'preload_classes', 'preload_feats', 'preload_lineages', 'preload_backgrounds',
-            'preload_character_sheets'
+            'preload_character_sheets', 'auto_backup_enabled', 'backup_interval_hours',
+            'backup_keep_count', 'backup_retention_days'
         }
         filtered_data = {k: v for k, v in data.items() if k in known_fields}
         return cls(**filtered_data)
@@ -3,6 +3,7 @@ Spell data model and enums for D&D Spellbook Application.
 """
 
 import re
+import sys
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import List, Optional, Tuple, Dict
@@ -146,6 +147,27 @@ class AdvancedFilters:
     tags_filter_mode: TagFilterMode = TagFilterMode.HAS_ALL  # How to apply tag filter
 
 
+@dataclass
+class SpellListItem:
+    """Lightweight spell row for list display; load the full Spell on selection."""
+    id: int
+    name: str
+    level: int
+    ritual: bool = False
+    concentration: bool = False
+    source: str = ""
+    is_official: bool = False
+    is_modified: bool = False
+    is_legacy: bool = False
+    
+    @property
+    def display_name(self) -> str:
+        """Get the display name with asterisk for modified official spells."""
+        if self.is_official and self.is_modified:
+            return f"{self.name}*"
+        return self.name
+
+
 def range_value_to_feet(range_value: int) -> int:
     """Convert a range_value to comparable feet for filtering.
     
@@ -171,6 +193,19 @@ def range_value_to_feet(range_value: int) -> int:
         return range_value
 
 
+# Patterns like "100 gp", "5+ GP", "1 sp", "1,000 gp", "500 pp", "10 ep":
+# number followed by optional +, optional whitespace, then currency
+_CURRENCY_PATTERN = re.compile(r'\d+[,\d]*\+?\s*(?:gp|sp|cp|pp|ep|gold\s*pieces?|silver\s*pieces?|copper\s*pieces?|platinum\s*pieces?|electrum\s*pieces?)')
+# Also match "worth X" patterns like "worth at least 1 sp"
+_WORTH_PATTERN = re.compile(r'worth\s+(?:at\s+least\s+)?\d+[,\d]*\+?\s*(?:gp|sp|cp|pp|ep)')
+
+
+def components_have_cost(components: str) -> bool:
+    """Check if a components string includes a material component with a coin cost."""
+    components_lower = components.lower()
+    return bool(_CURRENCY_PATTERN.search(components_lower) or _WORTH_PATTERN.search(components_lower))
+
+
 # Protected tags that users cannot add/remove manually
 PROTECTED_TAGS = frozenset({"Official", "Unofficial"})
 # Lowercase versions for case-insensitive comparison
@@ -182,40 +217,129 @@ def is_protected_tag(tag: str) -> bool:
     return tag.lower() in _PROTECTED_TAGS_LOWER
 
 
-@dataclass
+def _intern(value):
+    """Intern a string so equal values share one object (other values pass through)."""
+    return sys.intern(value) if type(value) is str else value
+
+
+# Tuples stored by Spell list attributes; equal lists (e.g. tags) share one tuple
+_shared_tuples: Dict[tuple, tuple] = {}
+
+
+class _CompactField:
+    """
+    Spell attribute kept in the slot of the same name with a leading underscore.
+    
+    Assigned strings are interned. List attributes are stored as shared tuples
+    of interned strings and read back as a new list.
+    """
+    
+    __slots__ = ('slot', 'is_list')
+    
+    def __init__(self, is_list: bool = False):
+        self.is_list = is_list
+    
+    def __set_name__(self, owner, name: str):
+        self.slot = owner.__dict__['_' + name]  # Member descriptor created by __slots__
+    
+    def __get__(self, spell, owner=None):
+        if spell is None:
+            return self
+        value = self.slot.__get__(spell, owner)
+        return list(value) if self.is_list else value
+    
+    def __set__(self, spell, value):
+        if self.is_list:
+            value = tuple(_intern(item) for item in value)
+            value = _shared_tuples.setdefault(value, value)
+        else:
+            value = _intern(value)
+        self.slot.__set__(spell, value)
+
+
 class Spell:
-    """Represents a D&D spell with all its properties."""
-    name: str
-    level: int  # 0-9, 0 = cantrip
-    casting_time: str
-    ritual: bool
-    range_value: int  # 0 = Self, 1 = Sight, else in ft (increments of 5)
-    components: str  # V, S, M combinations
-    duration: str
-    concentration: bool
-    classes: List[CharacterClass] = field(default_factory=list)
-    class_names: List[str] = field(default_factory=list)  # Original class name strings (for custom classes)
-    description: str = ""
-    source: str = ""
-    tags: List[str] = field(default_factory=list)
-    is_modified: bool = False  # True if an official spell was edited (non-tag/source fields)
-    original_name: str = ""  # For official spells: the original name for restoration matching
-    is_legacy: bool = False  # True if this is 2014 (legacy) content
-    
-    def __post_init__(self):
-        """Ensure class_names is populated from classes if empty."""
-        if not self.class_names and self.classes:
+    """
+    Represents a D&D spell with all its properties.
+    
+    Slotted: casting time, components, duration, source, class names and
+    tags are interned, and classes, class_names and tags are stored as
+    tuples shared between spells. Reading one of those returns a new list,
+    so change them by assignment (spell.tags = spell.tags + ["Official"]).
+    """
+    
+    __slots__ = ('name', 'level', '_casting_time', 'ritual', 'range_value', '_components',
+                 '_duration', 'concentration', '_classes', '_class_names', 'description',
+                 '_source', '_tags', 'is_modified', 'original_name', 'is_legacy', 'id')
+    
+    # Constructor fields in order; all but id take part in == and repr
+    FIELD_NAMES = ('name', 'level', 'casting_time', 'ritual', 'range_value', 'components',
+                   'duration', 'concentration', 'classes', 'class_names', 'description',
+                   'source', 'tags', 'is_modified', 'original_name', 'is_legacy', 'id')
+    
+    casting_time = _CompactField()
+    components = _CompactField()  # V, S, M combinations
+    duration = _CompactField()
+    classes = _CompactField(is_list=True)
+    class_names = _CompactField(is_list=True)  # Original class name strings (for custom classes)
+    source = _CompactField()
+    tags = _CompactField(is_list=True)
+    
+    __hash__ = None  # Mutable, compared by value
+    
+    def __init__(self, name: str, level: int, casting_time: str, ritual: bool,
+                 range_value: int, components: str, duration: str, concentration: bool,
+                 classes: Optional[List[CharacterClass]] = None,
+                 class_names: Optional[List[str]] = None,
+                 description: str = "", source: str = "",
+                 tags: Optional[List[str]] = None,
+                 is_modified: bool = False, original_name: str = "",
+                 is_legacy: bool = False, id: Optional[int] = None):
+        self.name = name
+        self.level = level  # 0-9, 0 = cantrip
+        self.casting_time = casting_time
+        self.ritual = ritual
+        self.range_value = range_value  # 0 = Self, 1 = Sight, else in ft (increments of 5)
+        self.components = components
+        self.duration = duration
+        self.concentration = concentration
+        self.classes = classes or ()
+        self.class_names = class_names or ()
+        self.description = description
+        self.source = source
+        self.tags = tags or ()
+        self.is_modified = is_modified  # True if an official spell was edited (non-tag/source fields)
+        self.original_name = original_name  # For official spells: the original name for restoration matching
+        self.is_legacy = is_legacy  # True if this is 2014 (legacy) content
+        self.id = id  # Database id (None until stored)
+        
+        # Ensure class_names is populated from classes if empty
+        if not self._class_names and self._classes:
             # Populate class_names from the enum values for backward compatibility
-            self.class_names = [c.value for c in self.classes if c != CharacterClass.CUSTOM]
+            self.class_names = [c.value for c in self._classes if c != CharacterClass.CUSTOM]
+    
+    def _values(self) -> tuple:
+        return (self.name, self.level, self._casting_time, self.ritual, self.range_value,
+                self._components, self._duration, self.concentration, self._classes,
+                self._class_names, self.description, self._source, self._tags,
+                self.is_modified, self.original_name, self.is_legacy)
+    
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+    
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELD_NAMES[:-1])
+        return f"{self.__class__.__name__}({values})"
     
     def get_class_names(self) -> List[str]:
         """Get all class names including custom classes."""
-        return self.class_names.copy() if self.class_names else [c.value for c in self.classes]
+        return list(self._class_names) if self._class_names else [c.value for c in self._classes]
     
     @property
     def is_official(self) -> bool:
         """Check if this spell has the Official tag."""
-        return "Official" in self.tags
+        return "Official" in self._tags
     
     @property
     def display_name(self) -> str:
@@ -243,14 +367,7 @@ class Spell:
     @property
     def has_costly_component(self) -> bool:
         """Check if spell has a material component with gold/silver/copper/platinum/electrum cost."""
-        # Look for patterns like "100 gp", "5+ GP", "1 sp", "worth 50+ GP", "500 pp", etc.
-        components_lower = self.components.lower()
-        # Pattern matches: number followed by optional +, optional whitespace, then currency
-        # Covers: "5+ gp", "50+ gp", "100 gp", "1 sp", "1,000 gp", "500 pp", "10 ep"
-        currency_pattern = r'\d+[,\d]*\+?\s*(?:gp|sp|cp|pp|ep|gold\s*pieces?|silver\s*pieces?|copper\s*pieces?|platinum\s*pieces?|electrum\s*pieces?)'
-        # Also match "worth X" patterns like "worth at least 1 sp"
-        worth_pattern = r'worth\s+(?:at\s+least\s+)?\d+[,\d]*\+?\s*(?:gp|sp|cp|pp|ep)'
-        return bool(re.search(currency_pattern, components_lower) or re.search(worth_pattern, components_lower))
+        return components_have_cost(self.components)
     
     def display_level(self) -> str:
         """Return formatted level string."""
@@ -350,7 +467,7 @@ class Spell:
     
     def display_tags(self) -> str:
         """Return comma-separated list of tags, sorted alphabetically and capitalized."""
-        sorted_tags = sorted(self.tags, key=lambda t: t.lower())
+        sorted_tags = sorted(self._tags, key=lambda t: t.lower())
         return ", ".join(tag.capitalize() for tag in sorted_tags)
     
     def list_display_name(self) -> str:
@@ -367,8 +484,8 @@ class Spell:
     
     def to_file_line(self) -> str:
         """Serialize spell to pipe-delimited file format."""
-        classes_str = ",".join(c.value for c in self.classes)
-        tags_str = ",".join(self.tags)
+        classes_str = ",".join(c.value for c in self._classes)
+        tags_str = ",".join(self._tags)
         
         return "|".join([
             self.name,
@@ -460,7 +577,7 @@ class Spell:
                 return False
         elif class_filter is not None:
             # Fall back to enum-based filtering
-            if class_filter not in self.classes:
+            if class_filter not in self._classes:
                 return False
         
         # Advanced filters
@@ -532,7 +649,7 @@ class Spell:
             
             # Tags filter (must have ALL selected tags)
             if advanced.tags_filter:
-                spell_tags_lower = [t.lower() for t in self.tags]
+                spell_tags_lower = [t.lower() for t in self._tags]
                 for required_tag in advanced.tags_filter:
                     if required_tag.lower() not in spell_tags_lower:
                         return False
@@ -0,0 +1,552 @@
+"""
+In-memory bitset index over the spell collection for D&D Spellbook Application.
+
+Each indexed spell owns a slot number, and every filterable value keeps a
+bitset (a Python int) with the bits of the spells that have it. A filter
+combination resolves to a handful of AND/OR/AND-NOT operations on those
+ints; only the text search looks at individual spells, and only at the ones
+the other filters left (or, while the search text is being typed, the ones
+the previous, shorter text left). FilterResultCache keeps recent query results per
+normalized filter state until the index changes.
+"""
+
+import sys
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, List, Optional, Iterable, Tuple
+
+from spell import Spell, AdvancedFilters, SourceFilterMode, TagFilterMode, range_value_to_feet
+
+
+# Bit positions set in each byte value, for turning bitsets back into slots
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+
+def _bit_positions(mask: int) -> List[int]:
+    """Return the positions of the set bits of a non-negative int, ascending."""
+    positions: List[int] = []
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    for offset, byte in enumerate(data):
+        if byte:
+            base = offset * 8
+            positions.extend(base + bit for bit in _BYTE_BITS[byte])
+    return positions
+
+
+def _set_bit(bitsets: dict, key, bit: int):
+    bitsets[key] = bitsets.get(key, 0) | bit
+
+
+def _clear_bit(bitsets: dict, key, bit: int):
+    remaining = bitsets.get(key, 0) & ~bit
+    if remaining:
+        bitsets[key] = remaining
+    else:
+        bitsets.pop(key, None)
+
+
+class SpellIndex:
+    """
+    Bitset index answering SpellManager filter queries without SQL.
+    
+    Keeps per-value bitsets for level, class, tag, source, casting time,
+    duration, ritual, concentration, V/S/M, costly component and legacy
+    status, plus range in feet keyed by a sorted array of distinct values
+    (so minimum-range filters are a bisect and a few ORs). Matches follow
+    the SQL filters in SpellDatabase._build_spell_filter_query: names, tags
+    and values compare case-insensitively, sources match as substrings, and
+    results come back as database ids ordered by (level, name), to be
+    resolved through the SpellManager identity map.
+    
+    Spells are keyed by lowercased name, which the database keeps unique.
+    add, remove and replace update the bitsets of one spell; rebuild
+    reindexes the whole collection. Each of them bumps generation.
+    
+    Costs (tools/benchmark_spell_index.py): resolving the filters to a bitset
+    (match_mask) takes microseconds at any collection size, but turning the
+    matches into ordered ids, and then into Spell objects, is linear in the
+    number of matches. At 50k spells an uncached level change takes about
+    1 ms end to end, a class change about 8 ms and the unfiltered list about
+    19 ms; rebuild takes seconds, on whichever thread reloads the manager.
+    So the sub-millisecond figure holds for the mask step only.
+    
+    query keeps a stack of text searches under the current non-text
+    filters: when the search text extends a stacked one, only that search's
+    matches are rescanned, and deleting text returns to a stacked result.
+    """
+    
+    FLAG_NAMES = ('ritual', 'concentration', 'has_verbal', 'has_somatic',
+                  'has_material', 'has_costly_component', 'is_legacy')
+    SEARCH_STACK_DEPTH = 32  # Stacked search texts kept for incremental refinement
+    
+    def __init__(self, spells: Iterable[Spell] = ()):
+        self._lock = threading.RLock()
+        self._generation = 0
+        self._search_base: Optional[tuple] = None  # Non-text filter key of _search_stack
+        self._search_stack: List[Tuple[str, List[int]]] = []  # (lowercased text, sorted matching slots)
+        self.rebuild(spells)
+    
+    def rebuild(self, spells: Iterable[Spell]):
+        """Reindex from scratch; slots follow the (level, name) order, so results need no sort."""
+        with self._lock:
+            self._changed()
+            self._slots: List[Optional[int]] = []  # Database id of the spell in each slot
+            self._sort_keys: List[tuple] = []
+            self._texts: List[str] = []
+            self._entries: List[tuple] = []  # Per slot: (_index_keys pairs, non-legacy names)
+            self._slot_by_name: Dict[str, int] = {}
+            self._free_slots: List[int] = []
+            self._ordered = True  # Ascending slots are in (level, name) order
+            self._last_key: Optional[tuple] = None
+            self._all = 0
+            self._levels: Dict[int, int] = {}
+            self._classes: Dict[str, int] = {}
+            self._tags: Dict[str, int] = {}
+            self._sources: Dict[str, int] = {}
+            self._casting_times: Dict[str, int] = {}
+            self._durations: Dict[str, int] = {}
+            self._flags: Dict[str, int] = {}
+            self._range_feet: Dict[int, int] = {}
+            self._range_keys: List[int] = []  # Sorted distinct range_feet values
+            # Legacy twins: legacy spells per name, and how many non-legacy
+            # spells carry each name (directly or as original_name)
+            self._legacy_by_name: Dict[str, int] = {}
+            self._modern_names: Dict[str, int] = {}
+            self._twin_mask: Optional[int] = None
+            # Collect each bitset's slots first; OR-ing bits in one by one would
+            # copy a growing int per spell
+            pending: Dict[tuple, tuple] = {}
+            for spell in sorted(spells, key=self._sort_key):
+                self._insert(spell, pending)
+            size = (len(self._slots) + 7) // 8
+            for bitsets, value, slots in pending.values():
+                data = bytearray(size)
+                for slot in slots:
+                    data[slot >> 3] |= 1 << (slot & 7)
+                bitsets[value] = int.from_bytes(data, 'little')
+            self._all = (1 << len(self._slots)) - 1
+            self._range_keys = sorted(self._range_feet)
+    
+    def __len__(self) -> int:
+        return len(self._slot_by_name)
+    
+    @property
+    def generation(self) -> int:
+        """Counter bumped by every change to the indexed collection."""
+        return self._generation
+    
+    def _changed(self):
+        """Start a new generation; stacked search results hold slots that may be reused."""
+        self._generation += 1
+        self._search_base = None
+        self._search_stack = []
+    
+    @staticmethod
+    def _sort_key(spell: Spell) -> tuple:
+        return (spell.level, spell.name.lower())
+    
+    @staticmethod
+    def _modern_keys(spell: Spell) -> set:
+        keys = {spell.name.lower()}
+        if spell.original_name:
+            keys.add(spell.original_name.lower())
+        return keys
+    
+    def add(self, spell: Spell):
+        """Index a new spell (replacing any indexed spell with the same name)."""
+        with self._lock:
+            self._changed()
+            self._delete(spell.name.lower())
+            self._insert(spell)
+    
+    def remove(self, name: str) -> bool:
+        """Drop a spell by name (case-insensitive). Returns False if it was not indexed."""
+        with self._lock:
+            self._changed()
+            return self._delete(name.lower())
+    
+    def replace(self, old_name: str, spell: Spell):
+        """Reindex a spell after an edit; old_name is its name before the edit."""
+        with self._lock:
+            self._changed()
+            self._delete(old_name.lower())
+            self._delete(spell.name.lower())
+            self._insert(spell)
+    
+    def _index_keys(self, spell: Spell) -> tuple:
+        """The (bitset map, value) pairs a spell sets its bit in."""
+        components = (spell.components or "").upper()
+        flags = self._flags
+        pairs = [
+            (self._levels, spell.level),
+            (self._sources, (spell.source or "").lower()),
+            (self._casting_times, (spell.casting_time or "").lower()),
+            (self._durations, (spell.duration or "").lower()),
+            (self._range_feet, range_value_to_feet(spell.range_value)),
+        ]
+        pairs += [(self._classes, name) for name in {name.lower() for name in spell.get_class_names()}]
+        pairs += [(self._tags, tag) for tag in {tag.lower() for tag in spell.tags}]
+        pairs += [(flags, flag) for flag, is_set in zip(self.FLAG_NAMES, (
+            spell.ritual, spell.concentration, "V" in components, "S" in components,
+            "M" in components, spell.has_costly_component, spell.is_legacy)) if is_set]
+        if spell.is_legacy:
+            pairs.append((self._legacy_by_name, spell.name.lower()))
+        return tuple(pairs)
+    
+    def _insert(self, spell: Spell, pending: Optional[Dict[tuple, tuple]] = None):
+        """Give a spell a slot and set its bits (or, from rebuild, collect them in pending)."""
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = len(self._slots)
+            self._slots.append(None)
+            self._sort_keys.append(())
+            self._texts.append("")
+            self._entries.append(((), ()))
+        bit = 1 << slot
+        key = self._sort_key(spell)
+        # Only appending in (level, name) order keeps ascending slots sorted
+        if self._ordered:
+            if slot == len(self._slots) - 1 and (self._last_key is None or key >= self._last_key):
+                self._last_key = key
+            else:
+                self._ordered = False
+        self._slots[slot] = spell.id
+        self._sort_keys[slot] = key
+        # Separators keep a search from matching across fields
+        self._texts[slot] = "\n".join([spell.name, spell.description, *spell.tags]).lower()
+        self._slot_by_name[key[1]] = slot
+        
+        # Recorded so removal clears the same bits even if the spell was edited in place
+        pairs = self._index_keys(spell)
+        if pending is not None:
+            for bitsets, value in pairs:
+                pending.setdefault((id(bitsets), value), (bitsets, value, []))[2].append(slot)
+        else:
+            self._all |= bit
+            for bitsets, value in pairs:
+                if bitsets is self._range_feet and value not in bitsets:
+                    insort(self._range_keys, value)
+                _set_bit(bitsets, value, bit)
+        modern_names = () if spell.is_legacy else tuple(self._modern_keys(spell))
+        for name in modern_names:
+            self._modern_names[name] = self._modern_names.get(name, 0) + 1
+        self._entries[slot] = (pairs, modern_names)
+        self._twin_mask = None
+    
+    def _delete(self, name: str) -> bool:
+        slot = self._slot_by_name.pop(name, None)
+        if slot is None:
+            return False
+        bit = 1 << slot
+        self._all &= ~bit
+        
+        pairs, modern_names = self._entries[slot]
+        for bitsets, value in pairs:
+            _clear_bit(bitsets, value, bit)
+            if bitsets is self._range_feet and value not in bitsets:
+                del self._range_keys[bisect_left(self._range_keys, value)]
+        for modern_name in modern_names:
+            count = self._modern_names[modern_name] - 1
+            if count:
+                self._modern_names[modern_name] = count
+            else:
+                del self._modern_names[modern_name]
+        self._twin_mask = None
+        
+        self._slots[slot] = None
+        self._texts[slot] = ""
+        self._entries[slot] = ((), ())
+        self._free_slots.append(slot)
+        return True
+    
+    def _legacy_twins(self) -> int:
+        """Bitset of legacy spells that have a non-legacy version (cached until the next change)."""
+        if self._twin_mask is None:
+            mask = 0
+            for name, bits in self._legacy_by_name.items():
+                if name in self._modern_names:
+                    mask |= bits
+            self._twin_mask = mask
+        return self._twin_mask
+    
+    def _apply_flag(self, mask: int, flag: str, wanted: Optional[bool]) -> int:
+        if wanted is None:
+            return mask
+        bits = self._flags.get(flag, 0)
+        return mask & bits if wanted else mask & ~bits
+    
+    def match_mask(self, level: int = -1, class_name: str = "",
+                   advanced: Optional[AdvancedFilters] = None,
+                   legacy_filter: str = "show_all",
+                   visible_classes: Optional[List[str]] = None) -> int:
+        """
+        Resolve every filter except the search text to a bitset of slots.
+        
+        Args:
+            (as documented on query)
+        """
+        with self._lock:
+            mask = self._all
+            if level >= 0:
+                mask &= self._levels.get(level, 0)
+            if class_name:
+                mask &= self._classes.get(class_name.lower(), 0)
+            
+            if advanced:
+                mask = self._apply_flag(mask, 'ritual', advanced.ritual_filter)
+                mask = self._apply_flag(mask, 'concentration', advanced.concentration_filter)
+                mask = self._apply_flag(mask, 'has_verbal', advanced.has_verbal)
+                mask = self._apply_flag(mask, 'has_somatic', advanced.has_somatic)
+                mask = self._apply_flag(mask, 'has_material', advanced.has_material)
+                mask = self._apply_flag(mask, 'has_costly_component', advanced.costly_component)
+                
+                if advanced.min_range != 0:
+                    in_range = 0
+                    start = bisect_left(self._range_keys, range_value_to_feet(advanced.min_range))
+                    for feet in self._range_keys[start:]:
+                        in_range |= self._range_feet[feet]
+                    mask &= in_range
+                
+                if advanced.casting_time_filter:
+                    mask &= self._casting_times.get(advanced.casting_time_filter.lower(), 0)
+                if advanced.duration_filter:
+                    mask &= self._durations.get(advanced.duration_filter.lower(), 0)
+                
+                # Sources match as case-insensitive substrings, like instr(source_key, ?)
+                if advanced.source_filter:
+                    wanted = [source.lower() for source in advanced.source_filter]
+                    matching = 0
+                    for source, bits in self._sources.items():
+                        if any(part in source for part in wanted):
+                            matching |= bits
+                    if advanced.source_filter_mode == SourceFilterMode.EXCLUDE:
+                        mask &= ~matching
+                    else:
+                        mask &= matching
+                
+                if advanced.tags_filter:
+                    tag_bits = [self._tags.get(tag.lower(), 0) for tag in advanced.tags_filter]
+                    if advanced.tags_filter_mode == TagFilterMode.HAS_ALL:
+                        for bits in tag_bits:
+                            mask &= bits
+                    else:
+                        any_tag = 0
+                        for bits in tag_bits:
+                            any_tag |= bits
+                        if advanced.tags_filter_mode == TagFilterMode.HAS_ANY:
+                            mask &= any_tag
+                        else:
+                            mask &= ~any_tag
+            
+            legacy = self._flags.get('is_legacy', 0)
+            if legacy_filter == "no_legacy":
+                mask &= ~legacy
+            elif legacy_filter == "legacy_only":
+                mask &= legacy
+            elif legacy_filter == "show_unupdated":
+                mask &= ~self._legacy_twins()
+            
+            # Hide spells whose classes are all missing from the system
+            if visible_classes is not None:
+                visible = 0
+                for class_name in {name.lower() for name in visible_classes}:
+                    visible |= self._classes.get(class_name, 0)
+                mask &= visible
+            return mask
+    
+    def _sorted_slots(self, mask: int) -> List[int]:
+        """Return the slots of a bitset in (level, name) order."""
+        slots = _bit_positions(mask)
+        if not self._ordered:
+            slots.sort(key=self._sort_keys.__getitem__)
+        return slots
+    
+    def _search_slots(self, slots: List[int], needle: str) -> List[int]:
+        """Keep the slots whose text contains needle (already lowercased), in order."""
+        texts = self._texts
+        return [slot for slot in slots if needle in texts[slot]]
+    
+    def ids_for_mask(self, mask: int, search_text: str = "") -> List[int]:
+        """Return the spell ids of a bitset in (level, name) order, narrowed by search_text."""
+        with self._lock:
+            slots = self._sorted_slots(mask)
+            if search_text:
+                slots = self._search_slots(slots, search_text.lower())
+            return [self._slots[slot] for slot in slots]
+    
+    def query(self, search_text: str = "", level: int = -1, class_name: str = "",
+              advanced: Optional[AdvancedFilters] = None,
+              legacy_filter: str = "show_all",
+              visible_classes: Optional[List[str]] = None) -> List[int]:
+        """
+        Return the ids of the indexed spells matching a filter state, ordered by (level, name).
+        
+        Args:
+            search_text: Case-insensitive substring of the name, description or a tag
+            level: Spell level (-1 for all)
+            class_name: Class name (case-insensitive, custom classes included)
+            advanced: Advanced filter options
+            legacy_filter: "show_all", "show_unupdated", "no_legacy" or "legacy_only"
+            visible_classes: Drop spells with none of these classes (None for no check)
+        """
+        base = FilterResultCache.make_key("", level, class_name, advanced, legacy_filter, visible_classes)
+        needle = search_text.lower()
+        with self._lock:
+            stack = self._search_stack
+            if base != self._search_base:
+                stack.clear()
+                self._search_base = base
+            # Matches of a longer text are a subset of the matches of its prefix,
+            # so refine the longest stacked prefix (after backspacing, reuse it as is)
+            while stack and not needle.startswith(stack[-1][0]):
+                stack.pop()
+            if not stack:
+                mask = self.match_mask(level, class_name, advanced, legacy_filter, visible_classes)
+                stack.append(("", self._sorted_slots(mask)))
+            text, slots = stack[-1]
+            if text != needle:
+                slots = self._search_slots(slots, needle)
+                stack.append((needle, slots))
+                if len(stack) > self.SEARCH_STACK_DEPTH:
+                    del stack[1]  # Keep the unsearched root
+            return [self._slots[slot] for slot in slots]
+
+
+class FilterResultCache:
+    """
+    LRU cache of filter results (spell id tuples) keyed by normalized filter state.
+    
+    Entries belong to one SpellIndex generation; the first lookup under a
+    newer generation drops them all. The least recently used entries are
+    evicted once the estimated size of the cached results exceeds max_bytes.
+    Safe to share between the Tk thread and the database worker.
+    """
+    
+    ENTRY_OVERHEAD = 200  # Rough bytes per entry beyond its key and id tuple (dict node, bookkeeping)
+    
+    def __init__(self, max_bytes: int):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Tuple[tuple, int]]" = OrderedDict()  # key -> (ids, size)
+        self._generation: Optional[int] = None
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+    
+    @staticmethod
+    def make_key(search_text: str = "", level: int = -1, class_name: str = "",
+                 advanced: Optional[AdvancedFilters] = None,
+                 legacy_filter: str = "show_all",
+                 visible_classes: Optional[Iterable[str]] = None) -> tuple:
+        """
+        Canonical, hashable form of a SpellIndex.query filter state.
+        
+        Filter states that SpellIndex.query treats alike map to the same key:
+        text compares case-insensitively, list filters ignore order and
+        duplicates, and default advanced filters equal no advanced filters.
+        """
+        advanced_key = None
+        if advanced is not None:
+            advanced_key = FilterResultCache._advanced_key(advanced)
+            if advanced_key == _DEFAULT_ADVANCED_KEY:
+                advanced_key = None
+        visible_key = None
+        if visible_classes is not None:
+            visible_key = frozenset(name.lower() for name in visible_classes)
+        return (search_text.lower(), level if level >= 0 else -1, class_name.lower(),
+                advanced_key, legacy_filter, visible_key)
+    
+    @staticmethod
+    def _advanced_key(advanced: AdvancedFilters) -> tuple:
+        sources = frozenset(source.lower() for source in advanced.source_filter)
+        tags = frozenset(tag.lower() for tag in advanced.tags_filter)
+        return (
+            advanced.ritual_filter, advanced.concentration_filter, advanced.min_range,
+            advanced.has_verbal, advanced.has_somatic, advanced.has_material,
+            advanced.costly_component,
+            advanced.casting_time_filter.lower(), advanced.duration_filter.lower(),
+            sources, advanced.source_filter_mode.value if sources else None,
+            tags, advanced.tags_filter_mode.value if tags else None,
+        )
+    
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+    
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        with self._lock:
+            self._max_bytes = value
+            self._evict()
+    
+    def get(self, key: tuple, generation: int) -> Optional[tuple]:
+        """Return the cached ids for a key under an index generation, or None (a miss)."""
+        with self._lock:
+            if generation != self._generation:
+                if self._entries:
+                    self._invalidations += 1
+                self._entries.clear()
+                self._bytes = 0
+                self._generation = generation
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+    
+    def put(self, key: tuple, generation: int, ids: tuple):
+        """Cache the ids computed for a key; dropped if the index has moved on since get."""
+        size = sys.getsizeof(ids) + sys.getsizeof(key) + len(key[0]) + self.ENTRY_OVERHEAD
+        with self._lock:
+            if generation != self._generation or size > self._max_bytes:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (ids, size)
+            self._bytes += size
+            self._evict()
+    
+    def _evict(self):
+        while self._bytes > self._max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._evictions += 1
+    
+    def clear(self):
+        """Drop every entry (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> dict:
+        """
+        Return cache statistics.
+        
+        Returns:
+            Dict with 'hits', 'misses', 'hit_rate' (0.0-1.0), 'evictions',
+            'invalidations' (generation changes that dropped entries),
+            'entries', 'bytes' (estimated) and 'max_bytes'
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self._max_bytes,
+            }
+
+
+# Advanced filter key of AdvancedFilters() (filters nothing)
+_DEFAULT_ADVANCED_KEY = FilterResultCache._advanced_key(AdvancedFilters())
@@ -5,9 +5,13 @@ Handles spell collection management with SQLite database persistence.
 
 import os
 import sys
-from typing import List, Optional, Callable, Set
-from spell import Spell, CharacterClass, AdvancedFilters, PROTECTED_TAGS
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Callable, Set, Tuple
+from spell import Spell, SpellListItem, CharacterClass, AdvancedFilters, PROTECTED_TAGS, is_protected_tag
 from database import SpellDatabase
+from db_worker import get_db_worker
+from spell_index import SpellIndex, FilterResultCache
 
 
 def get_resource_path(relative_path: str) -> str:
@@ -32,18 +36,159 @@ EXCLUDED_SPELLS: Set[str] = {
 import shutil
 
 
+class SpellIdentityMap:
+    """
+    One Spell instance per database id, per database file, for the session.
+    
+    Every SpellManager of a database file, and the UI lookups that load spells
+    outside a manager, resolve spell rows through the same map. Manager reloads
+    and edits update the existing instance in place (UI lookups only read it,
+    see lookup), so a spell is never duplicated and object identity can be
+    used to diff UI state.
+    """
+    
+    # Database file -> its identity map
+    _maps: Dict[str, "SpellIdentityMap"] = {}
+    _maps_lock = threading.Lock()
+    
+    def __init__(self):
+        self._spells: Dict[int, Spell] = {}
+        self._lock = threading.RLock()
+    
+    @classmethod
+    def for_database(cls, db_path: str) -> "SpellIdentityMap":
+        """Get the identity map shared by everything using the database at db_path."""
+        key = os.path.abspath(db_path)
+        with cls._maps_lock:
+            if key not in cls._maps:
+                cls._maps[key] = cls()
+            return cls._maps[key]
+    
+    def __len__(self) -> int:
+        return len(self._spells)
+    
+    def get(self, spell_id: int) -> Optional[Spell]:
+        """Return the session's instance for a spell id, if it has been loaded."""
+        return self._spells.get(spell_id)
+    
+    def get_many(self, spell_ids: Iterable[int]) -> List[Spell]:
+        """Resolve a list of spell ids, skipping ids that are not loaded."""
+        spells = self._spells
+        return [spells[spell_id] for spell_id in spell_ids if spell_id in spells]
+    
+    def add(self, spell: Spell):
+        """Register a stored spell (spell.id must be set)."""
+        with self._lock:
+            self._spells[spell.id] = spell
+    
+    def discard(self, spell_id: Optional[int]):
+        """Forget a deleted spell."""
+        with self._lock:
+            self._spells.pop(spell_id, None)
+    
+    def resolve(self, data: dict) -> Spell:
+        """Return the instance for a database spell dict, creating or refreshing it."""
+        with self._lock:
+            spell = self._spells.get(data.get('id'))
+            if spell is None:
+                spell = SpellManager._dict_to_spell(data)
+                if spell.id is not None:
+                    self._spells[spell.id] = spell
+            else:
+                self.update(spell, data)
+            return spell
+    
+    def resolve_all(self, spell_dicts: List[dict], prune: bool = False) -> List[Spell]:
+        """
+        Resolve many database spell dicts.
+        
+        Args:
+            prune: spell_dicts is the whole collection; forget spells missing from it
+        """
+        with self._lock:
+            spells = [self.resolve(data) for data in spell_dicts]
+            if prune:
+                self._spells = {spell.id: spell for spell in spells if spell.id is not None}
+            return spells
+    
+    def lookup(self, data: dict) -> Spell:
+        """
+        Return the loaded instance for a database spell dict without refreshing it.
+        
+        For readers outside a SpellManager (UI lookups): refreshing an instance
+        in place would change spells under the manager's index and filter
+        cache, so only the manager updates loaded instances. Spells not loaded
+        yet are created and registered.
+        """
+        with self._lock:
+            spell = self._spells.get(data.get('id'))
+            if spell is None:
+                spell = self.resolve(data)
+            return spell
+    
+    def lookup_all(self, spell_dicts: List[dict]) -> List[Spell]:
+        """lookup() for many database spell dicts."""
+        with self._lock:
+            return [self.lookup(data) for data in spell_dicts]
+    
+    def load(self, db: SpellDatabase, spell_id: int) -> Optional[Spell]:
+        """Return the instance for a spell id, reading the database only on a miss."""
+        spell = self._spells.get(spell_id)
+        if spell is None:
+            data = db.get_spell_by_id(spell_id)
+            if data:
+                spell = self.resolve(data)
+        return spell
+    
+    @staticmethod
+    def update(spell: Spell, data: dict):
+        """Refresh a spell in place from a database spell dict."""
+        spell.name = data['name']
+        spell.level = data['level']
+        spell.casting_time = data['casting_time']
+        spell.ritual = data.get('ritual', False)
+        spell.range_value = data['range_value']
+        spell.components = data['components']
+        spell.duration = data['duration']
+        spell.concentration = data.get('concentration', False)
+        spell.description = data.get('description', '')
+        spell.source = data.get('source', '')
+        spell.tags = list(data.get('tags', []))
+        spell.is_modified = data.get('is_modified', False)
+        spell.original_name = data.get('original_name', '')
+        spell.is_legacy = data.get('is_legacy', False)
+        class_names = list(data.get('classes', []))
+        if class_names != spell.class_names:
+            # Only re-derive the enums when the classes changed
+            spell.class_names = class_names
+            spell.classes = SpellManager._classes_from_names(class_names)
+        if data.get('id') is not None:
+            spell.id = data['id']
+    
+    @staticmethod
+    def assign(spell: Spell, edited: Spell):
+        """Copy an edited copy's fields into the session's instance (keeping its id)."""
+        for field_name in Spell.FIELD_NAMES:
+            if field_name != 'id':
+                setattr(spell, field_name, getattr(edited, field_name))
+
+
 class SpellManager:
     """Manages a collection of spells with SQLite database persistence."""
     
     DEFAULT_DB_PATH = "spellbook.db"
     LEGACY_FILE_NAME = "spells.txt"  # For migration and import/export
+    FILTER_REQUEST_KEY = "spell_filter"  # Database worker key for superseding filter queries
+    FILTER_CACHE_BYTES = 4 * 1024 * 1024  # Default memory budget for cached filter results
     
-    def __init__(self, db_path: Optional[str] = None):
-        """Initialize the spell manager with an optional database path."""
+    def __init__(self, db_path: Optional[str] = None, filter_cache_bytes: Optional[int] = None):
+        """Initialize the spell manager with an optional database path and filter cache budget."""
         self.db_path = db_path or self.DEFAULT_DB_PATH
         
-        # If database doesn't exist, try to copy from bundled location
-        if not os.path.exists(self.db_path):
+        # A new database is layered on the bundled official database when there is
+        # one (see SpellDatabase.initialize); otherwise copy the bundled spellbook.db
+        if (not os.path.exists(self.db_path)
+                and not SpellDatabase.official_db_is_usable(SpellDatabase.default_official_db_path())):
             bundled_db = get_resource_path(self.DEFAULT_DB_PATH)
             if bundled_db != self.db_path and os.path.exists(bundled_db):
                 try:
@@ -54,6 +199,11 @@ class SpellManager:
         
         self._db = SpellDatabase(self.db_path)
         self._spells: List[Spell] = []
+        self._index = SpellIndex()  # Bitset index over _spells for get_filtered_spells
+        self._filter_cache = FilterResultCache(
+            self.FILTER_CACHE_BYTES if filter_cache_bytes is None else filter_cache_bytes)
+        self._identity_map = SpellIdentityMap.for_database(self.db_path)
+        self._spells_generation: Optional[int] = None  # _db.change_generation('spells') _spells reflects
         self._listeners: List[Callable[[], None]] = []
     
     @property
@@ -76,7 +226,20 @@ class SpellManager:
             self._listeners.remove(callback)
     
     def _notify_listeners(self):
-        """Notify all listeners of a change."""
+        """Notify all listeners of a change.
+        
+        Listeners update Tk widgets, so a change made on the database worker
+        thread is notified on the Tk thread instead. Inside a unit of work
+        (SpellDatabase.transaction) listeners are notified once, after commit.
+        Every notification follows a write already applied to the in-memory
+        list, so the spell data generation is recorded as seen here.
+        """
+        if self._db.defer_until_commit(self._notify_listeners):
+            return
+        if threading.current_thread() is not threading.main_thread():
+            get_db_worker().call_in_tk(self._notify_listeners)
+            return
+        self._spells_generation = self._db.change_generation('spells')
         for listener in self._listeners:
             listener()
     
@@ -102,18 +265,23 @@ class SpellManager:
             'is_legacy': spell.is_legacy
         }
     
-    def _dict_to_spell(self, data: dict) -> Spell:
-        """Convert a database dictionary to a Spell object."""
-        # Keep the original class name strings
-        class_names = data.get('classes', [])
-        
-        # Convert to enum values for backward compatibility
+    @staticmethod
+    def _classes_from_names(class_names: List[str]) -> List[CharacterClass]:
+        """Convert class name strings to enum values for backward compatibility."""
         classes = []
         for class_name in class_names:
             try:
                 classes.append(CharacterClass.from_string(class_name))
             except ValueError:
                 pass  # Skip unknown classes
+        return classes
+    
+    @staticmethod
+    def _dict_to_spell(data: dict) -> Spell:
+        """Convert a database dictionary to a new Spell object (see SpellIdentityMap.resolve)."""
+        # Keep the original class name strings
+        class_names = data.get('classes', [])
+        classes = SpellManager._classes_from_names(class_names)
         
         return Spell(
             name=data['name'],
@@ -131,30 +299,51 @@ class SpellManager:
             tags=data.get('tags', []),
             is_modified=data.get('is_modified', False),
             original_name=data.get('original_name', ''),
-            is_legacy=data.get('is_legacy', False)
+            is_legacy=data.get('is_legacy', False),
+            id=data.get('id')
         )
     
+    def _set_spells(self, spell_dicts: List[dict]):
+        """Replace the in-memory spell list (and its filter index) with database rows."""
+        self._spells = self._identity_map.resolve_all(spell_dicts, prune=True)
+        self._spells.sort(key=lambda s: (s.level, s.name.lower()))
+        self._index.rebuild(self._spells)
+    
+    def _apply_spell_rows(self, spell_dicts: List[dict]):
+        """Replace the in-memory spells with database rows and notify listeners (Tk thread)."""
+        self._set_spells(spell_dicts)
+        self._notify_listeners()
+    
+    def _apply_spell_rows_in_tk(self, spell_dicts: List[dict]):
+        """Hand rows read on the database worker to _apply_spell_rows on the Tk thread.
+        
+        The in-memory list, its index and the shared Spell instances are only
+        changed on the Tk thread. Queued ahead of the worker request's result,
+        so it runs before the caller's deliver() callback.
+        """
+        get_db_worker().call_in_tk(lambda: self._apply_spell_rows(spell_dicts))
+    
+    def _read_spell_rows(self) -> List[dict]:
+        """Prepare the database (schema, initial data, seed updates) and return every spell row."""
+        # Initialize database (creates tables if needed)
+        self._db.initialize()
+        
+        # Check if we need to populate with initial spell data
+        if self._db.get_spell_count() == 0:
+            print("Populating database with initial spell data...")
+            count = self._db.populate_initial_spells()
+            print(f"Populated {count} spells into the database.")
+        else:
+            # Apply bundled seed data that changed since the last launch
+            self._db.sync_seed_data()
+        
+        # Load all spells from database
+        return self._db.get_all_spells()
+    
     def load_spells(self) -> bool:
         """Load spells from the database. Returns True if successful."""
         try:
-            # Initialize database (creates tables if needed)
-            self._db.initialize()
-            
-            # Check if we need to populate with initial spell data
-            if self._db.get_spell_count() == 0:
-                print("Populating database with initial spell data...")
-                count = self._db.populate_initial_spells()
-                print(f"Populated {count} spells into the database.")
-            else:
-                # Sync any new stat blocks for existing databases
-                self._db._populate_initial_stat_blocks()
-            
-            # Load all spells from database
-            spell_dicts = self._db.get_all_spells()
-            self._spells = [self._dict_to_spell(d) for d in spell_dicts]
-            self._spells.sort(key=lambda s: (s.level, s.name.lower()))
-            
-            self._notify_listeners()
+            self._apply_spell_rows(self._read_spell_rows())
             return True
             
         except Exception as e:
@@ -220,11 +409,13 @@ class SpellManager:
                 spell.tags = spell.tags + ["Unofficial"]
             
             # Insert into database
-            self._db.insert_spell(self._spell_to_dict(spell))
+            spell.id = self._db.insert_spell(self._spell_to_dict(spell))
+            self._identity_map.add(spell)
             
             # Update in-memory list
             self._spells.append(spell)
             self._spells.sort(key=lambda s: (s.level, s.name.lower()))
+            self._index.add(spell)
             
             self._notify_listeners()
             return True
@@ -264,11 +455,12 @@ class SpellManager:
                 if progress_callback and (i + 1) % 20 == 0:
                     progress_callback(i + 1, total)
             
-            # Bulk insert to database (single transaction)
-            inserted = self._db.bulk_insert_spells(spell_dicts)
-            
-            # Reload in-memory list once (already sorted by database query)
-            self.load_spells()
+            # Insert as one unit of work (joins a caller's transaction)
+            with self._db.transaction():
+                inserted = self._db.bulk_insert_spells(spell_dicts)
+                
+                # Reload the in-memory list once the rows are committed
+                self._db.defer_until_commit(self.reload_from_database)
             
             # Final progress update
             if progress_callback:
@@ -309,13 +501,11 @@ class SpellManager:
             # Update in database
             self._db.update_spell(spell_id, self._spell_to_dict(updated_spell))
             
-            # Update in-memory list
-            for i, spell in enumerate(self._spells):
-                if spell.name.lower() == old_name.lower():
-                    self._spells[i] = updated_spell
-                    break
-            
-            self._spells.sort(key=lambda s: (s.level, s.name.lower()))
+            # Update the session's instance in place (see SpellIdentityMap)
+            if original_spell is not None:
+                self._identity_map.assign(original_spell, updated_spell)
+                self._spells.sort(key=lambda s: (s.level, s.name.lower()))
+                self._index.replace(old_name, original_spell)
             self._notify_listeners()
             return True
             
@@ -323,6 +513,36 @@ class SpellManager:
             print(f"Error updating spell: {e}")
             return False
     
+    def bulk_edit_spells(self, spell_names: List[str],
+                         add_tags: Optional[List[str]] = None,
+                         remove_tags: Optional[List[str]] = None,
+                         add_classes: Optional[List[str]] = None,
+                         remove_classes: Optional[List[str]] = None) -> int:
+        """
+        Add/remove tags and classes on many spells in a single transaction.
+        Protected tags (Official/Unofficial) are ignored, as in the spell editor.
+        
+        Returns:
+            Number of class/tag links added or removed
+        """
+        add_tags = [t for t in (add_tags or []) if not is_protected_tag(t)]
+        remove_tags = [t for t in (remove_tags or []) if not is_protected_tag(t)]
+        try:
+            changed = self._db.bulk_edit_spells(
+                spell_names,
+                add_tags=add_tags,
+                remove_tags=remove_tags,
+                add_classes=add_classes,
+                remove_classes=remove_classes
+            )
+        except Exception as e:
+            print(f"Error in bulk_edit_spells: {e}")
+            return 0
+        
+        if changed:
+            self.reload_from_database()
+        return changed
+    
     def restore_spell_to_default(self, spell_name: str) -> bool:
         """
         Restore a modified official spell to its original default values.
@@ -379,16 +599,15 @@ class SpellManager:
                 'is_modified': False
             }
             
-            # Update in database
-            self._db.update_spell(spell_id, restore_data)
+            # Update in database (an overlay drops the user's copy instead)
+            if not self._db.restore_official_spell(spell_id, restore_data):
+                return True  # Nothing to undo
             
-            # Update in-memory list
-            restore_data['original_name'] = original_data['name']  # Ensure original_name is set
-            restored_spell = self._dict_to_spell(restore_data)
-            for i, spell in enumerate(self._spells):
-                if spell.name.lower() == spell_name.lower():
-                    self._spells[i] = restored_spell
-                    break
+            # Update the session's instance in place from the restored row
+            restored = self._db.get_spell_by_id(spell_id)
+            if restored:
+                self._identity_map.update(spell_to_restore, restored)
+                self._index.replace(spell_name, spell_to_restore)
             
             self._notify_listeners()
             return True
@@ -403,20 +622,33 @@ class SpellManager:
         Uses original_name to find the original spell data even if renamed.
         Returns the number of spells restored.
         """
+        count = self._restore_official_rows(self._modified_official_spells())
+        if count > 0:
+            self.reload_from_database()
+        return count
+    
+    def _modified_official_spells(self) -> List[tuple]:
+        """(name, original_name) of the in-memory spells restore_all_official_spells resets."""
+        return [(spell.name, spell.original_name) for spell in self._spells
+                if spell.is_official and spell.is_modified]
+    
+    def _restore_official_rows(self, targets: List[tuple]) -> int:
+        """Restore the (name, original_name) targets to their official data; database only."""
         try:
             from tools.spell_data import get_all_spells
             
             # Build a lookup of original spell data
             original_spells = {spell_data['name'].lower(): spell_data for spell_data in get_all_spells()}
             
-            count = 0
-            for spell in self._spells:
-                if spell.is_official and spell.is_modified:
+            # One transaction (one commit) for every restored spell
+            with self._db.transaction():
+                count = 0
+                for name, original_name in targets:
                     # Use original_name if available, otherwise use current name
-                    lookup_name = spell.original_name if spell.original_name else spell.name
+                    lookup_name = original_name if original_name else name
                     original_data = original_spells.get(lookup_name.lower())
                     if original_data:
-                        spell_id = self._db.get_spell_id_by_name(spell.name)
+                        spell_id = self._db.get_spell_id_by_name(name)
                         if spell_id:
                             restore_data = {
                                 'name': original_data['name'],
@@ -433,13 +665,8 @@ class SpellManager:
                                 'tags': original_data['tags'],
                                 'is_modified': False
                             }
-                            self._db.update_spell(spell_id, restore_data)
-                            count += 1
-            
-            # Reload spells if any were restored
-            if count > 0:
-                self.load_spells()
-                self._notify_listeners()
+                            if self._db.restore_official_spell(spell_id, restore_data):
+                                count += 1
             
             return count
             
@@ -447,6 +674,48 @@ class SpellManager:
             print(f"Error restoring all official spells: {e}")
             return 0
     
+    def restore_all_official_spells_async(self) -> Future:
+        """Run restore_all_official_spells' database writes on the database worker thread.
+        
+        Returns a Future resolving to the number of spells restored; the spell
+        list is reloaded and listeners are notified on the Tk thread.
+        """
+        targets = self._modified_official_spells()  # Read here, on the Tk thread
+        
+        def run() -> int:
+            count = self._restore_official_rows(targets)
+            if count > 0:
+                self._apply_spell_rows_in_tk(self._db.get_all_spells())
+            return count
+        
+        return get_db_worker().submit(run)
+    
+    def restore_from_backup_async(self, backup_path: str, backup_service=None) -> Future:
+        """
+        Restore the database from a backup on the database worker thread.
+        
+        Returns a Future resolving to True on success; the spell list is
+        reloaded and listeners are notified on the Tk thread.
+        """
+        def run() -> bool:
+            from backup_service import get_backup_service
+            service = backup_service or get_backup_service()
+            if not service.restore(backup_path):
+                return False
+            self._apply_spell_rows_in_tk(self._read_spell_rows())
+            return True
+        
+        return get_db_worker().submit(run)
+    
+    def run_idle_maintenance_async(self) -> Future:
+        """
+        Run database maintenance on the database worker if it is due and the database is idle.
+        
+        Returns a Future resolving to the maintenance report ({} if nothing ran);
+        see SpellDatabase.run_maintenance.
+        """
+        return get_db_worker().submit(self._db.run_maintenance_if_idle)
+    
     def _has_gameplay_changes(self, original: Spell, updated: Spell) -> bool:
         """
         Check if an official spell has gameplay-relevant changes.
@@ -490,27 +759,33 @@ class SpellManager:
         Removes 'Unofficial' tag if present.
         Returns the number of spells modified.
         """
-        count = 0
-        for spell in self._spells:
-            modified = False
-            # Remove Unofficial if present
-            if "Unofficial" in spell.tags:
-                spell.tags = [t for t in spell.tags if t != "Unofficial"]
-                modified = True
-            # Add Official if not present
-            if "Official" not in spell.tags:
-                spell.tags = spell.tags + ["Official"]
-                modified = True
-            
-            if modified:
-                spell_id = self._db.get_spell_id_by_name(spell.name)
-                if spell_id:
-                    self._db.update_spell(spell_id, self._spell_to_dict(spell))
-                    count += 1
-        
-        if count > 0:
-            self._notify_listeners()
-        return count
+        retagged = []
+        # One transaction for all spells; the in-memory spells change once it commits
+        with self._db.transaction():
+            for spell in self._spells:
+                # Remove Unofficial if present, add Official if not present
+                tags = [t for t in spell.tags if t != "Unofficial"]
+                if "Official" not in tags:
+                    tags.append("Official")
+                
+                if tags != spell.tags:
+                    spell_id = self._db.get_spell_id_by_name(spell.name)
+                    if spell_id:
+                        spell_data = self._spell_to_dict(spell)
+                        spell_data['tags'] = tags
+                        self._db.update_spell(spell_id, spell_data)
+                        retagged.append((spell, tags))
+            
+            if retagged:
+                self._db.defer_until_commit(lambda: self._apply_retagged(retagged))
+        return len(retagged)
+    
+    def _apply_retagged(self, retagged: List[tuple]):
+        """Give committed (spell, tags) changes to the in-memory spells and notify listeners."""
+        for spell, tags in retagged:
+            spell.tags = tags
+            self._index.replace(spell.name, spell)
+        self._notify_listeners()
     
     def delete_spell(self, name: str) -> bool:
         """Delete a spell by name. Returns True if successful."""
@@ -518,8 +793,13 @@ class SpellManager:
             if not self._db.delete_spell_by_name(name):
                 return False
             
+            spell = self.get_spell(name)
+            if spell is not None:
+                self._identity_map.discard(spell.id)
+            
             # Update in-memory list
             self._spells = [s for s in self._spells if s.name.lower() != name.lower()]
+            self._index.remove(name)
             
             self._notify_listeners()
             return True
@@ -535,14 +815,69 @@ class SpellManager:
                 return spell
         return None
     
+    def get_spell_by_id(self, spell_id: int) -> Optional[Spell]:
+        """Get the spell for a database ID (e.g. a selected SpellListItem), loading it if needed."""
+        return self._identity_map.load(self._db, spell_id)
+    
+    def _filter_kwargs(self, search_text: str = "", level_filter: int = -1,
+                       class_name_filter: str = "",
+                       advanced: Optional[AdvancedFilters] = None,
+                       legacy_filter: str = "show_all") -> dict:
+        """Translate UI filter state into SpellDatabase filter keywords."""
+        filters = {
+            'search_text': search_text,
+            'level': level_filter,
+            'class_name': class_name_filter,
+            'legacy_filter': legacy_filter,
+            # Hide spells whose ALL classes are missing from the system
+            # This allows unofficial spells with classes like "Witch" to remain hidden
+            # until that class is imported, while still remembering the class association
+            'visible_classes': CharacterClass.all_class_names_with_custom(),
+        }
+        
+        if advanced:
+            filters.update(
+                ritual=advanced.ritual_filter,
+                concentration=advanced.concentration_filter,
+                min_range=advanced.min_range,
+                has_verbal=advanced.has_verbal,
+                has_somatic=advanced.has_somatic,
+                has_material=advanced.has_material,
+                costly_component=advanced.costly_component,
+            )
+            
+            # Multi-select source filter with include/exclude mode
+            if advanced.source_filter:
+                filters['sources'] = advanced.source_filter
+                filters['sources_mode'] = advanced.source_filter_mode.value
+            
+            # Tags filter
+            if advanced.tags_filter:
+                filters['tags'] = advanced.tags_filter
+                filters['tags_mode'] = advanced.tags_filter_mode.value
+            
+            # Casting time filter (use exact match for SQL)
+            if advanced.casting_time_filter:
+                filters['casting_time'] = advanced.casting_time_filter
+            
+            # Duration filter (use exact match for SQL)
+            if advanced.duration_filter:
+                filters['duration'] = advanced.duration_filter
+        
+        return filters
+    
     def get_filtered_spells(self, search_text: str = "", level_filter: int = -1,
                             class_name_filter: str = "",
                             advanced: Optional[AdvancedFilters] = None,
                             legacy_filter: str = "show_all") -> List[Spell]:
         """Return spells matching the given filter criteria.
         
-        Uses SQL for most filtering (much faster for large spell collections),
-        with Python post-filtering for complex criteria like costly_component and min_range.
+        Filters resolve against the in-memory SpellIndex with the same
+        semantics as the SQL filters (SpellDatabase.search_spells); the
+        matching ids resolve to the session's instances (SpellIdentityMap).
+        Results are cached per filter state until the collection changes
+        (see filter_cache_stats), and while the search text is typed or
+        deleted the index refines its previous results (SpellIndex.query).
         
         Args:
             class_name_filter: Class name string (e.g., "Wizard", "Witch") for filtering
@@ -553,117 +888,114 @@ class SpellManager:
             - "no_legacy": Only show non-legacy spells
             - "legacy_only": Only show legacy spells
         """
-        # Build SQL filter parameters from advanced filters
-        ritual = None
-        concentration = None
-        source = None
-        tags = None
-        tags_mode = "has_all"
-        casting_time = None
-        duration = None
-        has_verbal = None
-        has_somatic = None
-        has_material = None
-        costly_component = None  # Can't filter in SQL, handled in Python
-        min_range = 0  # Complex with new range encoding, handled in Python
+        # Hide spells whose ALL classes are missing from the system (see _filter_kwargs)
+        spell_ids = self._filtered_spell_ids(search_text, level_filter, class_name_filter, advanced,
+                                             legacy_filter, CharacterClass.all_class_names_with_custom())
+        return self._identity_map.get_many(spell_ids)
+    
+    def _filtered_spell_ids(self, search_text: str, level_filter: int, class_name_filter: str,
+                            advanced: Optional[AdvancedFilters], legacy_filter: str,
+                            visible_classes: List[str]) -> tuple:
+        """Query the index through the filter result cache (invalidated by any index change)."""
+        key = FilterResultCache.make_key(search_text, level_filter, class_name_filter, advanced,
+                                         legacy_filter, visible_classes)
+        generation = self._index.generation
+        spell_ids = self._filter_cache.get(key, generation)
+        if spell_ids is None:
+            spell_ids = tuple(self._index.query(search_text, level_filter, class_name_filter,
+                                                advanced, legacy_filter, visible_classes))
+            self._filter_cache.put(key, generation, spell_ids)
+        return spell_ids
+    
+    def filter_cache_stats(self) -> dict:
+        """Hit/miss statistics of the get_filtered_spells result cache (see FilterResultCache.stats)."""
+        return self._filter_cache.stats()
+    
+    def set_filter_cache_budget(self, max_bytes: int):
+        """Change the filter result cache memory budget, evicting entries over it."""
+        self._filter_cache.max_bytes = max_bytes
+    
+    def get_filtered_spells_async(self, search_text: str = "", level_filter: int = -1,
+                                  class_name_filter: str = "",
+                                  advanced: Optional[AdvancedFilters] = None,
+                                  legacy_filter: str = "show_all") -> Future:
+        """Run get_filtered_spells on the database worker thread.
         
-        if advanced:
-            ritual = advanced.ritual_filter
-            concentration = advanced.concentration_filter
-            min_range = advanced.min_range  # Will be used for Python filtering
-            has_verbal = advanced.has_verbal
-            has_somatic = advanced.has_somatic
-            has_material = advanced.has_material
-            costly_component = advanced.costly_component
-            
-            # Source filter now handled in Python for multi-select support
-            # Keep source_filter and source_filter_mode for post-processing
-            
-            # Tags filter
-            if advanced.tags_filter:
-                tags = advanced.tags_filter
-                tags_mode = advanced.tags_filter_mode.value
-            
-            # Casting time filter (use exact match for SQL)
-            if advanced.casting_time_filter:
-                casting_time = advanced.casting_time_filter
-            
-            # Duration filter (use exact match for SQL)
-            if advanced.duration_filter:
-                duration = advanced.duration_filter
-        
-        # Get filtered results from database
-        # Note: min_range and source not passed to SQL - handled in Python due to complex filtering
-        # Normalize None -> empty values for database call to satisfy typed signatures
-        spell_dicts = self._db.search_spells(
-            search_text=search_text,
-            level=level_filter,
-            class_name=class_name_filter,
-            ritual=ritual,
-            concentration=concentration,
-            min_range=0,  # Don't filter by range in SQL
-            source="",  # Don't filter by source in SQL - handled in Python
-            tags=(tags or []),
-            tags_mode=tags_mode,
-            casting_time=(casting_time or ""),
-            duration=(duration or ""),
-            has_verbal=has_verbal,
-            has_somatic=has_somatic,
-            has_material=has_material
-        )
+        Returns a Future resolving to the same List[Spell]. A newer call
+        supersedes (cancels) an older one that has not run yet, so only the
+        latest filter state reaches the UI when delivered with
+        key=SpellManager.FILTER_REQUEST_KEY.
+        """
+        # Resolved on the calling thread: reads the custom class registry
+        visible_classes = CharacterClass.all_class_names_with_custom()
         
-        # Convert to Spell objects
-        results = [self._dict_to_spell(d) for d in spell_dicts]
-        
-        # Apply Python post-filters for criteria that can't be done in SQL
-        if costly_component is not None:
-            results = [s for s in results if s.has_costly_component == costly_component]
-        
-        # Filter by minimum range using the new encoding system
-        if min_range != 0:
-            from spell import range_value_to_feet
-            min_feet = range_value_to_feet(min_range)
-            results = [s for s in results if s.range_as_feet >= min_feet]
-        
-        # Filter by source using include/exclude mode
-        if advanced and advanced.source_filter:
-            from spell import SourceFilterMode
-            sources_lower = [s.lower() for s in advanced.source_filter]
-            if advanced.source_filter_mode == SourceFilterMode.INCLUDE:
-                # Keep spells from selected sources
-                results = [s for s in results if any(src in s.source.lower() for src in sources_lower)]
-            else:  # EXCLUDE mode
-                # Remove spells from selected sources
-                results = [s for s in results if not any(src in s.source.lower() for src in sources_lower)]
-        
-        # Apply legacy content filter
-        if legacy_filter == "no_legacy":
-            # Only show non-legacy spells
-            results = [s for s in results if not s.is_legacy]
-        elif legacy_filter == "legacy_only":
-            # Only show legacy spells
-            results = [s for s in results if s.is_legacy]
-        elif legacy_filter == "show_unupdated":
-            # Show non-legacy spells + legacy spells that don't have a non-legacy version
-            # Build set of non-legacy spell names for quick lookup
-            non_legacy_names = {s.name.lower() for s in results if not s.is_legacy}
-            results = [s for s in results if not s.is_legacy or s.name.lower() not in non_legacy_names]
-        # "show_all" - no filtering needed
-        
-        # Hide spells whose ALL classes are missing from the system
-        # This allows unofficial spells with classes like "Witch" to remain hidden
-        # until that class is imported, while still remembering the class association
-        valid_classes = set(c.lower() for c in CharacterClass.all_class_names_with_custom())
-        results = [s for s in results if any(
-            cn.lower() in valid_classes for cn in s.class_names
-        )]
-        
-        return results
+        def run() -> List[Spell]:
+            spell_ids = self._filtered_spell_ids(search_text, level_filter, class_name_filter,
+                                                 advanced, legacy_filter, visible_classes)
+            return self._identity_map.get_many(spell_ids)
+        
+        return get_db_worker().submit_latest(self.FILTER_REQUEST_KEY, run)
+    
+    def get_filtered_spell_page(self, search_text: str = "", level_filter: int = -1,
+                                class_name_filter: str = "",
+                                advanced: Optional[AdvancedFilters] = None,
+                                legacy_filter: str = "show_all",
+                                after: Optional[SpellListItem] = None,
+                                limit: int = SpellDatabase.SPELL_PAGE_SIZE) -> List[SpellListItem]:
+        """Return one page of list rows for the given filters (same arguments as get_filtered_spells).
+        
+        Pages are ordered by (level, name); pass the last item of the previous
+        page as `after` to get the next one. Use get_spell_by_id to load the
+        full Spell once a row is selected.
+        """
+        filters = self._filter_kwargs(search_text, level_filter, class_name_filter,
+                                      advanced, legacy_filter)
+        cursor = (after.level, after.name) if after else None
+        rows = self._db.get_spell_list_page(after=cursor, limit=limit, **filters)
+        return [SpellListItem(**row) for row in rows]
+    
+    def count_filtered_spells(self, search_text: str = "", level_filter: int = -1,
+                              class_name_filter: str = "",
+                              advanced: Optional[AdvancedFilters] = None,
+                              legacy_filter: str = "show_all") -> int:
+        """Return how many spells match the given filters without loading them."""
+        filters = self._filter_kwargs(search_text, level_filter, class_name_filter,
+                                      advanced, legacy_filter)
+        return self._db.count_spells(**filters)
+    
+    def get_filter_facets(self, search_text: str = "", level_filter: int = -1,
+                          class_name_filter: str = "",
+                          advanced: Optional[AdvancedFilters] = None,
+                          legacy_filter: str = "show_all") -> dict:
+        """Return per-value result counts for the current filter state.
+        
+        Same arguments as get_filtered_spells; see SpellDatabase.get_spell_facets
+        for the result layout. Cached until the next spell change.
+        """
+        filters = self._filter_kwargs(search_text, level_filter, class_name_filter,
+                                      advanced, legacy_filter)
+        return self._db.get_spell_facets(**filters)
+    
+    @property
+    def metadata_version(self) -> int:
+        """Changes whenever the get_all_* filter values may have changed."""
+        return self._db.spell_metadata_version
     
     def get_all_sources(self) -> List[str]:
         """Return a sorted list of all unique sources across all spells."""
         return self._db.get_all_sources()
     
+    def get_content_sources(self) -> List[dict]:
+        """Return every content source with its enabled state ('name', 'enabled')."""
+        return self._db.get_content_sources()
+    
+    def set_source_enabled(self, name: str, enabled: bool) -> bool:
+        """Enable or disable a content source and reload the spell list if it changed."""
+        if not self._db.set_source_enabled(name, enabled):
+            return False
+        self.reload_from_database()
+        return True
+    
     def get_all_casting_times(self) -> List[str]:
         """Return a sorted list of all unique casting times across all spells."""
         return self._db.get_all_casting_times()
@@ -697,8 +1029,20 @@ class SpellManager:
         Returns:
             Number of spells imported
         """
-        imported_count = 0
+        result = self._import_spell_rows(file_path, replace)
+        if result is None:
+            return 0
+        imported_count, spell_dicts = result
+        # Reload in-memory list
+        self._apply_spell_rows(spell_dicts)
+        return imported_count
+    
+    def _import_spell_rows(self, file_path: str, replace: bool) -> Optional[Tuple[int, List[dict]]]:
+        """Write a text file's spells to the database; database only.
         
+        Returns:
+            (number imported, every spell row afterwards), or None if the import failed
+        """
         try:
             with open(file_path, "r", encoding="utf-8") as f:
                 new_spells = []
@@ -710,26 +1054,35 @@ class SpellManager:
                             new_spells.append(self._spell_to_dict(spell))
                         except Exception:
                             continue
-                
-                if replace:
-                    # Clear existing and insert all new
-                    self._db.clear_all_spells()
-                    imported_count = self._db.bulk_insert_spells(new_spells)
-                else:
-                    # Merge - bulk_insert_spells already skips duplicates
-                    imported_count = self._db.bulk_insert_spells(new_spells)
-                
-                # Reload in-memory list
-                spell_dicts = self._db.get_all_spells()
-                self._spells = [self._dict_to_spell(d) for d in spell_dicts]
-                self._spells.sort(key=lambda s: (s.level, s.name.lower()))
-                
-                self._notify_listeners()
+            
+            if replace:
+                # Clear existing and insert all new
+                self._db.clear_all_spells()
+                imported_count = self._db.bulk_insert_spells(new_spells)
+            else:
+                # Merge - bulk_insert_spells already skips duplicates
+                imported_count = self._db.bulk_insert_spells(new_spells)
+            return imported_count, self._db.get_all_spells()
                 
         except Exception as e:
             print(f"Error importing spells: {e}")
+            return None
+    
+    def import_spells_async(self, file_path: str, replace: bool = False) -> Future:
+        """Run import_spells' database writes on the database worker thread.
         
-        return imported_count
+        Returns a Future resolving to the number of spells imported; the spell
+        list is reloaded and listeners are notified on the Tk thread.
+        """
+        def run() -> int:
+            result = self._import_spell_rows(file_path, replace)
+            if result is None:
+                return 0
+            imported_count, spell_dicts = result
+            self._apply_spell_rows_in_tk(spell_dicts)
+            return imported_count
+        
+        return get_db_worker().submit(run)
     
     def export_spells(self, file_path: str, spells: Optional[List[Spell]] = None, 
                       unofficial_only: bool = True) -> bool:
@@ -873,7 +1226,17 @@ class SpellManager:
     
     def reload_from_database(self):
         """Force reload all spells from the database."""
-        spell_dicts = self._db.get_all_spells()
-        self._spells = [self._dict_to_spell(d) for d in spell_dicts]
-        self._spells.sort(key=lambda s: (s.level, s.name.lower()))
-        self._notify_listeners()
+        self._apply_spell_rows(self._db.get_all_spells())
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the spell list if spell data was written outside this manager
+        (another SpellDatabase instance, e.g. a class import, or another process).
+        
+        Returns:
+            True if the spells were reloaded and listeners notified
+        """
+        if self._spells_generation is None or self._db.change_generation('spells') == self._spells_generation:
+            return False
+        self.reload_from_database()
+        return True
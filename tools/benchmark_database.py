@@ -0,0 +1,141 @@
+"""
+Benchmark for SpellDatabase query latency and startup cost.
+Compares the old open-per-query connection strategy with the pooled connection manager,
+and times SpellDatabase.initialize() on its slow and fast paths.
+
+Runs against a temporary copy of spellbook.db so the bundled database is never modified.
+
+Usage:
+    python tools/benchmark_database.py [iterations]
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SpellDatabase, close_all_connections
+
+
+class _OpenPerQueryDatabase(SpellDatabase):
+    """SpellDatabase using the previous strategy: a new connection for every call."""
+
+    @contextmanager
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+# (label, callable(db)) pairs representing common UI lookups
+QUERIES = [
+    ("get_spell_by_name", lambda db: db.get_spell_by_name("Fireball")),
+    ("get_stat_blocks_for_spell_by_name", lambda db: db.get_stat_blocks_for_spell_by_name("Summon Beast")),
+    ("get_all_tags", lambda db: db.get_all_tags()),
+    ("global_search", lambda db: db.global_search("fire", limit=50)),
+    ("search_spells", lambda db: db.search_spells(search_text="fire", level=3)),
+    ("search_spells (advanced filters)", lambda db: db.search_spells(
+        min_range=60, has_material=True, costly_component=False,
+        sources=["player's handbook"], legacy_filter="show_unupdated")),
+    ("search_spells (all rows)", lambda db: db.search_spells()),
+    ("get_spell_list_page (first page)", lambda db: db.get_spell_list_page(limit=50)),
+    ("count_spells", lambda db: db.count_spells(has_material=True)),
+    ("get_spell_facets (uncached)", lambda db: (db._facet_cache.clear(), db.get_spell_facets())),
+    ("sync_seed_data (unchanged)", lambda db: db.sync_seed_data()),
+    ("get_all_character_classes", lambda db: db.get_all_character_classes()),
+    ("get_all_character_classes (lazy)", lambda db: db.get_all_character_classes(lazy=True, with_subclasses=False)),
+    ("get_class_features_up_to_level", lambda db: db.get_class_features_up_to_level(1, 20)),
+    ("run_maintenance (forced ANALYZE)", lambda db: db.run_maintenance(force=True)),
+]
+
+
+def _time_per_call(db: SpellDatabase, func, iterations: int) -> float:
+    """Return mean latency in microseconds for func(db)."""
+    func(db)  # Warm up (opens the pooled connection, fills page cache)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(db)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def run_initialize_benchmark(source_db: str = "spellbook.db", manager_count: int = 5):
+    """Time initialize() the way a launch calls it: once per manager.
+
+    Reports the first call (full DDL + migrations), the repeat calls in the
+    same process, and a simulated relaunch that can only use the on-disk
+    user_version + schema fingerprint check.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="spellbook_bench_")
+    try:
+        db_path = os.path.join(tmp_dir, "startup.db")
+        shutil.copy2(source_db, db_path)
+
+        start = time.perf_counter()
+        SpellDatabase(db_path).initialize()
+        first = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(manager_count - 1):
+            SpellDatabase(db_path).initialize()
+        repeat = (time.perf_counter() - start) * 1000
+
+        # Simulate a new process: forget in-process state, keep the file
+        close_all_connections()
+        SpellDatabase._initialized_paths.clear()
+        start = time.perf_counter()
+        for _ in range(manager_count):
+            SpellDatabase(db_path).initialize()
+        relaunch = (time.perf_counter() - start) * 1000
+
+        print(f"initialize() first call (schema + migrations): {first:9.2f} ms")
+        print(f"initialize() x{manager_count - 1} more in same process:     {repeat:9.2f} ms")
+        print(f"initialize() x{manager_count} after relaunch (fast path):  {relaunch:9.2f} ms")
+    finally:
+        close_all_connections()
+        SpellDatabase._initialized_paths.clear()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def run_benchmark(source_db: str = "spellbook.db", iterations: int = 200):
+    """Run each query against both strategies and print a latency table."""
+    tmp_dir = tempfile.mkdtemp(prefix="spellbook_bench_")
+    try:
+        legacy_path = os.path.join(tmp_dir, "legacy.db")
+        pooled_path = os.path.join(tmp_dir, "pooled.db")
+        shutil.copy2(source_db, legacy_path)
+        shutil.copy2(source_db, pooled_path)
+
+        legacy_db = _OpenPerQueryDatabase(legacy_path)
+        pooled_db = SpellDatabase(pooled_path)
+        # Bring both copies to the current schema before timing
+        legacy_db.initialize()
+        pooled_db.initialize()
+
+        print(f"{'query':<36}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+        for label, func in QUERIES:
+            before = _time_per_call(legacy_db, func, iterations)
+            after = _time_per_call(pooled_db, func, iterations)
+            print(f"{label:<36}{before:>14.1f}{after:>14.1f}{before / after:>9.1f}x")
+    finally:
+        close_all_connections()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    run_benchmark(iterations=count)
+    print()
+    run_initialize_benchmark()
@@ -0,0 +1,84 @@
+"""
+Benchmark for SpellIndex, the in-memory index behind SpellManager.get_filtered_spells.
+Times a full rebuild (every reload runs one) and, per filter change, the
+three steps of an uncached get_filtered_spells call: resolving the filters to
+a bitset (match_mask), turning it into ordered spell ids (query), and
+resolving the ids to Spell objects (SpellIdentityMap.get_many).
+
+Runs on a synthetic collection (see benchmark_spell_memory.synthetic_rows),
+so no database is touched.
+
+Usage:
+    python tools/benchmark_spell_index.py [spell_count] [iterations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spell import AdvancedFilters, CharacterClass, Spell, TagFilterMode
+from spell_index import SpellIndex
+from spell_manager import SpellIdentityMap
+from tools.benchmark_spell_memory import synthetic_rows, _to_spell
+
+
+# (label, query keyword arguments) for common filter changes
+FILTER_CHANGES = [
+    ("level dropdown (level 3)", dict(level=3)),
+    ("class dropdown (Wizard)", dict(class_name="Wizard")),
+    ("level + class", dict(level=3, class_name="Wizard")),
+    ("advanced (no conc., 60 ft+, tags any)", dict(advanced=AdvancedFilters(
+        concentration_filter=False, min_range=60,
+        tags_filter=["Damage", "Control"], tags_filter_mode=TagFilterMode.HAS_ANY))),
+    ("legacy: show_unupdated", dict(legacy_filter="show_unupdated")),
+    ("unfiltered list", dict()),
+    ("search text 'fire'", dict(search_text="fire")),
+]
+
+
+def _time_ms(func, iterations: int) -> float:
+    """Return mean milliseconds per call of func()."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def run_benchmark(count: int = 50_000, iterations: int = 20):
+    """Build an index over count synthetic spells and print rebuild and per-filter timings."""
+    spells = [_to_spell(Spell, row) for row in synthetic_rows(count)]
+    spells.sort(key=lambda s: (s.level, s.name.lower()))
+    identity_map = SpellIdentityMap()
+    for spell in spells:
+        identity_map.add(spell)
+    visible_classes = CharacterClass.all_class_names_with_custom()
+
+    index = SpellIndex()
+    rebuild = _time_ms(lambda: index.rebuild(spells), 3)
+    print(f"{count} synthetic spells; rebuild: {rebuild:.0f} ms (runs on every reload)")
+    print()
+    print(f"{'filter change':<40}{'mask (ms)':>11}{'query (ms)':>12}{'end-to-end (ms)':>17}{'matches':>9}")
+
+    for label, filters in FILTER_CHANGES:
+        kwargs = dict(filters, visible_classes=visible_classes)
+        mask_kwargs = {key: value for key, value in kwargs.items() if key != 'search_text'}
+
+        def query():
+            index._changed()  # Drop the search stack so each call starts from scratch
+            return index.query(**kwargs)
+
+        def end_to_end():
+            return identity_map.get_many(query())
+
+        mask = _time_ms(lambda: index.match_mask(**mask_kwargs), iterations)
+        query_ms = _time_ms(query, iterations)
+        total = _time_ms(end_to_end, iterations)
+        print(f"{label:<40}{mask:>11.3f}{query_ms:>12.2f}{total:>17.2f}{len(query()):>9}")
+
+
+if __name__ == "__main__":
+    spell_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    iteration_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    run_benchmark(spell_count, iteration_count)
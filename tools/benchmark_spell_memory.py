@@ -0,0 +1,132 @@
+"""
+Benchmark for the memory used by in-memory Spell objects.
+Compares the previous Spell representation (a plain dataclass holding its own
+lists and strings) with the slotted Spell, which interns repeated strings and
+shares the classes/class_names/tags tuples between spells.
+
+Builds a synthetic collection the way SpellManager loads one: every row comes
+with freshly allocated strings, as sqlite3 returns them, and is converted to
+a Spell. tracemalloc measures what the loaded collection keeps allocated.
+
+Usage:
+    python tools/benchmark_spell_memory.py [spell_count]
+"""
+
+import os
+import random
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spell import Spell, CharacterClass
+
+
+@dataclass
+class _DataclassSpell:
+    """Spell as it was before: a dataclass with a per-instance __dict__ and lists."""
+    name: str
+    level: int
+    casting_time: str
+    ritual: bool
+    range_value: int
+    components: str
+    duration: str
+    concentration: bool
+    classes: List[CharacterClass] = field(default_factory=list)
+    class_names: List[str] = field(default_factory=list)
+    description: str = ""
+    source: str = ""
+    tags: List[str] = field(default_factory=list)
+    is_modified: bool = False
+    original_name: str = ""
+    is_legacy: bool = False
+    id: Optional[int] = field(default=None, compare=False, repr=False)
+
+
+CLASS_NAMES = ["Bard", "Cleric", "Druid", "Paladin", "Ranger", "Sorcerer", "Warlock", "Wizard", "Witch"]
+TAGS = ["Official", "Unofficial", "Damage", "Healing", "Control", "Buff", "Debuff", "Utility", "Summoning"]
+CASTING_TIMES = ["1 action", "1 bonus action", "1 reaction", "1 minute", "10 minutes", "1 hour"]
+DURATIONS = ["Instantaneous", "1 round", "1 minute", "10 minutes", "1 hour", "8 hours", "Until dispelled"]
+COMPONENTS = ["V", "S", "V, S", "V, S, M", "V, M (a pinch of sulfur)", "V, S, M (a diamond worth 300+ GP)"]
+SOURCES = ["Player's Handbook 2024", "Player's Handbook 2014", "Xanathar's Guide to Everything",
+           "Tasha's Cauldron of Everything", "Homebrew"]
+WORDS = ["arcane", "fire", "light", "shadow", "storm", "ward", "bolt", "sphere", "creature", "radiant"]
+
+
+def _fresh(value: str) -> str:
+    """Return an equal but separately allocated string, like a value read from sqlite3."""
+    return value.encode().decode()
+
+
+def synthetic_rows(count: int, seed: int = 5) -> Iterator[dict]:
+    """Yield SpellDatabase-style spell dicts with realistic value repetition."""
+    rng = random.Random(seed)
+    for spell_id in range(1, count + 1):
+        yield {
+            'id': spell_id,
+            'name': f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {spell_id}",
+            'level': rng.randint(0, 9),
+            'casting_time': _fresh(rng.choice(CASTING_TIMES)),
+            'ritual': rng.random() < 0.1,
+            'range_value': rng.choice([0, 3, 30, 60, 120, 150, -1]),
+            'components': _fresh(rng.choice(COMPONENTS)),
+            'duration': _fresh(rng.choice(DURATIONS)),
+            'concentration': rng.random() < 0.4,
+            'description': " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))),
+            'source': _fresh(rng.choice(SOURCES)),
+            'classes': [_fresh(name) for name in rng.sample(CLASS_NAMES, rng.randint(1, 4))],
+            'tags': [_fresh(tag) for tag in rng.sample(TAGS, rng.randint(1, 3))],
+            'is_modified': False,
+            'original_name': "",
+            'is_legacy': rng.random() < 0.2,
+        }
+
+
+def _classes_from_names(class_names: List[str]) -> List[CharacterClass]:
+    return [CharacterClass.from_string(name) for name in class_names]
+
+
+def _to_spell(spell_type, data: dict):
+    """Build a spell from a row the way SpellManager._dict_to_spell does."""
+    class_names = data['classes']
+    return spell_type(
+        name=data['name'], level=data['level'], casting_time=data['casting_time'],
+        ritual=data['ritual'], range_value=data['range_value'], components=data['components'],
+        duration=data['duration'], concentration=data['concentration'],
+        classes=_classes_from_names(class_names), class_names=class_names,
+        description=data['description'], source=data['source'], tags=data['tags'],
+        is_modified=data['is_modified'], original_name=data['original_name'],
+        is_legacy=data['is_legacy'], id=data['id'],
+    )
+
+
+def measure(spell_type, count: int) -> int:
+    """Return the bytes still allocated after loading count synthetic spells of spell_type."""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        spells = [_to_spell(spell_type, row) for row in synthetic_rows(count)]
+        used = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    del spells
+    return used
+
+
+def run_benchmark(count: int = 50_000):
+    """Load the same synthetic collection with both representations and print bytes per spell."""
+    before = measure(_DataclassSpell, count)
+    after = measure(Spell, count)
+    print(f"{count} synthetic spells (description text included in both)")
+    print(f"{'representation':<24}{'total (MiB)':>14}{'bytes/spell':>14}")
+    print(f"{'dataclass (before)':<24}{before / 2**20:>14.1f}{before / count:>14.0f}")
+    print(f"{'slotted Spell (after)':<24}{after / 2**20:>14.1f}{after / count:>14.0f}")
+    print(f"saved {(before - after) / count:.0f} bytes/spell ({(1 - after / before) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    spell_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    run_benchmark(spell_count)
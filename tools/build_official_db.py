@@ -0,0 +1,68 @@
+"""
+Build the read-only official content database (official.db).
+
+New user databases are created as small overlays on this file: official
+spells, stat blocks and search indexes are read from it in place (attached
+read-only and memory-mapped), and only user content and edits are stored in
+the user's spellbook.db. Rebuild it whenever official data or the schema
+changes, before packaging (it is bundled by main.spec / Spellbook.spec).
+
+Usage:
+    python tools/build_official_db.py [output_path]
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SpellDatabase, close_all_connections
+
+
+def build_official_db(output_path: str) -> dict:
+    """Create a fully migrated, compacted official database at output_path."""
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(prefix="official_", suffix=".db", dir=output_dir)
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        # official_db_path="" builds a standalone database even if an old official.db exists
+        db = SpellDatabase(tmp_path, official_db_path="")
+        db.initialize()
+        db.populate_initial_spells()
+        with db.get_connection() as conn:
+            counts = {
+                table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in SpellDatabase.OVERLAY_TABLES + SpellDatabase.OVERLAY_CATALOG_TABLES
+            }
+        close_all_connections()
+
+        # Single self-contained file: no WAL, optimized indexes, no free pages
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("PRAGMA journal_mode = DELETE")
+            conn.execute("INSERT INTO spells_fts (spells_fts) VALUES ('optimize')")
+            conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+            conn.execute("ANALYZE")
+            conn.commit()
+            # Read-only file: drop the incremental auto-vacuum pointer maps
+            conn.execute("PRAGMA auto_vacuum = NONE")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+        os.replace(tmp_path, output_path)
+        return counts
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else SpellDatabase.default_official_db_path()
+    counts = build_official_db(path)
+    print(f"Built {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+    for table, count in counts.items():
+        print(f"  {table}: {count}")
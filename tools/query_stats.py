@@ -0,0 +1,75 @@
+"""
+Dump per-statement SQL statistics for a representative workload.
+Runs the benchmark queries plus the manager load paths against a temporary copy
+of spellbook.db with query stats enabled, then writes the stats as JSON and
+prints the most expensive statements.
+
+To record a real session instead, launch the app with SPELLBOOK_SQL_STATS set to
+the slow-query threshold in milliseconds and SPELLBOOK_SQL_STATS_FILE set to the
+output path.
+
+Usage:
+    python tools/query_stats.py [output.json] [--db PATH] [--slow-ms MS]
+"""
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import (SpellDatabase, close_all_connections, enable_query_stats,
+                      disable_query_stats, dump_query_stats, query_stats)
+from tools.benchmark_database import QUERIES
+
+
+def run_workload(db_path: str, repeat: int = 20):
+    """Run the spell manager load path once and each benchmark query `repeat` times."""
+    from spell_manager import SpellManager
+
+    db = SpellDatabase(db_path)
+    db.initialize()
+
+    spell_manager = SpellManager(db_path)
+    spell_manager.load_spells()
+    for level in range(10):
+        spell_manager.count_filtered_spells(level_filter=level)
+
+    for _, func in QUERIES:
+        for _ in range(repeat):
+            func(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dump SQL statement stats as JSON.")
+    parser.add_argument("output", nargs="?", default="query_stats.json")
+    parser.add_argument("--db", default="spellbook.db", help="database to copy and query")
+    parser.add_argument("--slow-ms", type=float, default=5.0, help="slow-query log threshold")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="spellbook_stats_")
+    try:
+        db_path = os.path.join(tmp_dir, "stats.db")
+        shutil.copy2(args.db, db_path)
+
+        query_stats.reset()
+        enable_query_stats(args.slow_ms)
+        run_workload(db_path)
+        disable_query_stats()
+        snapshot = dump_query_stats(args.output)
+    finally:
+        close_all_connections()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"{'total ms':>10}{'calls':>8}{'p50':>9}{'p99':>9}  statement")
+    for item in snapshot['statements'][:15]:
+        print(f"{item['total_ms']:>10.1f}{item['calls']:>8}{item['p50_ms']:>9.3f}"
+              f"{item['p99_ms']:>9.3f}  {item['sql'][:90]}")
+    print(f"\n{len(snapshot['slow_queries'])} statements over {args.slow_ms} ms; "
+          f"stats written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
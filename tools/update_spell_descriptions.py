@@ -2226,38 +2226,18 @@ def get_spell_updates():
 
 
 def update_spells_in_database():
-    """Update all spells in the database with the correct descriptions."""
+    """Apply the description updates to every spell the user hasn't modified.
+    
+    Uses the spell_descriptions seed sync with force=True, so all updates are
+    re-checked in one transaction rather than rewritten spell by spell.
+    """
     db = SpellDatabase()
+    db.initialize()
     updates = get_spell_updates()
     
-    updated_count = 0
-    not_found = []
-    
-    for spell_name, fields in updates.items():
-        spell_id = db.get_spell_id_by_name(spell_name)
-        
-        if spell_id is None:
-            not_found.append(spell_name)
-            continue
-        
-        # Get current spell data
-        spell_data = db.get_spell_by_id(spell_id)
-        if spell_data is None:
-            not_found.append(spell_name)
-            continue
-        
-        # Update the fields - classes and tags are already in spell_data from get_spell_by_id
-        updated_data = dict(spell_data)
-        for field, value in fields.items():
-            updated_data[field] = value
-        
-        # Update in database
-        success = db.update_spell(spell_id, updated_data)
-        if success:
-            updated_count += 1
-            print(f"Updated: {spell_name}")
-        else:
-            print(f"Failed to update: {spell_name}")
+    result = db.sync_seed_data(['spell_descriptions'], force=True)
+    updated_count = result.get('spell_descriptions', 0)
+    not_found = [name for name in updates if db.get_spell_id_by_name(name) is None]
     
     print(f"\n=== Summary ===")
     print(f"Updated: {updated_count} spells")
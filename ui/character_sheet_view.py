@@ -2811,16 +2811,13 @@ class CharacterSheetView(ctk.CTkFrame):
         }
         
         # Get trackable features from class definition (skip hardcoded ones)
-        for feature in class_def.trackable_features:
+        for feature in class_def.get_trackable_features_up_to_level(level):
             if feature.title in hardcoded_features:
                 continue
             if feature.has_uses:
-                # Check if level qualifies (based on level_scaling)
-                min_level = min(feature.level_scaling.keys()) if feature.level_scaling else 1
-                if level >= min_level:
-                    max_uses = feature.get_max_uses_at_level(level)
-                    if max_uses > 0:
-                        self._create_feature_use_stat(parent, class_name, feature.title, max_uses, sheet)
+                max_uses = feature.get_max_uses_at_level(level)
+                if max_uses > 0:
+                    self._create_feature_use_stat(parent, class_name, feature.title, max_uses, sheet)
         
         # Get trackable features from subclass definition
         if subclass_name:
@@ -2830,15 +2827,12 @@ class CharacterSheetView(ctk.CTkFrame):
                     subclass_def = sc
                     break
             
-            if subclass_def and hasattr(subclass_def, 'trackable_features'):
-                for feature in subclass_def.trackable_features:
+            if subclass_def:
+                for feature in subclass_def.get_trackable_features_up_to_level(level):
                     if feature.has_uses:
-                        # Check if level qualifies (based on level_scaling)
-                        min_level = min(feature.level_scaling.keys()) if feature.level_scaling else 1
-                        if level >= min_level:
-                            max_uses = feature.get_max_uses_at_level(level)
-                            if max_uses > 0:
-                                self._create_feature_use_stat(parent, class_name, feature.title, max_uses, sheet)
+                        max_uses = feature.get_max_uses_at_level(level)
+                        if max_uses > 0:
+                            self._create_feature_use_stat(parent, class_name, feature.title, max_uses, sheet)
     
     def _create_feature_use_stat(self, parent, class_name: str, label: str, max_value: int, sheet: CharacterSheet, suffix: str = ""):
         """Create a feature stat with editable current/max values."""
@@ -7,12 +7,16 @@ import customtkinter as ctk
 from tkinter import ttk
 from typing import Optional, Callable, List, Dict
 from theme import get_theme_manager
+from db_worker import get_db_worker
 
 
 class GlobalSearchBar(ctk.CTkFrame):
     """Search bar with overlaying dropdown results."""
     
-    def __init__(self, parent, on_result_selected: Optional[Callable[[str, str, int], None]] = None):
+    SEARCH_REQUEST_KEY = "global_search"  # Database worker key; each keystroke supersedes the last
+    
+    def __init__(self, parent, on_result_selected: Optional[Callable[[str, str, int], None]] = None,
+                 search_descriptions: bool = False):
         """
         Initialize the global search bar.
         
@@ -20,10 +24,12 @@ class GlobalSearchBar(ctk.CTkFrame):
             parent: Parent widget
             on_result_selected: Callback when a result is selected. 
                                Args: (section, name, id)
+            search_descriptions: Also match descriptions, not only names
         """
         super().__init__(parent, fg_color="transparent")
         
         self.on_result_selected = on_result_selected
+        self.search_descriptions = search_descriptions
         self.theme = get_theme_manager()
         self._db = None
         self._results: List[Dict] = []
@@ -125,8 +131,18 @@ class GlobalSearchBar(ctk.CTkFrame):
             self._hide_dropdown()
     
     def _perform_search(self, query: str):
-        """Search the database and show results."""
-        self._results = self.db.global_search(query, limit=50)
+        """Search the database on the worker thread and show results when they arrive."""
+        db = self.db
+        future = get_db_worker().submit_latest(
+            self.SEARCH_REQUEST_KEY, db.global_search,
+            query, limit=50, include_descriptions=self.search_descriptions
+        )
+        get_db_worker().deliver(self, future, self._on_search_results,
+                                key=self.SEARCH_REQUEST_KEY)
+    
+    def _on_search_results(self, results: List[Dict]):
+        """Show results from the latest search (runs on the Tk thread)."""
+        self._results = results
         
         if self._results:
             self._show_dropdown()
@@ -259,7 +275,8 @@ class GlobalSearchBar(ctk.CTkFrame):
             self.on_result_selected(section, name, result_id)
     
     def _hide_dropdown(self):
-        """Hide the dropdown."""
+        """Hide the dropdown (and drop any search still in flight)."""
+        get_db_worker().cancel(self.SEARCH_REQUEST_KEY)
         if self._dropdown_visible and hasattr(self, '_dropdown'):
             self._dropdown.destroy()
             self._dropdown_visible = False
@@ -10,6 +10,7 @@ from spell_manager import SpellManager
 from character_manager import CharacterManager
 from spell import Spell, CharacterClass, AdvancedFilters, TagFilterMode, SourceFilterMode
 from settings import SettingsManager, get_settings_manager
+from db_worker import get_db_worker
 from validation import validate_spell_for_character
 from theme import get_theme_manager
 from ui.character_sheet_view import CharacterSheetView
@@ -413,6 +414,31 @@ class MainWindow(ctk.CTkFrame):
         
         # Schedule background preloading after UI is visible
         self.after(500, self._background_preload)
+        
+        # Periodically refresh database statistics once the database goes idle
+        self._maintenance_check_delay = 60000  # Milliseconds between idle maintenance checks
+        self.after(self._maintenance_check_delay, self._check_idle_maintenance)
+        
+        # Pick up spell writes made through other database instances or processes
+        self._change_check_delay = 2000  # Milliseconds between spell change checks
+        self.after(self._change_check_delay, self._check_external_changes)
+    
+    def _check_idle_maintenance(self):
+        """Run due database maintenance on the database worker, then check again later."""
+        try:
+            future = self.spell_manager.run_idle_maintenance_async()
+            get_db_worker().deliver(self, future, lambda _report: None)
+        except Exception as e:
+            print(f"Idle maintenance: {e}")
+        self.after(self._maintenance_check_delay, self._check_idle_maintenance)
+    
+    def _check_external_changes(self):
+        """Reload the spell list if spell data changed outside the spell manager, then check again later."""
+        try:
+            self.spell_manager.reload_if_changed()
+        except Exception as e:
+            print(f"Spell change check: {e}")
+        self.after(self._change_check_delay, self._check_external_changes)
     
     def _update_progress(self, message: str, value: float):
         """Update startup progress if callback is available."""
@@ -476,6 +502,13 @@ class MainWindow(ctk.CTkFrame):
                     _ = sheet_manager.get_sheet(char.name)
             except Exception as e:
                 print(f"Background preload (character sheets): {e}")
+        
+        # Back up the spell database on the backup thread if the last backup is old enough
+        try:
+            from backup_service import get_backup_service
+            get_backup_service().backup_if_due()
+        except Exception as e:
+            print(f"Automatic backup: {e}")
 
     def destroy(self):
         """Clean up listeners to avoid leaks when the main window is destroyed."""
@@ -1163,6 +1196,7 @@ class MainWindow(ctk.CTkFrame):
         ctk.CTkLabel(range_frame, text="Min Range:", font=ctk.CTkFont(size=12)).pack(side="left", padx=(0, 8))
         self.min_range_var = ctk.StringVar(value="Self")
         self._range_display_to_value = {"Self": 0}  # Will be populated by _update_filter_dropdowns
+        self._filter_dropdowns_version = None  # spell_manager.metadata_version last shown
         self.min_range_combo = ctk.CTkComboBox(range_frame, variable=self.min_range_var,
                                                values=["Self"],
                                                width=100, command=lambda x: self._on_filter_changed(immediate=True))
@@ -1364,6 +1398,12 @@ class MainWindow(ctk.CTkFrame):
     
     def _update_filter_dropdowns(self):
         """Update the casting time, duration, and source dropdowns with current values."""
+        # Skip the rebuild when the distinct values have not changed since last time
+        version = self.spell_manager.metadata_version
+        if version == self._filter_dropdowns_version:
+            return
+        self._filter_dropdowns_version = version
+        
         # Preserve current selections
         current_cast_time = self.cast_time_var.get()
         current_duration = self.duration_var.get()
@@ -1722,6 +1762,8 @@ class MainWindow(ctk.CTkFrame):
         Args:
             reset_scroll: If True, scroll position resets to top (default True)
         """
+        # A pending background query would otherwise overwrite this newer result
+        get_db_worker().cancel(SpellManager.FILTER_REQUEST_KEY)
         search_text, level_filter, class_name_filter, advanced = self._get_current_filters()
         legacy_filter = self.settings_manager.settings.legacy_content_filter
         filtered_spells = self.spell_manager.get_filtered_spells(
@@ -1729,6 +1771,23 @@ class MainWindow(ctk.CTkFrame):
         )
         self.spell_list.set_spells(filtered_spells, reset_scroll=reset_scroll)
     
+    def _refresh_spell_list_async(self, reset_scroll: bool = True):
+        """Refresh the spell list with current filters without blocking the UI.
+        
+        The query runs on the database worker thread; if the filters change
+        again before it finishes, only the newest result is shown.
+        """
+        search_text, level_filter, class_name_filter, advanced = self._get_current_filters()
+        legacy_filter = self.settings_manager.settings.legacy_content_filter
+        future = self.spell_manager.get_filtered_spells_async(
+            search_text, level_filter, class_name_filter, advanced, legacy_filter
+        )
+        get_db_worker().deliver(
+            self, future,
+            lambda spells: self.spell_list.set_spells(spells, reset_scroll=reset_scroll),
+            key=SpellManager.FILTER_REQUEST_KEY
+        )
+    
     def _on_filter_changed(self, immediate: bool = False):
         """Called when any filter value changes.
         Uses debouncing to avoid excessive database queries during typing.
@@ -1754,7 +1813,7 @@ class MainWindow(ctk.CTkFrame):
     def _apply_debounced_filter(self):
         """Apply the filter after debounce delay."""
         self._filter_debounce_id = None
-        self._refresh_spell_list()
+        self._refresh_spell_list_async()
     
     def refresh_class_filter(self):
         """Refresh the class filter dropdown to include newly imported custom classes."""
@@ -1878,9 +1937,13 @@ class MainWindow(ctk.CTkFrame):
             )
             
             if result is not None:  # Not cancelled
-                count = self.spell_manager.import_spells(file_path, replace=result)
-                messagebox.showinfo("Import Complete", 
-                    f"Imported {count} spell(s).")
+                # Runs on the database worker; the list refreshes via the spell listener
+                future = self.spell_manager.import_spells_async(file_path, replace=result)
+                get_db_worker().deliver(
+                    self, future,
+                    lambda count: messagebox.showinfo("Import Complete",
+                        f"Imported {count} spell(s).")
+                )
     
     def _on_export_all(self):
         """Export all spells to a file."""
@@ -103,6 +103,7 @@ class RichTextRenderer:
     def __init__(self, theme=None):
         self.theme = theme or get_theme_manager()
         self._spell_cache = {}  # Cache for spell lookups
+        self._spell_cache_generation = None  # Spell data generation the cache is valid for
     
     def parse_markdown_table(self, lines: list) -> Tuple[Optional[list], Optional[list], int]:
         """
@@ -149,12 +150,16 @@ class RichTextRenderer:
     def is_spell_name(self, text: str) -> bool:
         """Check if text matches a spell name in the database."""
         text = text.strip()
-        if text in self._spell_cache:
-            return self._spell_cache[text]
-        
         try:
             from database import SpellDatabase
             db = SpellDatabase()
+            generation = db.change_generation('spells')
+            if generation != self._spell_cache_generation:
+                # Spells were added, renamed or deleted since the cache was filled
+                self._spell_cache = {}
+                self._spell_cache_generation = generation
+            if text in self._spell_cache:
+                return self._spell_cache[text]
             spell = db.get_spell_by_name(text)
             result = spell is not None
             self._spell_cache[text] = result
@@ -163,40 +168,15 @@ class RichTextRenderer:
             return False
     
     def get_spell(self, spell_name: str):
-        """Get a Spell object from name."""
+        """Get the session's Spell object for a name (see SpellIdentityMap)."""
         from database import SpellDatabase
-        from spell import Spell, CharacterClass
+        from spell_manager import SpellIdentityMap
         
         db = SpellDatabase()
         spell_dict = db.get_spell_by_name(spell_name.strip())
         if not spell_dict:
             return None
-        
-        # Convert dict to Spell object
-        classes = []
-        for class_name in spell_dict.get('classes', []):
-            try:
-                classes.append(CharacterClass.from_string(class_name))
-            except ValueError:
-                pass
-        
-        return Spell(
-            name=spell_dict['name'],
-            level=spell_dict['level'],
-            casting_time=spell_dict['casting_time'],
-            ritual=spell_dict.get('ritual', False),
-            range_value=spell_dict['range_value'],
-            components=spell_dict['components'],
-            duration=spell_dict['duration'],
-            concentration=spell_dict.get('concentration', False),
-            classes=classes,
-            description=spell_dict.get('description', ''),
-            source=spell_dict.get('source', ''),
-            tags=spell_dict.get('tags', []),
-            is_modified=spell_dict.get('is_modified', False),
-            original_name=spell_dict.get('original_name', ''),
-            is_legacy=spell_dict.get('is_legacy', False)
-        )
+        return SpellIdentityMap.for_database(db.db_path).lookup(spell_dict)
     
     def show_spell_popup(self, parent, spell_name: str):
         """Show a popup dialog for a spell. Shows error message if spell not found."""
@@ -789,13 +769,13 @@ class SpellSelectorDialog(ctk.CTkToplevel):
         self.select_btn.pack(side="right")
     
     def _load_spells(self):
-        """Load all spells from database."""
+        """Load all spells from database (as the session's Spell objects)."""
         try:
             from database import SpellDatabase
+            from spell_manager import SpellIdentityMap
             db = SpellDatabase()
-            spell_dicts = db.get_all_spells()
-            self._all_spells = [(s['name'], s['level']) for s in spell_dicts]
-            self._all_spells.sort(key=lambda x: (x[1], x[0].lower()))
+            self._all_spells = SpellIdentityMap.for_database(db.db_path).lookup_all(db.get_all_spells())
+            self._all_spells.sort(key=lambda spell: (spell.level, spell.name.lower()))
             self._filter_spells()
         except Exception as e:
             print(f"Error loading spells: {e}")
@@ -825,12 +805,12 @@ class SpellSelectorDialog(ctk.CTkToplevel):
         
         # Filter spells
         self._filtered_spells = []
-        for name, level in self._all_spells:
-            if search and search not in name.lower():
+        for spell in self._all_spells:
+            if search and search not in spell.name.lower():
                 continue
-            if level_filter is not None and level != level_filter:
+            if level_filter is not None and spell.level != level_filter:
                 continue
-            self._filtered_spells.append((name, level))
+            self._filtered_spells.append(spell)
         
         self._refresh_list()
     
@@ -854,8 +834,9 @@ class SpellSelectorDialog(ctk.CTkToplevel):
             return
         
         self._spell_buttons = []
-        for name, level in self._filtered_spells:
-            level_text = "Cantrip" if level == 0 else f"Level {level}"
+        for spell in self._filtered_spells:
+            name = spell.name
+            level_text = "Cantrip" if spell.level == 0 else f"Level {spell.level}"
             
             btn = ctk.CTkButton(
                 self.spell_list_frame,
@@ -1487,7 +1468,7 @@ class DynamicText(ctk.CTkFrame):
         """Default handler for spell clicks - shows a popup or error if not found."""
         from ui.spell_detail import SpellPopupDialog
         from database import SpellDatabase
-        from spell import Spell, CharacterClass
+        from spell_manager import SpellIdentityMap
         
         db = SpellDatabase()
         spell_dict = db.get_spell_by_name(spell_name.strip())
@@ -1501,31 +1482,7 @@ class DynamicText(ctk.CTkFrame):
             )
             return
         
-        # Convert dict to Spell object
-        classes = []
-        for class_name in spell_dict.get('classes', []):
-            try:
-                classes.append(CharacterClass.from_string(class_name))
-            except ValueError:
-                pass
-        
-        spell = Spell(
-            name=spell_dict['name'],
-            level=spell_dict['level'],
-            casting_time=spell_dict['casting_time'],
-            ritual=spell_dict.get('ritual', False),
-            range_value=spell_dict['range_value'],
-            components=spell_dict['components'],
-            duration=spell_dict['duration'],
-            concentration=spell_dict.get('concentration', False),
-            classes=classes,
-            description=spell_dict.get('description', ''),
-            source=spell_dict.get('source', ''),
-            tags=spell_dict.get('tags', []),
-            is_modified=spell_dict.get('is_modified', False),
-            original_name=spell_dict.get('original_name', ''),
-            is_legacy=spell_dict.get('is_legacy', False)
-        )
+        spell = SpellIdentityMap.for_database(db.db_path).lookup(spell_dict)
         
         popup = SpellPopupDialog(self.winfo_toplevel(), spell)
         popup.focus()
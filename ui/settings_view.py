@@ -3,9 +3,11 @@ Settings View for D&D Spellbook Application.
 Displays and manages application settings.
 """
 
+import os
 import customtkinter as ctk
 from typing import Callable, Optional
 from settings import SettingsManager
+from db_worker import get_db_worker
 from theme import get_theme_manager
 
 # Theme editor removed: this build supports only appearance modes (Light/Dark/System)
@@ -51,6 +53,10 @@ class SettingsView(ctk.CTkFrame):
         self._preload_backgrounds_var = ctk.BooleanVar(value=settings_manager.settings.preload_backgrounds)
         self._preload_sheets_var = ctk.BooleanVar(value=settings_manager.settings.preload_character_sheets)
         
+        # Backup variables
+        self._auto_backup_var = ctk.BooleanVar(value=settings_manager.settings.auto_backup_enabled)
+        self._backup_keep_var = ctk.StringVar(value=str(settings_manager.settings.backup_keep_count))
+        
         # Apply theme from settings
         theme_name = getattr(settings_manager.settings, 'theme_name', None)
         if theme_name is None:
@@ -521,6 +527,85 @@ class SettingsView(ctk.CTkFrame):
             text_color=text_secondary
         ).pack(anchor="w", pady=(15, 0))
         
+        # === Backups Section ===
+        self._create_section(self.container, "Backups")
+        
+        backup_frame = ctk.CTkFrame(self.container, corner_radius=10)
+        backup_frame.pack(fill="x", pady=(0, 20))
+        
+        backup_content = ctk.CTkFrame(backup_frame, fg_color="transparent")
+        backup_content.pack(fill="x", padx=20, pady=15)
+        
+        self._create_toggle_row(
+            backup_content,
+            "Back up the spell database automatically",
+            self._auto_backup_var,
+            self._on_setting_change
+        )
+        
+        settings = self.settings_manager.settings
+        ctk.CTkLabel(
+            backup_content,
+            text=f"When enabled, a backup is taken in the background after startup if the last one\n"
+                 f"is more than {settings.backup_interval_hours} hours old. Backups older than "
+                 f"{settings.backup_retention_days} days are deleted.",
+            font=ctk.CTkFont(size=12),
+            text_color=text_secondary,
+            justify="left"
+        ).pack(anchor="w", pady=(10, 0))
+        
+        keep_row = ctk.CTkFrame(backup_content, fg_color="transparent")
+        keep_row.pack(fill="x", pady=(15, 0))
+        
+        ctk.CTkLabel(
+            keep_row, text="Backups to keep:",
+            font=ctk.CTkFont(size=14)
+        ).pack(side="left")
+        
+        keep_options = ctk.CTkFrame(keep_row, fg_color="transparent")
+        keep_options.pack(side="right")
+        
+        for count in ("5", "10", "30"):
+            ctk.CTkRadioButton(
+                keep_options, text=count,
+                variable=self._backup_keep_var, value=count,
+                command=self._on_setting_change
+            ).pack(side="left", padx=10)
+        
+        backup_buttons = ctk.CTkFrame(backup_content, fg_color="transparent")
+        backup_buttons.pack(fill="x", pady=(15, 0))
+        
+        self._backup_now_btn = ctk.CTkButton(
+            backup_buttons,
+            text="Back Up Now",
+            width=160,
+            fg_color=self.theme_manager.get_current_color('button_normal'),
+            hover_color=self.theme_manager.get_current_color('button_hover'),
+            text_color=self.theme_manager.get_current_color('text_primary'),
+            command=self._on_backup_now
+        )
+        self._backup_now_btn.pack(side="left")
+        
+        self._restore_backup_btn = ctk.CTkButton(
+            backup_buttons,
+            text="Restore from Backup...",
+            width=180,
+            fg_color=self.theme_manager.get_current_color('button_normal'),
+            hover_color=self.theme_manager.get_current_color('button_hover'),
+            text_color=self.theme_manager.get_current_color('text_primary'),
+            command=self._on_restore_backup
+        )
+        self._restore_backup_btn.pack(side="left", padx=(10, 0))
+        
+        self._backup_status_label = ctk.CTkLabel(
+            backup_content,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color=text_secondary
+        )
+        self._backup_status_label.pack(anchor="w", pady=(10, 0))
+        self._update_backup_status()
+        
         # === About Section ===
         self._create_section(self.container, "About")
         
@@ -651,7 +736,9 @@ class SettingsView(ctk.CTkFrame):
             preload_feats=self._preload_feats_var.get(),
             preload_lineages=self._preload_lineages_var.get(),
             preload_backgrounds=self._preload_backgrounds_var.get(),
-            preload_character_sheets=self._preload_sheets_var.get()
+            preload_character_sheets=self._preload_sheets_var.get(),
+            auto_backup_enabled=self._auto_backup_var.get(),
+            backup_keep_count=int(self._backup_keep_var.get())
         )
     
     def _on_restore_all_spells(self):
@@ -678,15 +765,84 @@ class SettingsView(ctk.CTkFrame):
             "Are you sure you want to continue?",
             parent=self.winfo_toplevel()
         ):
-            restored = self.spell_manager.restore_all_official_spells()
-            if restored > 0:
-                messagebox.showinfo("Success", 
-                    f"Restored {restored} official spell(s) to their default versions.",
+            def on_restored(restored: int):
+                if restored > 0:
+                    messagebox.showinfo("Success", 
+                        f"Restored {restored} official spell(s) to their default versions.",
+                        parent=self.winfo_toplevel())
+                else:
+                    messagebox.showerror("Error", 
+                        "Failed to restore spells. Please try again.",
+                        parent=self.winfo_toplevel())
+            
+            # Runs on the database worker so the window stays responsive
+            future = self.spell_manager.restore_all_official_spells_async()
+            get_db_worker().deliver(self, future, on_restored)
+    
+    def _update_backup_status(self):
+        """Show when the spell database was last backed up."""
+        from backup_service import get_backup_service
+        last = get_backup_service().last_backup_time()
+        text = f"Last backup: {last.strftime('%Y-%m-%d %H:%M')}" if last else "No backups yet."
+        self._backup_status_label.configure(text=text)
+    
+    def _on_backup_now(self):
+        """Back up the spell database in the background."""
+        from tkinter import messagebox
+        from backup_service import get_backup_service
+        
+        def on_done(path):
+            self._backup_now_btn.configure(state="normal")
+            self._update_backup_status()
+            if not path:
+                messagebox.showerror("Error", "Failed to back up the spell database.",
+                                     parent=self.winfo_toplevel())
+        
+        self._backup_now_btn.configure(state="disabled")
+        self._backup_status_label.configure(text="Backing up...")
+        future = get_backup_service().backup_async()
+        get_db_worker().deliver(self, future, on_done, lambda _error: on_done(None))
+    
+    def _on_restore_backup(self):
+        """Replace the spell database with a chosen backup."""
+        from tkinter import messagebox, filedialog
+        from backup_service import get_backup_service
+        
+        if not self.spell_manager:
+            messagebox.showerror("Error", "Spell manager not available.", parent=self.winfo_toplevel())
+            return
+        
+        service = get_backup_service()
+        backup_path = filedialog.askopenfilename(
+            parent=self.winfo_toplevel(),
+            title="Restore from Backup",
+            initialdir=service.backup_dir if os.path.isdir(service.backup_dir) else None,
+            filetypes=[("Spellbook backups", "*.bak"), ("All files", "*.*")]
+        )
+        if not backup_path:
+            return
+        
+        if not messagebox.askyesno(
+            "Restore from Backup",
+            f"Replace all spells and custom content with the backup\n{os.path.basename(backup_path)}?\n\n"
+            "The current database is backed up first, so this can be undone.",
+            parent=self.winfo_toplevel()
+        ):
+            return
+        
+        def on_restored(restored: bool):
+            self._update_backup_status()
+            if restored:
+                messagebox.showinfo("Success",
+                    "The spell database was restored. Restart Spellbook to reload all other content.",
                     parent=self.winfo_toplevel())
             else:
-                messagebox.showerror("Error", 
-                    "Failed to restore spells. Please try again.",
+                messagebox.showerror("Error",
+                    "Failed to restore the backup. Your current data was not changed.",
                     parent=self.winfo_toplevel())
+        
+        future = self.spell_manager.restore_from_backup_async(backup_path, service)
+        get_db_worker().deliver(self, future, on_restored)
     
     def _on_reset_defaults(self):
         """Reset all settings to defaults."""
@@ -714,6 +870,8 @@ class SettingsView(ctk.CTkFrame):
         self._warn_multiclass_var.set(settings.warn_multiclass_removal)
         self._hit_dice_rest_var.set(settings.long_rest_hit_dice)
         self._legacy_filter_var.set(settings.legacy_content_filter)
+        self._auto_backup_var.set(settings.auto_backup_enabled)
+        self._backup_keep_var.set(str(settings.backup_keep_count))
         
         # Update edit button visibility
         self._update_theme_editor_visibility()
@@ -748,6 +906,8 @@ class SettingsView(ctk.CTkFrame):
         self._preload_lineages_var.set(settings.preload_lineages)
         self._preload_backgrounds_var.set(settings.preload_backgrounds)
         self._preload_sheets_var.set(settings.preload_character_sheets)
+        self._auto_backup_var.set(settings.auto_backup_enabled)
+        self._backup_keep_var.set(str(settings.backup_keep_count))
         self._update_theme_editor_visibility()
 
     def _on_theme_changed(self):